@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""dataFrameWriteBenchmark
+
+Compare turning a big DataFrame into line protocol (and writing it to a
+local fakeinflux server) with DataFrameClient against the column-wise
+bulkwrite path.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from influxdb import DataFrameClient
+
+from ligmos.utils import bulkwrite, database, fakeinflux
+
+
+def fakeFrame(nrows=200000):
+    """
+    Something like a re-ingested analysis product; a few tags and a mix
+    of float, integer, and string fields at 1 Hz
+    """
+    rng = np.random.default_rng(42)
+    idx = pd.date_range('2026-01-01', periods=nrows, freq='s', tz='UTC')
+    df = pd.DataFrame({'instrument': rng.choice(['DeVeny', 'LMI', 'NIHTS'],
+                                                size=nrows),
+                       'filter': rng.choice(['V', 'R', 'I', 'OIII'],
+                                            size=nrows),
+                       'seeing': rng.normal(1.2, 0.2, size=nrows),
+                       'airmass': rng.uniform(1., 2.5, size=nrows),
+                       'counts': rng.integers(0, 65535, size=nrows),
+                       'state': rng.choice(['good', 'cloudy'], size=nrows)},
+                      index=idx)
+
+    return df
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        nrows = int(sys.argv[1])
+    else:
+        nrows = 200000
+
+    df = fakeFrame(nrows=nrows)
+    tags = ['instrument', 'filter']
+    fields = ['seeing', 'airmass', 'counts', 'state']
+    print("%d rows" % (nrows))
+
+    # Encoding only
+    dfc = DataFrameClient()
+    t0 = time.perf_counter()
+    dfc._convert_dataframe_to_lines(df, 'bench', field_columns=fields,
+                                    tag_columns=tags, time_precision='n')
+    tdfc = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    nbytes = 0
+    for body in bulkwrite.dataFrameLines(df, 'bench', tagcols=tags,
+                                         fieldcols=fields, chunksize=50000):
+        nbytes += len(body)
+    tbulk = time.perf_counter() - t0
+
+    print("Encoding:")
+    print("  %-24s %8.3f s  %10.0f rows/s" % ('DataFrameClient', tdfc,
+                                               nrows/tdfc))
+    print("  %-24s %8.3f s  %10.0f rows/s  (%.1f MB)" % ('bulkwrite', tbulk,
+                                                         nrows/tbulk,
+                                                         nbytes/1e6))
+
+    # End to end, with the fake server just counting what it gets
+    srv = fakeinflux.fakeInfluxServer(parse=False)
+    srv.start()
+
+    print("Writing to fakeinflux:")
+    dfc = DataFrameClient(host='127.0.0.1', port=srv.port, database='bench',
+                          timeout=120)
+    t0 = time.perf_counter()
+    dfc.write_points(df, 'bench', tag_columns=tags, field_columns=fields,
+                     time_precision='n', batch_size=50000)
+    tdfc = time.perf_counter() - t0
+    print("  %-24s %8.3f s  %d points" % ('DataFrameClient', tdfc,
+                                          srv.npoints))
+
+    srv.reset()
+    idb = database.influxobj(tablename='bench', host='127.0.0.1',
+                             port=srv.port, keepalive=True, timeout=120)
+    t0 = time.perf_counter()
+    idb.writeDataFrame(df, 'bench', tagcols=tags, fieldcols=fields,
+                       chunksize=50000)
+    tbulk = time.perf_counter() - t0
+    print("  %-24s %8.3f s  %d points" % ('bulkwrite', tbulk, srv.npoints))
+
+    idb.shutdown()
+    srv.stop()
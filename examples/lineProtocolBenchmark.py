@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""lineProtocolBenchmark
+
+Compare the time it takes to turn a flattened telemetry packet into
+InfluxDB line protocol via the usual makeInfluxPacket -> influxdb-python
+make_lines path against packetizer.makeLine, which skips the dicts.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import timeit
+
+from influxdb.line_protocol import make_lines
+
+from ligmos.utils import packetizer
+
+
+def fakeFields(nfields=60):
+    """
+    Something roughly the shape of a flattened TCS status packet
+    """
+    fields = {}
+    for i in range(nfields):
+        if i % 5 == 0:
+            fields.update({"status_flag_%03d" % (i): bool(i % 2)})
+        elif i % 5 == 1:
+            fields.update({"state_name_%03d" % (i): "TRACKING"})
+        elif i % 5 == 2:
+            fields.update({"counter_%03d" % (i): i*1000})
+        else:
+            fields.update({"axis_position_%03d" % (i): i*1.2345})
+
+    return fields
+
+
+if __name__ == "__main__":
+    nloops = 2000
+    fields = fakeFields()
+    meas = ['TCS.TCSSharedVariables.TCSHighLevelStatusSV.TCSTcsStatusSV']
+    ts = int(time.time()*1e3)
+
+    def dictPath():
+        packet = packetizer.makeInfluxPacket(meas=meas, ts=ts,
+                                             tags=None, fields=fields)
+        return make_lines({'points': packet}, precision='ms').encode("utf-8")
+
+    def linePath():
+        return packetizer.makeLines([packetizer.makeLine(meas[0],
+                                                         fields=fields,
+                                                         ts=ts)])
+
+    # Make sure they're actually making the same thing first.  make_lines
+    #   sorts the fields and writes booleans as True/False, neither of
+    #   which matter to InfluxDB, so compare with that smoothed over
+    def normalized(line):
+        meas, fields, ts = line.decode("utf-8").split(" ")
+        return meas, sorted(fields.lower().split(",")), ts
+
+    if normalized(dictPath()) != normalized(linePath()):
+        print("WARNING: Outputs differ!")
+        print(dictPath())
+        print(linePath())
+
+    for name, func in [('makeInfluxPacket + make_lines', dictPath),
+                       ('packetizer.makeLine', linePath)]:
+        best = min(timeit.repeat(func, number=nloops, repeat=5))
+        print("%-32s %8.2f us/packet" % (name, 1e6*best/nloops))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""writeBenchmark
+
+Write the same stream of packets through influxobj a few different ways
+(connect-write-close per packet like the parsers used to, keepalive, and
+batched) against a local fakeinflux server with some injected latency,
+so the differences show up without needing a real database.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+from ligmos.utils import database, fakeinflux
+
+
+def fakePackets(npackets=500, nfields=20):
+    """
+    One packet per second's worth of made up telemetry
+    """
+    now = int(time.time()) - npackets
+    packets = []
+    for i in range(npackets):
+        fields = {"value_%02d" % (j): i*1.5 + j for j in range(nfields)}
+        packets.append([{'measurement': 'bench',
+                         'tags': {'host': 'tcs'},
+                         'fields': fields,
+                         'time': now + i}])
+
+    return packets
+
+
+if __name__ == "__main__":
+    npackets = 500
+    latency = 0.002
+
+    srv = fakeinflux.fakeInfluxServer(latency=latency)
+    srv.start()
+
+    packets = fakePackets(npackets=npackets)
+
+    setups = [('open/write/close', {}),
+              ('keepalive', {'keepalive': True}),
+              ('batched (500)', {'batchsize': 500, 'flushms': 1000.})]
+
+    print("%d packets, %.1f ms of server latency per request" %
+          (npackets, 1e3*latency))
+    for name, kwargs in setups:
+        srv.reset()
+        idb = database.influxobj(tablename='bench', host='127.0.0.1',
+                                 port=srv.port, connect=False, **kwargs)
+        t0 = time.perf_counter()
+        for packet in packets:
+            idb.singleCommit(packet, table='bench', close=True)
+        idb.flush()
+        elapsed = time.perf_counter() - t0
+        idb.shutdown()
+
+        print("%-20s %8.3f s  %8.1f packets/s  %5d requests  %5d points" %
+              (name, elapsed, npackets/elapsed, srv.nwrites, srv.npoints))
+
+    srv.stop()
@@ -1,2 +1,14 @@
-from . import utils
-from . import workers
+# Same deal as in utils; nothing is imported until it's actually used
+import importlib
+
+__all__ = ['utils', 'workers']
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(list(globals().keys()) + __all__))
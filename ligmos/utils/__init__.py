@@ -1,20 +1,52 @@
-from . import alarms
-from . import amq
-from . import amqListeners
-from . import messageParsers
-from . import xmlschemas
-from . import classes
-from . import common
-from . import confparsers
-from . import cpumem
-from . import database
-from . import dateutils
-from . import hashes
-from . import files
-from . import logs
-from . import multialarm
-from . import packetizer
-from . import pids
-from . import pingaling
-from . import rsyncer
-from . import ssh
+# Submodules are only imported the first time they're asked for (as
+#   ligmos.utils.<name>, or with from ligmos.utils import <name>), so that
+#   using something light like numpyquery doesn't also mean importing
+#   pandas, influxdb-python, stomp, and everything else in here.
+import importlib
+
+__all__ = ['alarms',
+           'amq',
+           'amqListeners',
+           'backoff',
+           'batching',
+           'bulkwrite',
+           'messageParsers',
+           'metrics',
+           'xmlschemas',
+           'classes',
+           'common',
+           'confparsers',
+           'cpumem',
+           'database',
+           'deadband',
+           'dateutils',
+           'diskcache',
+           'fakeinflux',
+           'fanout',
+           'fieldtypes',
+           'hashes',
+           'files',
+           'latest',
+           'logs',
+           'multialarm',
+           'numpyquery',
+           'packetizer',
+           'pids',
+           'pingaling',
+           'querybuilder',
+           'querycache',
+           'rsyncer',
+           'sharding',
+           'spool',
+           'ssh',
+           'udp']
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(list(globals().keys()) + __all__))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Retry policy (exponential backoff with jitter) and a circuit breaker.
+
+The retry policy just answers "how many times" and "how long to wait";
+the circuit breaker keeps track of whether the far end is known to be
+down so callers can fail fast (or divert somewhere else) instead of
+waiting on a timeout every single time.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import random
+import threading
+
+from . import metrics
+
+# What each state reads as in the 'breaker_state' gauge
+breakerStates = {'closed': 0, 'halfopen': 1, 'open': 2}
+
+
+class retryPolicy():
+    """
+    maxattempts: total number of tries, including the first one
+
+    basedelay: delay (seconds) before the first retry; doubles each time
+
+    maxdelay: cap on any single delay
+
+    jitter: if True, use "full jitter" (a uniformly random delay between 0
+            and the computed one) so a pile of clients that failed at the
+            same time don't all come back at the same time too
+    """
+    def __init__(self, maxattempts=3, basedelay=0.1, maxdelay=5.,
+                 jitter=True):
+        self.maxattempts = int(maxattempts)
+        self.basedelay = float(basedelay)
+        self.maxdelay = float(maxdelay)
+        self.jitter = jitter
+
+        self.retries = 0
+
+    def delay(self, attempt):
+        """
+        Seconds to wait after the given (zero based) failed attempt
+        """
+        cap = min(self.maxdelay, self.basedelay * (2**attempt))
+        if self.jitter is True:
+            return random.uniform(0, cap)
+        return cap
+
+    def again(self, attempt):
+        """
+        True if there should be another try after the given (zero based)
+        failed attempt
+        """
+        return attempt + 1 < self.maxattempts
+
+    def wait(self, attempt):
+        """
+        Sleep for the right amount of time after the given failed attempt
+        """
+        self.retries += 1
+        time.sleep(self.delay(attempt))
+
+
+class circuitBreaker():
+    """
+    Classic three state circuit breaker.
+
+    closed: all is well, everything goes through
+    open: failthreshold failures in a row happened; nothing goes through
+          until resetsec seconds have passed
+    halfopen: resetsec passed, so one trial goes through.  If it works
+              we're closed again, and if it doesn't we're back to open.
+              If it never says either way, another trial is allowed
+              after resetsec more.
+
+    Every state change is counted in self.transitions as 'from->to'.
+    The state (see breakerStates) and the transitions also go into the
+    'breaker_state' gauge and 'breaker_transitions' counters of registry
+    (metrics.defaultRegistry if None), labeled with database=name.
+    """
+    def __init__(self, failthreshold=5, resetsec=30., name='',
+                 registry=None):
+        self.failthreshold = int(failthreshold)
+        self.resetsec = float(resetsec)
+        self.name = name
+
+        if registry is None:
+            registry = metrics.defaultRegistry
+        self.registry = registry
+        self.stategauge = registry.gauge('breaker_state', database=str(name))
+
+        self.state = 'closed'
+        self.failures = 0
+        self.openedat = None
+        self.trialat = None
+
+        self.transitions = {}
+        self.rejected = 0
+
+        self.lock = threading.Lock()
+
+    def _moveTo(self, newstate):
+        """
+        Expects that the caller is holding self.lock
+        """
+        if newstate != self.state:
+            key = "%s->%s" % (self.state, newstate)
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+            self.registry.counter('breaker_transitions',
+                                  database=str(self.name),
+                                  transition=key).inc()
+            print("Circuit %s: %s" % (self.name, key))
+            self.state = newstate
+            self.stategauge.set(breakerStates[newstate])
+            if newstate == 'open':
+                self.openedat = time.monotonic()
+
+    def allow(self):
+        """
+        True if a call should go ahead right now
+        """
+        with self.lock:
+            if self.state == 'open':
+                if time.monotonic() - self.openedat >= self.resetsec:
+                    self._moveTo('halfopen')
+                    self.trialat = time.monotonic()
+                    return True
+                self.rejected += 1
+                return False
+            elif self.state == 'halfopen':
+                if time.monotonic() - self.trialat >= self.resetsec:
+                    # Whoever had the trial never reported back
+                    self.trialat = time.monotonic()
+                    return True
+                # Only the one trial at a time
+                self.rejected += 1
+                return False
+
+            return True
+
+    def success(self):
+        """
+        Record that a call worked
+        """
+        with self.lock:
+            self.failures = 0
+            self._moveTo('closed')
+
+    def failure(self):
+        """
+        Record that a call failed because the far end is having problems
+        """
+        with self.lock:
+            self.failures += 1
+            if self.state == 'halfopen' or \
+               self.failures >= self.failthreshold:
+                self._moveTo('open')
+                # Restart the clock even if we were already open
+                self.openedat = time.monotonic()
+
+    def stats(self):
+        """
+        Current state and counters as a dict
+        """
+        with self.lock:
+            info = {'state': self.state,
+                    'failures': self.failures,
+                    'rejected': self.rejected}
+            info.update(self.transitions)
+            return info
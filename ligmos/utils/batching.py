@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""In-memory write buffer that batches database points in the background.
+
+Points are collected per (table, time precision) group and handed off
+to a flush function in one go when either enough of them have piled up
+or the oldest one has been waiting long enough, whichever comes first.
+
+Optionally, points that share a measurement, tag set, and timestamp are
+coalesced into one point with the union of their fields while they wait,
+which is what InfluxDB would end up storing anyway but with fewer points
+(and bytes) on the wire and less index work on the server.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import atexit
+import threading
+
+from . import metrics
+from . import packetizer
+
+
+class pointBuffer():
+    """
+    Buffers points (in the makeInfluxPacket dict style) and calls
+    flushfunc(points, table, timeprec) from a background thread.
+
+    batchsize: flush when at least this many points are pending, and
+               the largest number of points sent in a single flushfunc call
+
+    flushms: flush when the oldest pending point is this many milliseconds old
+
+    coalesce: if 'last' or 'first', merge pending points with the same
+              measurement, tags, and timestamp into one.  When both have
+              the same field with different values, 'last' keeps the one
+              that arrived last (same as the server would) and 'first'
+              keeps the original.  None (the default) leaves them alone.
+
+    registry/name: the number of points pending is kept in the
+                   'buffer_pending' gauge of registry (a
+                   metrics.metricsRegistry, metrics.defaultRegistry if
+                   None), labeled with database=name
+    """
+    def __init__(self, flushfunc, batchsize=500, flushms=1000.,
+                 coalesce=None, registry=None, name=''):
+        self.flushfunc = flushfunc
+        self.batchsize = int(batchsize)
+        self.flushms = float(flushms)
+
+        if coalesce not in [None, 'last', 'first']:
+            print("Unknown coalesce rule %s; not coalescing!" % (coalesce))
+            coalesce = None
+        self.coalesce = coalesce
+
+        # Keyed by (table, timeprec) since each write_points call can only
+        #   have one of each
+        self.pending = {}
+        self.npending = 0
+        self.oldest = None
+
+        # Position of each (measurement, tags, time) in its pending list,
+        #   per (table, timeprec), for coalescing
+        self.index = {}
+
+        # Bookkeeping
+        self.coalesced = 0
+        self.conflicts = 0
+
+        if registry is None:
+            registry = metrics.defaultRegistry
+        self.depth = registry.gauge('buffer_pending', database=str(name))
+
+        self.cond = threading.Condition()
+        self.halt = False
+
+        # Held while swapping out and sending a batch, so flush() waits on
+        #   (and goes after) one the flusher thread is already sending
+        self.sendlock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._flusher,
+                                       name='ligmos-pointBuffer',
+                                       daemon=True)
+        self.thread.start()
+
+        # The flusher is a daemon thread so make sure we don't leave
+        #   stuff sitting in memory when the interpreter goes away
+        atexit.register(self.stop)
+
+    def add(self, points, table=None, timeprec='s'):
+        """
+        Add a list of points to the buffer.
+
+        Points without a timestamp would normally be stamped by the server
+        when they arrive, but now they can sit here for a bit and land in the
+        same request as others of the same series; stamp them here (in ns,
+        which influxdb-python spells 'n') so they don't overwrite each other.
+        """
+        # Keep 'ns' and 'n' (influxdb-python's spelling) in the same group
+        if timeprec == 'ns':
+            timeprec = 'n'
+
+        given, stamped = packetizer.stampMissing(packetizer.asPoints(points))
+
+        with self.cond:
+            if given != []:
+                self._append((table, timeprec), given)
+            if stamped != []:
+                self._append((table, 'n'), stamped)
+
+            self.depth.set(self.npending)
+            if self.npending >= self.batchsize:
+                self.cond.notify()
+
+    def _append(self, key, points):
+        """
+        Expects that the caller is holding self.cond
+        """
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+            # Wake the flusher so it starts the clock on this batch
+            self.cond.notify()
+
+        bucket = self.pending.setdefault(key, [])
+        if self.coalesce is None:
+            bucket.extend(points)
+            self.npending += len(points)
+            return
+
+        index = self.index.setdefault(key, {})
+        for pt in points:
+            ckey = self._coalesceKey(pt)
+            if ckey is None or ckey not in index:
+                if ckey is not None:
+                    index.update({ckey: len(bucket)})
+                bucket.append(pt)
+                self.npending += 1
+            else:
+                pos = index[ckey]
+                bucket[pos] = self._merge(bucket[pos], pt)
+                self.coalesced += 1
+
+    def _coalesceKey(self, pt):
+        """
+        (measurement, tags, time) for a point that can be coalesced,
+        or None for anything that can't (line protocol, odd values)
+        """
+        if not isinstance(pt, dict) or pt.get('time', None) is None:
+            return None
+
+        tags = pt.get('tags', None) or {}
+        try:
+            ckey = (pt['measurement'], tuple(sorted(tags.items())),
+                    pt['time'])
+            hash(ckey)
+        except (KeyError, TypeError):
+            return None
+
+        return ckey
+
+    def _merge(self, old, new):
+        """
+        Union of the fields of two points of the same series and time,
+        settling any differences by the coalesce rule.  The result is a
+        copy, so the callers' packets aren't touched.
+        """
+        fields = dict(old.get('fields', None) or {})
+        for field, val in (new.get('fields', None) or {}).items():
+            if field in fields:
+                if fields[field] != val:
+                    self.conflicts += 1
+                    if self.coalesce == 'last':
+                        fields[field] = val
+            else:
+                fields[field] = val
+
+        return dict(old, fields=fields)
+
+    def _swap(self):
+        """
+        Take everything that's pending and reset the buffer.
+        Expects that the caller is holding self.cond
+        """
+        batches = self.pending
+        self.pending = {}
+        self.index = {}
+        self.npending = 0
+        self.oldest = None
+        self.depth.set(0)
+
+        return batches
+
+    def _flusher(self):
+        """
+        Background loop; waits for a size or age trigger and then sends
+        everything that's pending.
+        """
+        while True:
+            with self.cond:
+                while self.halt is False:
+                    if self.npending == 0:
+                        self.cond.wait()
+                        continue
+
+                    age = time.monotonic() - self.oldest
+                    remaining = self.flushms/1000. - age
+                    if self.npending >= self.batchsize or remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                stopping = self.halt
+
+            with self.sendlock:
+                with self.cond:
+                    batches = self._swap()
+                self._send(batches)
+
+            if stopping is True:
+                break
+
+    def _send(self, batches):
+        """
+        Hand each group off to flushfunc, at most batchsize points at a time
+        """
+        for (table, timeprec), points in batches.items():
+            for i in range(0, len(points), self.batchsize):
+                chunk = points[i:i+self.batchsize]
+                try:
+                    self.flushfunc(chunk, table, timeprec)
+                except Exception as err:
+                    # Don't let one bad batch kill the flusher thread
+                    print("Buffered write of %d points failed!" % (len(chunk)))
+                    print(str(err))
+
+    def flush(self):
+        """
+        Synchronously send everything that's pending right now
+        """
+        with self.sendlock:
+            with self.cond:
+                batches = self._swap()
+            self._send(batches)
+
+    def stats(self):
+        """
+        Buffer depth and coalescing counters as a dict
+        """
+        with self.cond:
+            return {'pending': self.npending,
+                    'coalesced': self.coalesced,
+                    'conflicts': self.conflicts}
+
+    def stop(self):
+        """
+        Stop the background thread, flushing anything left over first
+        """
+        with self.cond:
+            if self.halt is True:
+                return
+            self.halt = True
+            self.cond.notify()
+        # Or the exit hook keeps this alive forever
+        atexit.unregister(self.stop)
+        self.thread.join()
@@ -125,6 +125,18 @@ class databaseQuery(object):
     self.connection after this is created.
 
     This isn't intended to be for writing to a database.
+
+    Optional server side downsampling:
+
+    aggregate: InfluxQL function (mean, max, last, ...) to apply to the
+               fields; either one for all of them, or a list with one
+               per field
+
+    groupbytime: interval (like 5m or 1h) to aggregate into; combined
+                 with the tag grouping (tagnames/tagvals) if there is one
+
+    fill: what empty intervals get; null, none, previous, linear, or a
+          number.  Leave as None for the server default (null).
     """
     def __init__(self):
         self.database = None
@@ -135,6 +147,9 @@ class databaseQuery(object):
         self.tagnames = None
         self.tagvals = None
         self.rangehours = 24
+        self.aggregate = None
+        self.groupbytime = None
+        self.fill = None
 
 
 class baseTarget(object):
@@ -153,6 +168,108 @@ class baseTarget(object):
         self.enabled = False
 
 
+class databaseTarget(baseTarget):
+    """
+    Subclasses baseTarget class
+
+    Used for the common 'database-' configuration sections, with the
+    extra knobs that control how influxobj talks to the server.
+
+    keepalive: reuse one pooled HTTP session across writes rather than
+               opening and closing a client for every singleCommit
+
+    poolsize: number of pooled HTTP connections kept around in keepalive mode
+
+    batchsize: if set, buffer points and write them in batches of this size
+
+    flushms: longest time (milliseconds) a buffered point waits to be sent
+
+    shards: with batchsize, write batches over this many concurrent
+            connections, split by measurement or by series
+            (shardby = measurement or hash), keeping at most
+            maxinflightbytes of request bodies in flight at once
+
+    coalesce: 'last' or 'first' to merge buffered points that share a
+              measurement, tags, and timestamp (settling duplicate fields
+              by the given rule)
+
+    spooldir: if set, spool failed writes to disk here and replay them later
+
+    spoolmaxbytes: upper limit on the disk used by the spool
+
+    usegzip: gzip compress write bodies of at least gzipminbytes bytes,
+             at compression level gziplevel (1-9)
+
+    typefile: JSON file to keep learned per-field types in, so values can
+              be coerced before they cause a field type conflict
+
+    typeschemas: seed those field types from the ligmos XML schemas
+
+    retries: how many more times to try a write that failed because of the
+             server, with backoff starting at retrydelay seconds
+
+    breakerfails: failed writes in a row before giving up on the server
+                  for breakerreset seconds (circuit breaker)
+
+    deadbandabs, deadbandrel: drop fields that haven't changed by more than
+                              this much (absolute, or as a fraction of the
+                              last written value) since they were last
+                              written; a field is still written at least
+                              every deadbandforce seconds
+
+    deadbandfile: JSON file of per-measurement/per-field deadband rules;
+                  if only this is given, just those measurements are
+                  filtered
+
+    metricsmeas: if set, write the write-path metrics (latency, points,
+                 bytes, retries, errors) into this measurement every
+                 metricsinterval seconds
+
+    udpport: if set, write to the server's UDP listener on this port
+             instead of over HTTP (lossy, but never waits); points are
+             packed into datagrams of at most udpmtu bytes, with timestamps
+             in udpprecision to match the listener's configuration
+
+    org: InfluxDB 2.x organization, for type = influxdb2 sections
+
+    Remember that assignConf sets anything missing from the configuration
+    section to None, so consumers need to fall back to their own defaults!
+    """
+    def __init__(self):
+        # Gather up the properties from the base class
+        super().__init__()
+
+        self.keepalive = False
+        self.poolsize = 10
+        self.batchsize = None
+        self.flushms = 1000.
+        self.coalesce = None
+        self.shards = None
+        self.shardby = 'measurement'
+        self.maxinflightbytes = None
+        self.spooldir = None
+        self.spoolmaxbytes = 512*1024*1024
+        self.usegzip = False
+        self.gziplevel = 5
+        self.gzipminbytes = 1024
+        self.typefile = None
+        self.typeschemas = False
+        self.retries = 0
+        self.retrydelay = 0.1
+        self.breakerfails = None
+        self.breakerreset = 30.
+        self.deadbandabs = None
+        self.deadbandrel = None
+        self.deadbandforce = 300.
+        self.deadbandfile = None
+        self.metricsmeas = None
+        self.metricsinterval = 60.
+        self.udpport = None
+        self.udpmtu = 1400
+        self.udpprecision = 'n'
+        self.org = None
+
+
 class snoopTarget(baseTarget):
     """
     Subclasses baseTarget class
@@ -128,7 +128,8 @@ def checkCommon(cfg):
     Expects that cfg is a dict of configparser sections, which are then
     assigned to an instance of an appropriate type for that section.
 
-    database- and broker- are of type classes.baseTarget
+    database- is of type classes.databaseTarget
+    broker- is of type classes.baseTarget
     queue is of type classes.brokerCommandingTarget
     """
     comms = {}
@@ -142,7 +143,9 @@ def checkCommon(cfg):
     sects = cfg.keys()
 
     for tag in commonTags:
-        if tag in ['database-', 'broker-']:
+        if tag in ['database-']:
+            objtype = classes.databaseTarget
+        elif tag in ['broker-']:
             objtype = classes.baseTarget
         elif tag in ['queue-']:
             objtype = classes.brokerCommandingTarget
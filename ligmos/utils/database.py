@@ -10,14 +10,24 @@
 
 from __future__ import division, print_function, absolute_import
 
+import copy
+import gzip
+import atexit
 import json
+import time
+import threading
 import datetime as dt
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
 
 import pytz
 import numpy as np
 import pandas as pd
 
+import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError as RCE
+from requests.exceptions import Timeout as RTO
 
 # Import the (depreciated) influxdb-python library
 try:
@@ -25,61 +35,477 @@ try:
     from influxdb import InfluxDBClient
     from influxdb import DataFrameClient
     from influxdb.exceptions import InfluxDBClientError
+    from influxdb.exceptions import InfluxDBServerError
 except (ImportError, ModuleNotFoundError) as err:
     influxdb = None
 
 from . import alarms
+from . import backoff
+from . import batching
+from . import bulkwrite
+from . import metrics
+from . import numpyquery
+from . import sharding
+from . import spool
+from . import udp
+from . import packetizer
+from .querybuilder import queryConstructor, batchQueryConstructor
+
+
+# InfluxDB 2.x only takes these, and spells them differently than 1.x
+_v2Precisions = {'n': 'ns', 'ns': 'ns', 'u': 'us', 'us': 'us',
+                 'ms': 'ms', 's': 's'}
+
+
+def compressBody(body, headers, usegzip=False, level=5, minbytes=1024):
+    """
+    Gzip the given request body if usegzip is True and it's at least
+    minbytes long, adding the Content-Encoding to headers (in place).
+    Returns the (possibly) compressed body.
+    """
+    if usegzip is True and len(body) >= minbytes:
+        body = gzip.compress(body, compresslevel=level)
+        headers.update({'Content-Encoding': 'gzip'})
+
+    return body
 
 
 class influx2obj():
     """
+    Creates an InfluxDB 2.x writer, specific to a bucket (tablename).
+
+    Has the same write()/singleCommit() interface as influxobj so the
+    messageParsers can use either one, but talks straight to the v2
+    /api/v2/write endpoint with org/bucket/token auth.  The HTTP session
+    (and its connection pool) is always kept alive between writes.
+
+    token defaults to pw, so it can live in the passwords file like
+    everything else.  batchsize/flushms/coalesce and
+    usegzip/gziplevel/gzipminbytes work just like they do in influxobj.
     """
     def __init__(self, tablename=None, connect=True,
                  host='localhost', port=8086,
-                 user='marty', pw='mcfly'):
+                 user='marty', pw='mcfly',
+                 org=None, token=None, usessl=False,
+                 poolsize=10, timeout=5.,
+                 batchsize=None, flushms=1000., coalesce=None,
+                 usegzip=False, gziplevel=5, gzipminbytes=1024):
         self.host = host
         self.port = port
         self.username = user
         self.password = pw
         self.tablename = tablename
 
+        self.org = org
+        if token is None:
+            token = pw
+        self.token = token
+
+        if usessl is True:
+            scheme = 'https'
+        else:
+            scheme = 'http'
+        self.url = "%s://%s:%s/api/v2/write" % (scheme, host, port)
+
+        self.poolsize = poolsize
+        self.timeout = timeout
+
+        self.usegzip = usegzip
+        self.gziplevel = gziplevel
+        self.gzipminbytes = gzipminbytes
+
+        self.lock = threading.RLock()
+        self.session = None
+
+        if batchsize is not None and int(batchsize) > 0:
+            self.buffer = batching.pointBuffer(self._flushBatch,
+                                               batchsize=batchsize,
+                                               flushms=flushms,
+                                               coalesce=coalesce,
+                                               name=tablename)
+        else:
+            self.buffer = None
+
+        if connect is True:
+            self.openDB()
+
+    def openDB(self):
+        """
+        """
+        with self.lock:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1,
+                                  pool_maxsize=self.poolsize)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update({'Authorization':
+                                         'Token %s' % (self.token),
+                                         'Content-Type':
+                                         'text/plain; charset=utf-8'})
+
+    def closeDB(self):
+        """
+        """
+        with self.lock:
+            if self.session is not None:
+                try:
+                    self.session.close()
+                except Exception as err:
+                    print(str(err))
+                self.session = None
+
+    def writeToDB(self, vals, table=None, timeprec='s', debug=False):
+        """
+        Write packets (from packetizer.makeInfluxPacket) or line protocol
+        bytes to the given bucket, or self.tablename if table is None.
+
+        Returns True if the points were accepted, False otherwise.
+        """
+        if table is None:
+            table = self.tablename
+
+        prec = _v2Precisions.get(timeprec, None)
+        if prec is None:
+            print("InfluxDB 2.x doesn't do time precision %s!" % (timeprec))
+            return False
+
+        if isinstance(vals, bytes):
+            body = vals
+        else:
+            try:
+                body = packetizer.makeLines(vals, timeprec=timeprec)
+            except ValueError as err:
+                print(str(err))
+                return False
+        if body == b'':
+            print("Nothing to write!")
+            return True
+
+        headers = {}
+        body = compressBody(body, headers, usegzip=self.usegzip,
+                            level=self.gziplevel, minbytes=self.gzipminbytes)
+        params = {'org': self.org, 'bucket': table, 'precision': prec}
+
+        res = False
+        with self.lock:
+            # Always reconnect if we need to
+            if self.session is None:
+                self.openDB()
+
+            if debug is True:
+                print("Trying to write to %s" % (self.url))
+
+            try:
+                resp = self.session.post(self.url, params=params, data=body,
+                                         headers=headers,
+                                         timeout=self.timeout)
+                if resp.status_code == 204:
+                    res = True
+                elif resp.status_code in [401, 403]:
+                    print("Authentication error! %s" % (resp.text))
+                elif resp.status_code >= 500:
+                    print("InfluxDB server error! %s" % (resp.text))
+                else:
+                    # Usually a bad bucket/org or a field type conflict
+                    print(resp.status_code, resp.text)
+            except RCE as err:
+                print("Fatal Connection Error!")
+                print("Is InfluxDB running?")
+                self.closeDB()
+            except RTO as err:
+                print("InfluxDB post timed out!")
+                self.closeDB()
+
+        if res is False:
+            print("INFLUXDB ERROR. Check above for more details :(")
+
+        return res
+
+    def connect(self):
+        # Just a stub in case I can't remember...
+        self.openDB()
+
+    def write(self, vals, debug=False):
+        # Just a stub in case I can't remember...
+        if self.buffer is not None:
+            self.buffer.add(vals)
+        else:
+            self.writeToDB(vals, debug=debug)
+
+    def disconnect(self):
+        # Just a stub in case I can't remember...
+        self.closeDB()
+
+    def close(self):
+        # Just a stub in case I can't remember...
+        self.closeDB()
+
+    def singleCommit(self, packet, table=None, timeprec='s',
+                     debug=False, close=True):
+        """
+        Write (or buffer) the packet.  close is ignored since the session
+        is kept alive; use shutdown() when done for good.
+
+        Returns what writeToDB did, or None if it was only buffered.
+        """
+        if self.buffer is not None:
+            self.buffer.add(packet, table=table, timeprec=timeprec)
+            return None
+
+        return self.writeToDB(packet, table=table, timeprec=timeprec,
+                              debug=debug)
+
+    def _flushBatch(self, points, table, timeprec):
+        """
+        Called from the pointBuffer flusher thread with a batch of points
+        that all share the same bucket and time precision
+        """
+        self.writeToDB(points, table=table, timeprec=timeprec)
+
+    def flush(self):
+        """
+        Send anything still sitting in the write buffer right now
+        """
+        if self.buffer is not None:
+            self.buffer.flush()
+
+    def shutdown(self):
+        """
+        Stop the write buffer (sending whatever is left) and close up shop
+        """
+        if self.buffer is not None:
+            self.buffer.stop()
+        self.closeDB()
+
 
 class influxobj():
     """
     Creates an InfluxDB database access object, specific to a database name.
 
+    If keepalive is True, the underlying InfluxDBClient (and its HTTP
+    session/connection pool) is kept open across writes instead of being
+    torn down and recreated in singleCommit.  It's only reopened if a write
+    fails in a way that killed the client.  All access to the client is
+    serialized through self.lock so one instance can be shared between
+    the STOMP listener thread and anything else that wants to write.
+
+    If batchsize is given, write() and singleCommit() just drop points
+    into a batching.pointBuffer and a background thread sends them along
+    in bigger write_points calls, once batchsize points are waiting or
+    flushms milliseconds have passed.  That implies keepalive.  Call
+    flush() to push out anything pending, and shutdown() when done.
+    With coalesce ('last' or 'first'), buffered points with the same
+    measurement, tags, and timestamp are merged into one while they wait;
+    see batching.pointBuffer for the rules.
+
+    If spooldir is given, writes that fail because the server is down,
+    timing out, or erroring on its end are appended to a spool.diskSpool
+    there instead of being dropped, and replayed in the background once
+    the server is back.  While anything is still spooled, new writes go
+    straight to the end of the spool so the listener thread doesn't wait
+    on a dead server and the original ordering is kept.  This also
+    implies keepalive.
+
+    If usegzip is True, write bodies of at least gzipminbytes are gzip
+    compressed (at gziplevel) and sent with Content-Encoding: gzip.  Small
+    ones aren't worth the CPU, so they go as-is.
+
+    If typeregistry (a fieldtypes.fieldTypeRegistry) is given, outgoing
+    packets are coerced to the field types already established on the
+    server, new fields are learned from successful writes, and a write
+    rejected with a "field type conflict" is learned from and retried once.
+
+    If retries is more than 0, writes that fail because of the server
+    (connection error, timeout, 5xx) are retried up to that many more
+    times with jittered exponential backoff starting at retrydelay
+    seconds.  If breakerfails is given, that many failed writes in a row
+    trips a backoff.circuitBreaker and writes fail fast (or go to the
+    spool, if there is one) until a trial write gets through again,
+    at most every breakerreset seconds.
+
+    If deadband (a deadband.deadbandFilter) is given, packets handed to
+    write() or singleCommit() have fields that haven't changed since they
+    were last written taken out before going any further.
+
+    Request latency, points per request, bytes, retries, and errors are
+    counted in metricsregistry (metrics.defaultRegistry unless another
+    metrics.metricsRegistry is given), labeled by database and, where
+    it makes sense, measurement.  If metricsmeas is given, everything in
+    that registry is written back into this database as points in that
+    measurement every metricsinterval seconds.
+
+    If udpport is given, points go to InfluxDB's UDP listener on host
+    instead of over HTTP, packed into datagrams of at most udpmtu bytes
+    and sent without waiting on anything (see udp.udpSender).  Lost
+    datagrams are just lost, so it's only for streams that can live with
+    that.  The listener decides which database they land in and expects
+    timestamps in udpprecision.  Spooling, retries, and the circuit
+    breaker don't apply to UDP writes.
+
+    If shards is more than 1 (along with batchsize), each batch is split
+    by measurement (shardby='measurement') or by series ('hash') across
+    that many lanes, each its own keepalive influxobj with its own HTTP
+    connection and thread, so several requests can be in flight at once
+    (see sharding.shardPool).  Order is kept within a lane.  The lanes
+    share this one's field types, breaker, spool, and metrics.  If
+    maxinflightbytes is given, the request bodies in flight at any one
+    time (across all lanes) are kept under that many bytes.
     """
     def __init__(self, tablename=None, connect=True,
                  host='localhost', port=8086,
-                 user='marty', pw='mcfly'):
+                 user='marty', pw='mcfly',
+                 keepalive=False, poolsize=10, timeout=5.,
+                 batchsize=None, flushms=1000., coalesce=None,
+                 spooldir=None, spoolmaxbytes=512*1024*1024,
+                 usegzip=False, gziplevel=5, gzipminbytes=1024,
+                 typeregistry=None,
+                 retries=0, retrydelay=0.1, retrymaxdelay=5.,
+                 breakerfails=None, breakerreset=30.,
+                 deadband=None, metricsregistry=None,
+                 metricsmeas=None, metricsinterval=60.,
+                 udpport=None, udpmtu=1400, udpprecision='n',
+                 shards=None, shardby='measurement', maxinflightbytes=None):
         self.host = host
         self.port = port
         self.username = user
         self.password = pw
         self.tablename = tablename
 
+        self.keepalive = keepalive
+        self.poolsize = poolsize
+        self.timeout = timeout
+
+        self.usegzip = usegzip
+        self.gziplevel = gziplevel
+        self.gzipminbytes = gzipminbytes
+
+        self.types = typeregistry
+        self.deadband = deadband
+
+        if metricsregistry is None:
+            metricsregistry = metrics.defaultRegistry
+        self.metrics = metricsregistry
+
+        if udpport is not None:
+            self.udp = udp.udpSender(host=host, port=udpport, mtu=udpmtu,
+                                     timeprec=udpprecision)
+        else:
+            self.udp = None
+
+        if retries is not None and int(retries) > 0:
+            self.retry = backoff.retryPolicy(maxattempts=int(retries)+1,
+                                             basedelay=retrydelay,
+                                             maxdelay=retrymaxdelay)
+        else:
+            self.retry = None
+
+        if breakerfails is not None and int(breakerfails) > 0:
+            self.breaker = backoff.circuitBreaker(failthreshold=breakerfails,
+                                                  resetsec=breakerreset,
+                                                  name=str(tablename),
+                                                  registry=self.metrics)
+        else:
+            self.breaker = None
+
+        # Reentrant since singleCommit holds it while calling openDB/writeToDB
+        self.lock = threading.RLock()
+
+        if batchsize is not None and int(batchsize) > 0:
+            # No sense in batching if we then reconnect for every batch
+            self.keepalive = True
+            self.buffer = batching.pointBuffer(self._flushBatch,
+                                               batchsize=batchsize,
+                                               flushms=flushms,
+                                               coalesce=coalesce,
+                                               registry=self.metrics,
+                                               name=tablename)
+        else:
+            self.buffer = None
+
+        if spooldir is not None:
+            self.keepalive = True
+            self.spool = spool.diskSpool(spooldir, self._replayLines,
+                                         maxbytes=spoolmaxbytes,
+                                         registry=self.metrics,
+                                         name=tablename)
+        else:
+            self.spool = None
+
+        if maxinflightbytes is not None and int(maxinflightbytes) > 0:
+            self.inflight = sharding.byteBudget(maxinflightbytes)
+        else:
+            self.inflight = None
+
+        if shards is not None and int(shards) > 1 and \
+           self.buffer is not None and self.udp is None:
+            lanes = []
+            for _ in range(int(shards)):
+                lane = influxobj(tablename=tablename, connect=False,
+                                 host=host, port=port, user=user, pw=pw,
+                                 keepalive=True, poolsize=1, timeout=timeout,
+                                 usegzip=usegzip, gziplevel=gziplevel,
+                                 gzipminbytes=gzipminbytes,
+                                 typeregistry=typeregistry,
+                                 retries=retries, retrydelay=retrydelay,
+                                 retrymaxdelay=retrymaxdelay,
+                                 metricsregistry=self.metrics)
+                # Everyone has to agree on whether the server is up, and
+                #   on where to put things if it isn't
+                lane.breaker = self.breaker
+                lane.spool = self.spool
+                lane.inflight = self.inflight
+                lanes.append(lane)
+            self.shardpool = sharding.shardPool(lanes, shardby=shardby,
+                                                maxbatch=10*int(batchsize))
+        else:
+            self.shardpool = None
+
+        # Set by _writePoints; True if the last failure was the server's
+        #   fault (down/timeout/5xx) rather than something wrong in the data.
+        #   lastError is the content of the last 400 response, if any.
+        self.retryable = False
+        self.lastError = None
+
         # Reminder; influxdb is the actual import, this makes sure it worked
         if connect is True and influxdb is not None:
             self.openDB()
         else:
             self.client = None
 
+        if metricsmeas is not None:
+            self.reporter = metrics.metricsReporter(self,
+                                                    registry=self.metrics,
+                                                    measurement=metricsmeas,
+                                                    interval=metricsinterval)
+        else:
+            self.reporter = None
+
     def openDB(self):
         """
         """
+        # influxdb-python quietly retries connection errors/timeouts 3 times
+        #   by itself; if we've got our own policy, let that do it instead
+        if self.retry is not None:
+            clientretries = 1
+        else:
+            clientretries = 3
+
         if influxdb is not None:
-            try:
-                self.client = InfluxDBClient(self.host, self.port,
-                                             username=self.username,
-                                             password=self.password,
-                                             database=self.tablename,
-                                             timeout=5.)
-            except Exception as err:
-                # TODO: Catch the right exceptions here.  Probably timeout
-                #   and one other (OSError?)
-                self.client = None
-                print("Could not open database %s:\n%s" % (self.tablename,
-                                                           str(err)))
+            with self.lock:
+                try:
+                    self.client = InfluxDBClient(self.host, self.port,
+                                                 username=self.username,
+                                                 password=self.password,
+                                                 database=self.tablename,
+                                                 timeout=self.timeout,
+                                                 pool_size=self.poolsize,
+                                                 retries=clientretries)
+                except Exception as err:
+                    # TODO: Catch the right exceptions here.  Probably timeout
+                    #   and one other (OSError?)
+                    self.client = None
+                    print("Could not open database %s:\n%s" %
+                          (self.tablename, str(err)))
         else:
             print("InfluxDB-python not found or server not running!")
 
@@ -87,15 +513,195 @@ class influxobj():
         """
         Given an opened InfluxDBClient, write stuff to the given dbname.
 
+        vals is either a list of packets from packetizer.makeInfluxPacket,
+        or line protocol from packetizer.makeLine/makeLines (bytes, or a
+        list of bytes) which is posted as-is without any reformatting.
+
+        Returns True if the points were accepted, False otherwise
+        (including when they were spooled for later).
+
         BUG: InfluxDB errors are getting returned, not caught. Don't know why.
         e.g.
         400: {"error":"field type conflict: input field \"ping\" on
               measurement \"PingResults\" is type integer, already exists as
               type float"}
         """
+        vals = packetizer.asPoints(vals)
+        packets = isinstance(vals, list)
+        if self.types is not None and packets is True:
+            vals = self.types.coerce(vals)
+
+        if self.udp is not None:
+            return self._writeUDP(vals, table=table, timeprec=timeprec)
+
+        with self.lock:
+            if self.spool is not None and self.spool.pending() is True:
+                # Get in line behind what's already waiting
+                self.spool.append(vals, table=table, timeprec=timeprec)
+                self._countPoints('write_spooled_points', vals, table)
+                return False
+
+            if self.breaker is not None and self.breaker.allow() is False:
+                # Known to be down, so don't even try
+                if self.spool is not None:
+                    self.spool.append(vals, table=table, timeprec=timeprec)
+                    self._countPoints('write_spooled_points', vals, table)
+                else:
+                    print("Circuit open! Dropping %d points" %
+                          (self._pointCount(vals)))
+                    self._countPoints('write_dropped_points', vals, table)
+                return False
+
+            res = self._attemptWrite(vals, table=table, timeprec=timeprec,
+                                     debug=debug)
+
+            if self.types is not None and packets is True:
+                if res is False and \
+                   self.types.learnFromError(self.lastError) is True:
+                    # Now we know better, so have one more go at it
+                    print("Retrying with corrected field types")
+                    vals = self.types.coerce(vals)
+                    res = self._attemptWrite(vals, table=table,
+                                             timeprec=timeprec, debug=debug)
+                if res is True:
+                    self.types.learn(vals)
+
+            if res is False and self.spool is not None:
+                if self.retryable is True:
+                    print("Spooling %d points for later" %
+                          (self._pointCount(vals)))
+                    self.spool.append(vals, table=table, timeprec=timeprec)
+                    self._countPoints('write_spooled_points', vals, table)
+
+        return res
+
+    def _attemptWrite(self, vals, table=None, timeprec='s', debug=False,
+                      protocol='json'):
+        """
+        _writePoints, plus the retry policy and circuit breaker bookkeeping.
+        Expects that the caller is holding self.lock.
+
+        Anything unexpected that's raised counts as a breaker failure on
+        its way out, so a trial write can't leave the breaker stuck
+        half open.
+        """
+        attempt = 0
+        try:
+            while True:
+                # A previous failure (including a 400 that writeToDB is now
+                #   retrying with corrected types) will have cleared the
+                #   client, so this is the one spot where we reconnect
+                if self.client is None:
+                    self.openDB()
+
+                res = self._writePoints(vals, table=table, timeprec=timeprec,
+                                        debug=debug, protocol=protocol)
+
+                if res is True or self.retryable is False:
+                    break
+                if self.retry is None or self.retry.again(attempt) is False:
+                    break
+                if self.breaker is not None and \
+                   self.breaker.state == 'halfopen':
+                    # Just the one trial while we see if it's back
+                    break
+
+                self.retry.wait(attempt)
+                attempt += 1
+                self.metrics.counter('write_retries',
+                                     database=self._dbLabel(table)).inc()
+                print("Retrying write (attempt %d)" % (attempt+1))
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.failure()
+            raise
+
+        if self.breaker is not None:
+            # A rejection of the data itself still means the server is up
+            if res is True or self.retryable is False:
+                self.breaker.success()
+            else:
+                self.breaker.failure()
+
+        return res
+
+    def _writeUDP(self, vals, table=None, timeprec='s'):
+        """
+        Hand the points to the UDP sender; True if none were dropped
+        """
+        nsent, ndropped = self.udp.send(vals, timeprec=timeprec)
+
+        dbname = self._dbLabel(table)
+        self.metrics.counter('udp_sent_points', database=dbname).inc(nsent)
+        if ndropped > 0:
+            self.metrics.counter('udp_dropped_points',
+                                 database=dbname).inc(ndropped)
+
+        return ndropped == 0
+
+    def _replayLines(self, lines, table, timeprec):
+        """
+        Called from the spool drainer thread with a chunk of already
+        formatted line protocol.  It goes out the same way as any other
+        write, so gzip and the in-flight byte budget apply.
+        """
+        if self.breaker is not None and self.breaker.allow() is False:
+            return False
+
+        body = packetizer.makeLines(lines, timeprec=timeprec)
+        with self.lock:
+            res = self._attemptWrite(body, table=table, timeprec=timeprec)
+
+        if res is False and self.retryable is False:
+            # Something in the data itself was rejected, so it'll never go.
+            #   Don't let it wedge the whole spool.
+            print("Dropping %d unwritable spooled points!" % (len(lines)))
+            res = True
+
+        return res
+
+    def _writePoints(self, vals, table=None, timeprec='s', debug=False,
+                     protocol='json'):
+        """
+        The actual write_points call and error handling for writeToDB;
+        expects that the caller is holding self.lock.
+
+        protocol is handed to write_points; 'json' for a list of dicts
+        and 'line' for a list of line protocol strings.  Packets are
+        turned into line protocol bytes with packetizer.makeLines, which
+        skip write_points entirely and go straight to _postBody.  If
+        makeLines can't handle something (like an unparseable timestamp),
+        write_points gets the original packets instead.
+        """
+        res = False
+        self.retryable = False
+        self.lastError = None
+        errkind = None
+
+        # Count by measurement now, while they're still dicts
+        meascounts = self._measurementCounts(vals)
+
+        if isinstance(vals, list) and vals != [] and protocol == 'json':
+            try:
+                vals = packetizer.makeLines(vals, timeprec=timeprec)
+            except ValueError as err:
+                # Not worth shouting about; write_points can cope
+                if debug is True:
+                    print(str(err))
+
+            if vals == b'':
+                # Every field was None/NaN or otherwise unstorable
+                print("Nothing to write!")
+                return True
+
+        # parserFlatPacket hands us 'ns' for influx_ts_ns stamped packets,
+        #   but influxdb-python only accepts 'n' for nanoseconds
+        if timeprec == 'ns':
+            timeprec = 'n'
+
         # Make sure we're actually connected first
         if self.client is not None:
-            res = False
+            t0 = time.monotonic()
             try:
                 # influxPostTimeout = alarms.alarming()
                 # influxPostTimeout.setAlarm(timeout=10)
@@ -103,18 +709,25 @@ class influxobj():
                     print("Trying to write_points...")
 
                 try:
-                    if table is None:
+                    if isinstance(vals, bytes):
+                        res = self._postBody(vals, table=table,
+                                             timeprec=timeprec)
+                    elif table is None:
                         res = self.client.write_points(vals,
-                                                       time_precision=timeprec)
+                                                       time_precision=timeprec,
+                                                       protocol=protocol)
                     else:
                         res = self.client.write_points(vals, database=table,
-                                                       time_precision=timeprec)
+                                                       time_precision=timeprec,
+                                                       protocol=protocol)
 
                     # Clear the alarm if we made it through this far
                     # print("Success!")
                     # influxPostTimeout.clearAlarm()
                 except InfluxDBClientError as err:
+                    errkind = 'client'
                     if err.code == 403:
+                        errkind = 'auth'
                         print("Authentication error! %s" % (err.content))
                         # Clear the client to make other stuff break
                         self.client = None
@@ -123,15 +736,30 @@ class influxobj():
                         # This usually means a database table wasn't specified
                         #   or there was a type mismatch. Either way,
                         #   NO BUENO
+                        errkind = 'rejected'
                         print(err.content)
+                        self.lastError = err.content
                         self.client = None
                         res = False
             except RCE as err:
                 print("Fatal Connection Error!")
                 print("Is InfluxDB running?")
                 # sys.exit(-1)
+                errkind = 'connection'
+                self.retryable = True
+                self._dropStaleClient()
+            except RTO as err:
+                print("InfluxDB post timed out!")
+                errkind = 'timeout'
+                self.retryable = True
+                self._dropStaleClient()
+            except InfluxDBServerError as err:
+                print("InfluxDB server error! %s" % (str(err)))
+                errkind = 'server'
+                self.retryable = True
             except InfluxDBClientError as err:
                 print("ERROR: write_points to InfluxDB Failed!")
+                errkind = 'client'
                 # If we're here, bad things happened with the database.
                 try:
                     econd = json.loads(err.content)
@@ -148,20 +776,138 @@ class influxobj():
             except TimeoutError as err:
                 print("InfluxDB post timed out!")
                 # influxPostTimeout.clearAlarm()
+                errkind = 'timeout'
+                self.retryable = True
+                self._dropStaleClient()
+
+            self._recordWrite(vals, meascounts, table, res,
+                              time.monotonic() - t0, errkind)
 
             if res is False:
                 print("INFLUXDB ERROR. Check above for more details :(")
         else:
             print("Error: InfluxDBClient not connected!")
+            self.retryable = True
+            self._recordWrite(vals, meascounts, table, False, None,
+                              'notconnected')
+
+        return res
+
+    def _dbLabel(self, table):
+        if table is None:
+            table = self.tablename
+        return str(table)
+
+    def _measurementCounts(self, vals):
+        """
+        {measurement: number of points} for a list of packets; line
+        protocol ones are lumped together under None
+        """
+        counts = {}
+        if isinstance(vals, list):
+            for pt in vals:
+                if isinstance(pt, dict):
+                    meas, npts = pt.get('measurement', None), 1
+                elif isinstance(pt, (bytes, str)):
+                    meas, npts = None, len(pt.splitlines())
+                else:
+                    meas, npts = None, 1
+                counts[meas] = counts.get(meas, 0) + npts
+        elif isinstance(vals, (bytes, str)):
+            counts[None] = len(vals.splitlines())
+
+        return counts
+
+    def _pointCount(self, vals):
+        """
+        Number of points (or lines of line protocol) in vals
+        """
+        return sum(self._measurementCounts(vals).values())
+
+    def _countPoints(self, name, vals, table):
+        """
+        Add the points in vals to the given per-measurement counter
+        """
+        dbname = self._dbLabel(table)
+        for meas, npts in self._measurementCounts(vals).items():
+            self.metrics.counter(name, database=dbname,
+                                 measurement=str(meas)).inc(npts)
+
+    def _recordWrite(self, vals, meascounts, table, res, latency, errkind):
+        """
+        Metrics bookkeeping after one request in _writePoints
+        """
+        dbname = self._dbLabel(table)
+        npoints = sum(meascounts.values())
+
+        if latency is not None:
+            self.metrics.histogram('write_latency',
+                                   database=dbname).observe(latency)
+        self.metrics.histogram('write_batch_points',
+                               buckets=metrics.sizeBuckets,
+                               database=dbname).observe(npoints)
+
+        if res is True:
+            self.metrics.counter('write_requests', database=dbname).inc()
+            name = 'write_points'
+        else:
+            self.metrics.counter('write_errors', database=dbname,
+                                 kind=str(errkind)).inc()
+            name = 'write_failed_points'
+        for meas, npts in meascounts.items():
+            self.metrics.counter(name, database=dbname,
+                                 measurement=str(meas)).inc(npts)
+
+    def _postBody(self, body, table=None, timeprec='s'):
+        """
+        POST an already formatted line protocol body to /write,
+        compressing it first if that's turned on and it's big enough.
+        Expects that the caller is holding self.lock.
+        """
+        if table is None:
+            table = self.tablename
+        params = {'db': table}
+        if timeprec is not None:
+            params.update({'precision': timeprec})
+
+        headers = {'Content-Type': 'application/octet-stream'}
+        nbytes = len(body)
+        body = compressBody(body, headers, usegzip=self.usegzip,
+                            level=self.gziplevel, minbytes=self.gzipminbytes)
+        self.metrics.counter('write_bytes', database=str(table)).inc(nbytes)
+        self.metrics.counter('write_wire_bytes',
+                             database=str(table)).inc(len(body))
+
+        if self.inflight is not None:
+            self.inflight.acquire(len(body))
+        try:
+            self.client.request(url='write', method='POST', params=params,
+                                data=body, expected_response_code=204,
+                                headers=headers)
+        finally:
+            if self.inflight is not None:
+                self.inflight.release(len(body))
+
+        return True
+
+    def _dropStaleClient(self):
+        """
+        In keepalive mode, throw away a client whose pooled connections
+        are suspect so the next write starts from a fresh session.
+        """
+        if self.keepalive is True:
+            self.closeDB()
+            self.client = None
 
     def closeDB(self):
         """
         """
-        if self.client is not None:
-            try:
-                self.client.close()
-            except Exception as err:
-                print(str(err))
+        with self.lock:
+            if self.client is not None:
+                try:
+                    self.client.close()
+                except Exception as err:
+                    print(str(err))
 
     def connect(self):
         # Just a stub in case I can't remember...
@@ -169,7 +915,15 @@ class influxobj():
 
     def write(self, vals, debug=False):
         # Just a stub in case I can't remember...
-        self.writeToDB(vals, debug=debug)
+        vals = packetizer.asPoints(vals)
+        if self.deadband is not None:
+            vals = self.deadband.filter(vals)
+            if vals == []:
+                return
+        if self.buffer is not None:
+            self.buffer.add(vals)
+        else:
+            self.writeToDB(vals, debug=debug)
 
     def disconnect(self):
         # Just a stub in case I can't remember...
@@ -181,107 +935,391 @@ class influxobj():
 
     def singleCommit(self, packet, table=None, timeprec='s',
                      debug=False, close=True):
-        if self.client is not None:
-            self.closeDB()
-        self.openDB()
-        self.writeToDB(packet, table=table, timeprec=timeprec, debug=debug)
-        if close is True:
-            self.closeDB()
+        """
+        Open, write, and (optionally) close in one go.  In keepalive mode
+        the existing client is reused and close is ignored; the connection
+        is only recycled by writeToDB if something went wrong.
+
+        In buffered mode the packet is just queued up for the next batch.
+
+        Returns what writeToDB did, or None if nothing was written right
+        now (buffered, or filtered out entirely by the deadband).
+        """
+        packet = packetizer.asPoints(packet)
+        if self.deadband is not None:
+            packet = self.deadband.filter(packet)
+            if packet == []:
+                # Nothing changed, so nothing to do
+                return None
+        if self.buffer is not None:
+            self.buffer.add(packet, table=table, timeprec=timeprec)
+            res = None
+        elif self.keepalive is True or self.udp is not None:
+            res = self.writeToDB(packet, table=table, timeprec=timeprec,
+                                 debug=debug)
+        else:
+            with self.lock:
+                if self.client is not None:
+                    self.closeDB()
+                self.openDB()
+                res = self.writeToDB(packet, table=table, timeprec=timeprec,
+                                     debug=debug)
+                if close is True:
+                    self.closeDB()
+
+        return res
+
+    def writeDataFrame(self, df, measurement, tagcols=None, fieldcols=None,
+                       table=None, timeprec='n', chunksize=50000):
+        """
+        Bulk write a DataFrame (with a DatetimeIndex) in chunks; see
+        bulkwrite.writeDataFrame.  Much faster than DataFrameClient for
+        big backfills.
+        """
+        return bulkwrite.writeDataFrame(self, df, measurement,
+                                        tagcols=tagcols, fieldcols=fieldcols,
+                                        table=table, timeprec=timeprec,
+                                        chunksize=chunksize)
+
+    def _flushBatch(self, points, table, timeprec):
+        """
+        Called from the pointBuffer flusher thread with a batch of points
+        that all share the same table and time precision
+        """
+        if self.shardpool is not None:
+            self.shardpool.dispatch(points, table, timeprec)
+        else:
+            self.writeToDB(points, table=table, timeprec=timeprec)
+
+    def flush(self):
+        """
+        Send anything still sitting in the write buffer right now
+        """
+        if self.buffer is not None:
+            self.buffer.flush()
+        if self.shardpool is not None:
+            self.shardpool.join()
+
+    def shutdown(self):
+        """
+        Stop the write buffer (sending whatever is left) and the spool
+        drainer, and close up shop.  Anything still spooled stays on disk.
+        """
+        if self.reporter is not None:
+            self.reporter.stop()
+        if self.buffer is not None:
+            self.buffer.stop()
+        if self.shardpool is not None:
+            self.shardpool.stop()
+            for lane in self.shardpool.writers:
+                lane.closeDB()
+        if self.spool is not None:
+            self.spool.stop()
+        if self.udp is not None:
+            self.udp.close()
+        self.closeDB()
 
 
-def queryConstructor(dbq, debug=False):
+def _dataFrameClient(query):
     """
-    dbq is type databaseQuery, which includes databaseConfig as
-    dbq.db.  More info in 'confHerder'.
+    DataFrameClient for the database described by a databaseQuery
+    """
+    # Line length/clarity control
+    db = query.database
+    idfc = DataFrameClient(host=db.host, port=db.port,
+                           username=db.user,
+                           password=db.password,
+                           database=query.tablename)
+
+    return idfc
+
 
-    dtime is time from present (in hours) to query back
+# DataFrameClients shared between threads by getResultsDataFrames, one per
+#   server and user, so their connection pools actually get reused
+_sharedClients = {}
+_sharedClientsLock = threading.Lock()
 
-    Allows grouping of the results by a SINGLE tag with multiple values.
-    No checking if you want all values for a given tag, so be explicit for now.
+
+def _sharedDataFrameClient(query, poolsize=10):
+    """
+    Shared DataFrameClient (with no default database) for the server
+    described by a databaseQuery; pass the database to each query() call.
     """
-    if isinstance(dbq.rangehours, str):
+    db = query.database
+    key = (db.host, db.port, db.user, db.password)
+    with _sharedClientsLock:
+        idfc = _sharedClients.get(key, None)
+        if idfc is None:
+            idfc = DataFrameClient(host=db.host, port=db.port,
+                                   username=db.user,
+                                   password=db.password,
+                                   pool_size=poolsize)
+            _sharedClients[key] = idfc
+
+    return idfc
+
+
+def closeSharedClients():
+    """
+    Close (and forget) the DataFrameClients shared by getResultsDataFrames
+    and getResultsDataFrameSplit.  Done at exit anyways, but long running
+    things that are finished with a server can call it sooner.
+    """
+    with _sharedClientsLock:
+        clients = list(_sharedClients.values())
+        _sharedClients.clear()
+
+    for idfc in clients:
         try:
-            dtime = int(dbq.rangehours)
-        except ValueError:
-            print("Can't convert %s to int!" % (dbq.rangehours))
-            dtime = 1
-
-    if dbq.database.type.lower() == 'influxdb':
-        if debug is True:
-            print("Searching for %s in %s.%s on %s:%s" % (dbq.fields,
-                                                          dbq.tablename,
-                                                          dbq.metricname,
-                                                          dbq.database.host,
-                                                          dbq.database.port))
-
-        # Some renames since this was adapted from an earlier version
-        tagnames = dbq.tagnames
-        if tagnames is not None:
-            tagvals = dbq.tagvals
-        else:
-            tagvals = []
-
-        # TODO: Someone should write a query validator to make sure
-        #   this can't run amok.  For now, make sure the user has
-        #   only READ ONLY privileges to the database in question!!!
-        query = 'SELECT'
-        if isinstance(dbq.fields, list):
-            for i, each in enumerate(dbq.fields):
-                # Catch possible fn/dn mismatch
-                try:
-                    query += ' "%s" AS "%s"' % (each.strip(),
-                                                dbq.fieldlabels[i])
-                except IndexError:
-                    query += ' "%s"' % (each.strip())
-                if i != len(dbq.fields)-1:
-                    query += ','
-                else:
-                    query += ' '
-        else:
-            if dbq.fieldlabels is not None:
-                query += ' "%s" AS "%s" ' % (dbq.fields, dbq.fieldlabels)
-            else:
-                query += ' "%s" ' % (dbq.fields)
+            idfc.close()
+        except Exception as err:
+            print(str(err))
 
-        query += 'FROM "%s"' % (dbq.metricname)
-        query += ' WHERE time > now() - %02dh' % (dtime)
 
-        if tagvals != []:
-            query += ' AND ('
-            if isinstance(dbq.tagvals, list):
-                for i, each in enumerate(tagvals):
-                    query += '"%s"=\'%s\'' % (tagnames, each.strip())
+atexit.register(closeSharedClients)
 
-                    if i != len(tagvals)-1:
-                        query += ' OR '
-                query += ') GROUP BY "%s"' % (tagnames)
-            else:
-                # If we're here, there was only 1 tag value so we don't need
-                #   to GROUP BY anything
-                query += '"%s"=\'%s\')' % (tagnames, tagvals)
 
-        return query
+def _runQuery(query, querystr, client=None):
+    """
+    Raw DataFrameClient.query results for querystr against query's
+    database, using client if given or a fresh DataFrameClient if not
+    """
+    if client is None:
+        idfc = _dataFrameClient(query)
+        results = idfc.query(querystr)
+    else:
+        results = client.query(querystr, database=query.tablename)
+
+    return results
 
 
-def getResultsDataFrame(query, debug=False):
+def getResultsDataFrame(query, debug=False, cache=None, client=None):
     """
     Attempts to distinguish queries that have results grouped by a tag
     vs. those which are just of multiple fields. May be buggy still.
 
+    If cache (a querycache.queryCache) is given, the answer comes from
+    there, and only the newest data is actually fetched when possible.
+
+    client is an optional DataFrameClient to use instead of a new one.
+
     Handles no exceptions; take care of them yourself at call time,
     or submit pull requests to ligmos!
     """
+    if cache is not None:
+        return cache.get(query, debug=debug, client=client)
+
     querystr = queryConstructor(query, debug=debug)
+    results = _runQuery(query, querystr, client=client)
 
-    # Line length/clarity control
+    return cleanResults(results, query)
+
+
+def _batchKey(query):
+    """
+    Queries with the same key can share a multi-statement request
+    """
     db = query.database
-    idfc = DataFrameClient(host=db.host, port=db.port,
-                           username=db.user,
-                           password=db.password,
-                           database=query.tablename)
 
-    results = idfc.query(querystr)
+    return (db.host, db.port, db.user, db.password, query.tablename)
+
+
+def getBatchResultsDataFrame(queries, debug=False, client=None):
+    """
+    Like getResultsDataFrame, but for a dict of databaseQuery objects
+    that all point at the same database on the same server, which are
+    sent as one multi-statement query in a single request.
+
+    Returns (results, errors), keyed like queries; results has the tidied
+    up answer to each statement, or None if the server gave back an
+    error for that one statement, which is then in errors.  Failure of
+    the request as a whole is up to you to handle, as usual.
+    """
+    names = list(queries.keys())
+    if names == []:
+        return {}, {}
+    first = queries[names[0]]
+    for qname in names:
+        if _batchKey(queries[qname]) != _batchKey(first):
+            raise ValueError("Query %s is for a different database!" % (qname))
+
+    querystr = batchQueryConstructor([queries[n] for n in names],
+                                     debug=debug)
+
+    if client is None:
+        idfc = _dataFrameClient(first)
+    else:
+        idfc = client
+
+    # Go around DataFrameClient.query so an error in one statement can be
+    #   kept to that one statement.  POST with everything form encoded in
+    #   the body (like latest.fetchLatest), since this can get long and
+    #   would otherwise blow past URL length limits.
+    form = {'q': querystr, 'db': first.tablename, 'epoch': 'ns'}
+    headers = {'Content-Type': 'application/x-www-form-urlencoded',
+               'Accept': 'application/json'}
+    response = idfc.request(url='query', method='POST', data=urlencode(form),
+                            expected_response_code=200, headers=headers)
+    payload = response.json()
+    if 'error' in payload:
+        raise InfluxDBClientError(payload['error'])
+
+    answers = payload.get('results', [])
+    if len(answers) != len(names):
+        raise ValueError("Got %d results for %d statements!" %
+                         (len(answers), len(names)))
+
+    results = {}
+    errors = {}
+    for qname, answer in zip(names, answers):
+        if 'error' in answer:
+            print("Query %s failed! %s" % (qname, answer['error']))
+            results[qname] = None
+            errors[qname] = answer['error']
+            continue
+        results[qname] = cleanResults(_resultFrames(answer), queries[qname])
+
+    return results, errors
+
+
+def getResultsDataFrames(queries, debug=False, nthreads=8, cache=None,
+                         batch=False, maxstatements=50):
+    """
+    Run a dict of databaseQuery objects at the same time on up to
+    nthreads threads, with queries to the same server sharing one
+    client (and its connection pool).
+
+    If batch is True, queries for the same database on the same server
+    are instead sent together (up to maxstatements at a time) as a
+    multi-statement query using getBatchResultsDataFrame; each of those
+    requests then gets its own thread.  cache isn't used when batching.
+
+    Returns (results, report), both keyed like queries.  results has
+    what getResultsDataFrame gave back for each one, or None if it
+    failed; report has {'seconds': time taken, 'error': None or the
+    exception's text} for each one.  One slow or broken query doesn't
+    hold up or break the rest.  When batching, the time is that of the
+    whole request the query went out in.
+    """
+    results = {}
+    report = {}
+    if queries == {}:
+        return results, report
+
+    # Each job is a dict of queries to be sent together
+    if batch is True:
+        groups = {}
+        for qname, query in queries.items():
+            groups.setdefault(_batchKey(query), {}).update({qname: query})
+        jobs = []
+        maxstatements = max(1, int(maxstatements))
+        for group in groups.values():
+            gnames = list(group.keys())
+            for i in range(0, len(gnames), maxstatements):
+                jobs.append({n: group[n] for n in gnames[i:i+maxstatements]})
+    else:
+        jobs = [{qname: query} for qname, query in queries.items()]
+
+    nthreads = max(1, min(int(nthreads), len(jobs)))
+
+    def _timed(job):
+        t0 = time.perf_counter()
+        first = list(job.values())[0]
+        try:
+            client = _sharedDataFrameClient(first, poolsize=nthreads)
+            if batch is True:
+                res, errs = getBatchResultsDataFrame(job, debug=debug,
+                                                     client=client)
+            else:
+                res = {qname: getResultsDataFrame(query, debug=debug,
+                                                  cache=cache, client=client)
+                       for qname, query in job.items()}
+                errs = {}
+        except Exception as exc:
+            err = "%s: %s" % (type(exc).__name__, str(exc))
+            print("Query %s failed!" % (', '.join(job.keys())))
+            print(err)
+            res = {qname: None for qname in job}
+            errs = {qname: err for qname in job}
+
+        elapsed = time.perf_counter() - t0
+        rep = {qname: {'seconds': elapsed, 'error': errs.get(qname, None)}
+               for qname in job}
+
+        return res, rep
+
+    with ThreadPoolExecutor(max_workers=nthreads,
+                            thread_name_prefix='ligmos-query') as pool:
+        futures = [pool.submit(_timed, job) for job in jobs]
+        for fut in futures:
+            res, rep = fut.result()
+            results.update(res)
+            report.update(rep)
+
+    # Hand them back in the order they were given
+    results = {qname: results[qname] for qname in queries}
+    report = {qname: report[qname] for qname in queries}
+
+    return results, report
+
+
+def getResultsDataFrameSplit(query, tagsperquery=1, nthreads=8,
+                             debug=False, cache=None):
+    """
+    Same answer as getResultsDataFrame for a query grouped by a tag, but
+    the tagvals are split up into separate queries of tagsperquery values
+    each, run at the same time on up to nthreads threads (sharing one
+    client), and put back together into the usual {tagvalue: DataFrame}.
+    Big tag sets over long ranges are a lot easier on the server this way.
+
+    Queries that aren't grouped just go to getResultsDataFrame.  Like it,
+    this handles no exceptions; the first failure is raised once all of
+    the pieces are done.
+    """
+    if not isinstance(query.tagvals, list) or query.tagnames is None:
+        return getResultsDataFrame(query, debug=debug, cache=cache)
+
+    tagsperquery = max(1, int(tagsperquery))
+    pieces = []
+    for i in range(0, len(query.tagvals), tagsperquery):
+        piece = copy.copy(query)
+        piece.tagvals = query.tagvals[i:i+tagsperquery]
+        pieces.append(piece)
 
+    nthreads = max(1, min(int(nthreads), len(pieces)))
+    client = _sharedDataFrameClient(query, poolsize=nthreads)
+
+    with ThreadPoolExecutor(max_workers=nthreads,
+                            thread_name_prefix='ligmos-query') as pool:
+        futures = [pool.submit(getResultsDataFrame, piece, debug=debug,
+                               cache=cache, client=client)
+                   for piece in pieces]
+        # Wait for all of them before anything gets raised
+        for fut in futures:
+            fut.exception()
+
+    results = {}
+    for fut in futures:
+        res = fut.result()
+        # A piece that found nothing at all gets the placeholder frame
+        #   instead of a dict; the whole query would've just left
+        #   those tag values out, so do the same here
+        if isinstance(res, dict):
+            results.update(res)
+
+    if results == {}:
+        results = cleanResults({}, query)
+
+    return results
+
+
+def cleanResults(results, query):
+    """
+    Tidy up the dict of DataFrames that DataFrameClient.query gives back
+    for the given databaseQuery.  Results grouped by a tag come back as
+    a dict of {tagvalue: DataFrame}, otherwise it's just the DataFrame.
+    Either way, every expected column is there, even if it's empty.
+    """
     # results is a dict of dataframes, but it's a goddamn mess. Clean it up.
     betterResults = {}
 
@@ -315,13 +1353,19 @@ def getResultsDataFrame(query, debug=False):
                 betterResults = results[rkey]
 
         # Check to make sure all of the expected columns are in our frame
-        cols = betterResults.columns.to_list()
-        for ecol in expectedCols:
-            if ecol not in cols:
-                print("Missing column %s in result set!" % (ecol))
-                betterResults[ecol] = None
-            else:
-                print("Found column %s in result set." % (ecol))
+        #   (or in each of our frames, if they were grouped by a tag)
+        if isinstance(betterResults, dict):
+            frames = betterResults.values()
+        else:
+            frames = [betterResults]
+        for frame in frames:
+            cols = frame.columns.to_list()
+            for ecol in expectedCols:
+                if ecol not in cols:
+                    print("Missing column %s in result set!" % (ecol))
+                    frame[ecol] = None
+                else:
+                    print("Found column %s in result set." % (ecol))
     else:
         # This means that the query literally returned nothing at all, so
         #   we have to make the expected DataFrame ourselves so others
@@ -344,3 +1388,112 @@ def getResultsDataFrame(query, debug=False):
 
     # This is at least a little better
     return betterResults
+
+
+def _seriesRecords(series):
+    """
+    One series out of an epoch=ns query response as a NumPy record array,
+    with int64 ns 'time' and then a column for each field label
+    """
+    columns = series['columns']
+    rows = series.get('values', [])
+    if rows == []:
+        cols = [[] for _ in columns]
+    else:
+        cols = [list(c) for c in zip(*rows)]
+    arrays = [np.array(cols[0], dtype=np.int64)]
+    arrays.extend([numpyquery.columnArray(c) for c in cols[1:]])
+
+    return np.rec.fromarrays(arrays, names=columns)
+
+
+def _seriesFrame(series):
+    """
+    One series out of an epoch=ns query response as a DataFrame, the
+    same way DataFrameClient.query would make it
+    """
+    frame = pd.DataFrame(series.get('values', []), columns=series['columns'])
+    frame.index = pd.to_datetime(frame.pop('time'), unit='ns', utc=True)
+    frame.index.name = None
+    frame = frame.dropna(how='all', axis=1)
+
+    return frame
+
+
+def _resultFrames(answer):
+    """
+    DataFrames for one statement's worth of an epoch=ns query response,
+    keyed the same way DataFrameClient.query does it: by measurement, or
+    (measurement, sorted tag pairs) for series grouped by tag
+    """
+    pieces = {}
+    for series in answer.get('series', []):
+        if series.get('tags', None):
+            key = (series['name'], tuple(sorted(series['tags'].items())))
+        else:
+            key = series['name']
+        pieces.setdefault(key, []).append(_seriesFrame(series))
+
+    frames = {}
+    for key, frs in pieces.items():
+        if len(frs) == 1:
+            frames[key] = frs[0]
+        else:
+            frames[key] = pd.concat(frs).sort_index()
+
+    return frames
+
+
+def iterResultsDataFrame(query, chunksize=10000, debug=False, records=False,
+                         client=None):
+    """
+    Generator version of getResultsDataFrame for pulls too big to hold in
+    memory all at once.  Uses InfluxDB's chunked responses and yields
+    one piece (at most chunksize rows of one series) as it arrives.
+
+    Each piece has the same shape getResultsDataFrame would give: a
+    DataFrame, or {tagvalue: DataFrame} if the query was grouped by a
+    tag.  With records True, NumPy record arrays (int64 ns 'time' plus a
+    column per field label) are used instead of DataFrames.
+
+    Yields nothing at all if there are no results.  client is an
+    optional DataFrameClient to use instead of a new one.
+    """
+    querystr = queryConstructor(query, debug=debug)
+
+    if client is None:
+        idfc = _dataFrameClient(query)
+    else:
+        idfc = client
+
+    params = {'q': querystr,
+              'db': query.tablename,
+              'epoch': 'ns',
+              'chunked': 'true',
+              'chunk_size': int(chunksize)}
+    response = idfc.request(url='query', method='GET', params=params,
+                            stream=True, expected_response_code=200)
+
+    try:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if 'error' in chunk:
+                raise InfluxDBClientError(chunk['error'])
+            for result in chunk.get('results', []):
+                if 'error' in result:
+                    raise InfluxDBClientError(result['error'])
+                for series in result.get('series', []):
+                    if records is True:
+                        piece = _seriesRecords(series)
+                    else:
+                        piece = _seriesFrame(series)
+                        # Fill in any missing columns as usual
+                        piece = cleanResults({series['name']: piece}, query)
+                    if series.get('tags', None):
+                        tags = sorted(series['tags'].items())
+                        piece = {tags[0][1]: piece}
+                    yield piece
+    finally:
+        response.close()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Deadband (change-only) filtering of points before they're written.
+
+Lots of topics republish the same values every second or so.  This
+keeps the last value written for every field of every series
+(measurement + tags) and drops fields that haven't changed by more than
+a deadband since then, so the database only sees actual changes.  Every
+field is still written at least every forcesec seconds regardless, so
+there's always something recent to query and to tell a quiet value from
+a dead one.
+
+Rules can be given per measurement (fnmatch patterns are fine) and per
+field, either directly or from a JSON file like:
+
+    {"WeatherStation*": {"abs": 0.05, "forcesec": 300,
+                         "fields": {"WindSpeed": {"rel": 0.1}}},
+     "LOUI.nasa42.loisTelemetry*": {"abs": 0}}
+
+Numeric values are dropped if they're within either the absolute (abs)
+or relative (rel, as a fraction of the last written value) deadband;
+with neither given, only exact repeats are dropped.  Anything else
+(strings, booleans) is dropped only if it's identical.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import json
+import time
+import fnmatch
+import threading
+from collections import OrderedDict
+
+
+class deadbandFilter():
+    """
+    absband, relband, forcesec: defaults for anything not covered by a
+                                more specific rule
+    rules: dict of per-measurement rules (see above), merged over the
+           contents of rulefile if both are given
+    measurements: if True, only measurements matching a rule are filtered
+                  and everything else is passed straight through
+    maxseries: most series to remember; the least recently seen are
+               forgotten past that (so their next value is always written)
+
+    The cache is updated as soon as a point passes the filter, not after
+    it's written; if the write then fails, that field won't go out again
+    until it changes or forcesec passes.
+    """
+    def __init__(self, absband=None, relband=None, forcesec=300.,
+                 rules=None, rulefile=None, measurements=False,
+                 maxseries=100000):
+        self.default = {'abs': absband, 'rel': relband,
+                        'forcesec': forcesec}
+        self.measurements = measurements
+        self.maxseries = int(maxseries)
+
+        self.rules = {}
+        if rulefile is not None:
+            try:
+                with open(rulefile, 'r') as f:
+                    self.rules.update(json.load(f))
+                print("Loaded deadband rules for %d measurements from %s" %
+                      (len(self.rules), rulefile))
+            except (OSError, ValueError) as err:
+                print("Could not load deadband rules from %s!" % (rulefile))
+                print(str(err))
+        if rules is not None:
+            self.rules.update(rules)
+
+        # Resolved rule per measurement, so the patterns only get matched
+        #   once for each new measurement name
+        self.ruleCache = {}
+
+        # {(measurement, tags): {field: (value, time written)}}
+        self.last = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.hits = 0
+        self.misses = 0
+        self.kept = 0
+        self.skipped = 0
+        self.forced = 0
+        self.droppedPoints = 0
+        self.evicted = 0
+
+    def ruleFor(self, meas):
+        """
+        The measurement level rule for meas, or None if it shouldn't be
+        filtered at all.  Exact names win over patterns.
+        """
+        if meas in self.ruleCache:
+            return self.ruleCache[meas]
+
+        rule = self.rules.get(meas, None)
+        if rule is None:
+            for pattern, prule in self.rules.items():
+                if fnmatch.fnmatchcase(meas, pattern):
+                    rule = prule
+                    break
+
+        if rule is None and self.measurements is True:
+            resolved = None
+        else:
+            resolved = dict(self.default)
+            resolved.update(rule or {})
+
+        self.ruleCache.update({meas: resolved})
+
+        return resolved
+
+    def _changed(self, old, new, absband, relband):
+        """
+        True if new is different enough from old to be worth writing
+        """
+        numbers = (int, float)
+        if isinstance(old, bool) or isinstance(new, bool) or \
+           not isinstance(old, numbers) or not isinstance(new, numbers):
+            return old != new
+
+        diff = abs(new - old)
+        if absband is None and relband is None:
+            return diff != 0
+        if absband is not None and diff <= absband:
+            return False
+        if relband is not None and diff <= relband*abs(old):
+            return False
+
+        return True
+
+    def filter(self, points):
+        """
+        Returns the points with the unchanged fields taken out.  Points
+        left with no fields are dropped altogether.  Anything that isn't
+        a makeInfluxPacket style dict (line protocol) goes through as-is.
+        """
+        if not isinstance(points, list):
+            return points
+
+        now = time.monotonic()
+        newpoints = []
+        with self.lock:
+            for pt in points:
+                if not isinstance(pt, dict):
+                    newpoints.append(pt)
+                    continue
+
+                meas = pt['measurement']
+                rule = self.ruleFor(meas)
+                fields = pt.get('fields', None)
+                if rule is None or not fields:
+                    newpoints.append(pt)
+                    continue
+
+                tags = pt.get('tags', None) or {}
+                skey = (meas, tuple(sorted(tags.items())))
+                last = self.last.get(skey, None)
+                if last is None:
+                    self.misses += 1
+                    last = {}
+                    self.last[skey] = last
+                    if len(self.last) > self.maxseries:
+                        self.last.popitem(last=False)
+                        self.evicted += 1
+                else:
+                    self.hits += 1
+                    self.last.move_to_end(skey)
+
+                frules = rule.get('fields', None) or {}
+                newfields = {}
+                for field, val in fields.items():
+                    prev = last.get(field, None)
+                    if prev is not None:
+                        frule = frules.get(field, None)
+                        if frule is not None:
+                            frule = dict(rule, **frule)
+                        else:
+                            frule = rule
+
+                        forcesec = frule.get('forcesec', None)
+                        if forcesec is not None and \
+                           now - prev[1] >= float(forcesec):
+                            self.forced += 1
+                        elif not self._changed(prev[0], val,
+                                               frule.get('abs', None),
+                                               frule.get('rel', None)):
+                            self.skipped += 1
+                            continue
+
+                    newfields.update({field: val})
+                    last[field] = (val, now)
+                    self.kept += 1
+
+                if newfields == {}:
+                    self.droppedPoints += 1
+                elif len(newfields) == len(fields):
+                    newpoints.append(pt)
+                else:
+                    newpoints.append(dict(pt, fields=newfields))
+
+        return newpoints
+
+    def reset(self):
+        """
+        Forget all of the last values, so everything is written next time
+        """
+        with self.lock:
+            self.last = OrderedDict()
+
+    def stats(self):
+        """
+        Cache size and counters as a dict
+        """
+        with self.lock:
+            return {'series': len(self.last),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'kept': self.kept,
+                    'skipped': self.skipped,
+                    'forced': self.forced,
+                    'droppedpoints': self.droppedPoints,
+                    'evicted': self.evicted}
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""On-disk cache of query results for time ranges that are over and done.
+
+Time is cut into fixed buckets (buckethours long, lined up on the epoch).
+Once a bucket has ended (plus settle seconds, for stragglers) what's in
+it won't change, so it's fetched once and kept in cachedir as a NumPy
+.npz file; after that only the still-open "live" part at the end of the
+window ever goes to the server.  Files are keyed on the query text
+(without its time limits) plus the server and database it goes to, and
+the bucket's start, so any rangehours reuses the same buckets.
+
+    dc = diskcache.diskQueryCache('/data/ligmos-cache', buckethours=24)
+    arrs = dc.getArrays(dbq)
+    df = database.getResultsDataFrame(dbq, cache=dc)
+
+Everything is fetched with numpyquery, so getArrays doesn't need pandas;
+get() (which getResultsDataFrame uses) builds DataFrames from those.
+If dbq uses groupbytime, buckethours should be a multiple of it.  An
+aggregate without groupbytime is one answer for the whole window that
+can't be pieced together from buckets, so those skip the cache entirely.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import time
+import hashlib
+import threading
+
+import numpy as np
+
+from . import numpyquery
+from .querybuilder import queryConstructor
+
+_nsPerHour = 3600*1000000000
+
+
+def _bucketKey(query):
+    """
+    Directory name for a query; a hash of the server, database, and the
+    query text with no time limits.  Also gives back that description.
+    """
+    db = query.database
+    desc = "%s:%s/%s\n%s" % (db.host, db.port, query.tablename,
+                             queryConstructor(query, since=0))
+
+    return hashlib.sha1(desc.encode("utf-8")).hexdigest()[:20], desc
+
+
+def _saveBucket(path, results, grouped):
+    """
+    Write one bucket's results to path (.npz), without pickles.  Object
+    (string) columns are stored as text plus a mask of their nulls.
+    """
+    if grouped is True:
+        groups = list(results.keys())
+        per = results
+    else:
+        groups = ['']
+        per = {'': results}
+
+    out = {'groups': np.array(groups, dtype=str)}
+    for gi, group in enumerate(groups):
+        arrs = per[group]
+        names = list(arrs.keys())
+        out['g%d_columns' % (gi)] = np.array(names, dtype=str)
+        for ci, name in enumerate(names):
+            arr = arrs[name]
+            key = 'g%d_c%d' % (gi, ci)
+            if arr.dtype.kind == 'O':
+                nulls = np.array([v is None for v in arr], dtype=bool)
+                text = ['' if v is None else str(v) for v in arr]
+                out[key + '_text'] = np.array(text, dtype=str)
+                out[key + '_nulls'] = nulls
+            else:
+                out[key] = arr
+
+    # Write it somewhere else first, so a crash never leaves half a file
+    tmp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+    with open(tmp, 'wb') as fh:
+        np.savez_compressed(fh, **out)
+    os.replace(tmp, path)
+
+
+def _loadBucket(path, grouped):
+    with np.load(path, allow_pickle=False) as npz:
+        results = {}
+        for gi, group in enumerate(npz['groups'].tolist()):
+            arrs = {}
+            for ci, name in enumerate(npz['g%d_columns' % (gi)].tolist()):
+                key = 'g%d_c%d' % (gi, ci)
+                if key in npz.files:
+                    arrs[name] = npz[key]
+                else:
+                    arr = npz[key + '_text'].astype(object)
+                    arr[npz[key + '_nulls']] = None
+                    arrs[name] = arr
+            results[group] = arrs
+
+    if grouped is True:
+        return results
+
+    return results.get('', None)
+
+
+def _concat(pieces, start=None):
+    """
+    Stick a list of (ungrouped) results together in time order, keeping
+    only what's after start (integer ns) if it's given
+    """
+    pieces = [p for p in pieces if p is not None and len(p['time']) > 0]
+    if pieces == []:
+        return None
+
+    names = []
+    for piece in pieces:
+        names.extend([n for n in piece if n not in names])
+
+    out = {}
+    for name in names:
+        cols = []
+        for piece in pieces:
+            col = piece.get(name, None)
+            if col is None:
+                col = np.full(len(piece['time']), np.nan)
+            cols.append(col)
+        out[name] = np.concatenate(cols)
+
+    if start is None:
+        return out
+
+    keep = out['time'] > start
+    if not keep.all():
+        out = {name: col[keep] for name, col in out.items()}
+
+    return out
+
+
+class diskQueryCache():
+    """
+    cachedir: where the bucket files go; made if it's not there
+
+    buckethours: length of each bucket
+
+    settle: seconds after a bucket ends before it's considered closed,
+            to give late points a chance to show up first
+    """
+    def __init__(self, cachedir, buckethours=24, settle=300.):
+        self.cachedir = cachedir
+        self.bucketns = int(float(buckethours)*_nsPerHour)
+        self.settle = int(float(settle)*1e9)
+        os.makedirs(cachedir, exist_ok=True)
+
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.hits = 0
+        self.misses = 0
+        self.livefetches = 0
+
+    def _bucketPath(self, qkey, bstart):
+        return os.path.join(self.cachedir, qkey, "%d-%d.npz" % (bstart,
+                                                                self.bucketns))
+
+    def _closedBucket(self, query, qkey, bstart, grouped, debug=False):
+        """
+        Results for the closed bucket starting at bstart, from disk if
+        it's there and the server (then saved to disk) if not
+        """
+        path = self._bucketPath(qkey, bstart)
+        if os.path.exists(path):
+            try:
+                results = _loadBucket(path, grouped)
+                with self.lock:
+                    self.hits += 1
+                return results
+            except Exception as err:
+                print("Cached bucket %s is unreadable; fetching it again" %
+                      (path))
+                print(str(err))
+
+        results = numpyquery.getResultsArrays(query, debug=debug,
+                                              since=bstart - 1,
+                                              until=bstart + self.bucketns)
+        _saveBucket(path, results, grouped)
+        with self.lock:
+            self.misses += 1
+
+        return results
+
+    def getArrays(self, query, debug=False):
+        """
+        Same answer as numpyquery.getResultsArrays(query), with the closed
+        part of the window coming from disk where possible
+        """
+        if getattr(query, 'aggregate', None) is not None and \
+           getattr(query, 'groupbytime', None) is None:
+            # Only the server can aggregate over the whole window
+            with self.lock:
+                self.livefetches += 1
+            return numpyquery.getResultsArrays(query, debug=debug)
+
+        try:
+            hours = int(query.rangehours)
+        except (ValueError, TypeError):
+            hours = 1
+
+        grouped = numpyquery.isGrouped(query)
+
+        qkey, desc = _bucketKey(query)
+        qdir = os.path.join(self.cachedir, qkey)
+        if not os.path.isdir(qdir):
+            os.makedirs(qdir, exist_ok=True)
+            with open(os.path.join(qdir, 'query.txt'), 'w') as fh:
+                fh.write(desc + '\n')
+
+        now = time.time_ns()
+        start = now - hours*_nsPerHour
+        # Everything before livestart is in closed buckets
+        livestart = now - self.settle
+        livestart -= livestart % self.bucketns
+
+        pieces = []
+        bstart = start - start % self.bucketns
+        # Raw points from a whole bucket can just be trimmed to the window,
+        #   but the server's first interval only covers what's in the
+        #   window, so that partial bucket has to come from the server
+        trimto = start
+        if getattr(query, 'groupbytime', None) is not None:
+            trimto = None
+            if bstart < start and bstart + self.bucketns < livestart:
+                pieces.append(numpyquery.getResultsArrays(query, debug=debug,
+                                                          since=start - 1,
+                                                          until=bstart +
+                                                          self.bucketns))
+                with self.lock:
+                    self.livefetches += 1
+                bstart += self.bucketns
+
+        while bstart < livestart:
+            pieces.append(self._closedBucket(query, qkey, bstart, grouped,
+                                             debug=debug))
+            bstart += self.bucketns
+
+        pieces.append(numpyquery.getResultsArrays(query, debug=debug,
+                                                  since=max(bstart, start)-1))
+        with self.lock:
+            self.livefetches += 1
+
+        if grouped is True:
+            results = {}
+            tagvals = []
+            for piece in pieces:
+                tagvals.extend([t for t in piece if t not in tagvals])
+            for tval in tagvals:
+                res = _concat([p.get(tval, None) for p in pieces], trimto)
+                if res is not None:
+                    results[tval] = res
+        else:
+            results = _concat(pieces, trimto)
+            if results is None:
+                # Same empty answer numpyquery gives
+                results = pieces[-1]
+
+        return results
+
+    def get(self, query, debug=False, client=None):
+        """
+        Same answer as database.getResultsDataFrame(query), so this can be
+        handed to it as its cache.  client is ignored; it's only here so
+        the signature matches querycache.queryCache.get.
+        """
+        # Only needed here, so getArrays users don't have to import pandas
+        from . import database
+
+        results = self.getArrays(query, debug=debug)
+        if numpyquery.isGrouped(query) is True:
+            if results == {}:
+                return database.cleanResults({}, query)
+            return {tval: _toFrame(arrs) for tval, arrs in results.items()}
+        if len(results['time']) == 0:
+            return database.cleanResults({}, query)
+
+        return _toFrame(results)
+
+    def clear(self):
+        """
+        Delete every cached bucket file
+        """
+        for dirpath, _, files in os.walk(self.cachedir):
+            for fname in files:
+                if fname.endswith('.npz'):
+                    os.remove(os.path.join(dirpath, fname))
+
+    def stats(self):
+        """
+        Counters as a dict, plus how much is on disk
+        """
+        nfiles = 0
+        nbytes = 0
+        for dirpath, _, files in os.walk(self.cachedir):
+            for fname in files:
+                if fname.endswith('.npz'):
+                    nfiles += 1
+                    nbytes += os.path.getsize(os.path.join(dirpath, fname))
+        with self.lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'livefetches': self.livefetches,
+                    'files': nfiles,
+                    'bytes': nbytes}
+
+
+def _toFrame(arrs):
+    """
+    DataFrame (UTC DatetimeIndex) from a dict of arrays
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame({k: v for k, v in arrs.items() if k != 'time'},
+                         index=pd.to_datetime(arrs['time'], unit='ns',
+                                              utc=True))
+
+    return frame
@@ -0,0 +1,774 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""In-process stand-in for an InfluxDB 1.x server.
+
+Good enough to exercise influxobj.writeToDB, queryConstructor, and
+getResultsDataFrame without a real database, and to benchmark batching,
+retries, and spooling offline:
+
+    srv = fakeinflux.fakeInfluxServer(latency=0.01)
+    srv.start()
+    idb = database.influxobj(tablename='test', host='127.0.0.1',
+                             port=srv.port)
+    ...
+    srv.stop()
+
+It speaks /ping, /write (line protocol, optionally gzipped; also as
+/api/v2/write, with the bucket as the database), and /query
+with a small subset of InfluxQL: SELECT field [AS label], ... FROM meas
+WHERE time (and tag = 'value' conditions) GROUP BY tag, as well as
+simple aggregates (mean("field") and friends) with GROUP BY time(...)
+and fill(...).  Chunked query responses work too.  Points in the
+same series with the same timestamp overwrite each other, and field type
+conflicts get the same 400 the real thing gives.
+
+Latency and errors can be injected with the latency, errorrate, and
+errorcode attributes, which can be changed while it's running.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import re
+import gzip
+import json
+import time
+import random
+import threading
+import datetime as dt
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Nanoseconds per unit, for write precisions, epoch query formats, and
+#   durations in InfluxQL
+_nsPer = {'n': 1, 'ns': 1, 'u': 1000, 'us': 1000, 'µ': 1000,
+          'ms': 1000000, 's': 1000000000, 'm': 60000000000,
+          'h': 3600000000000, 'd': 86400000000000, 'w': 604800000000000}
+
+
+def _splitUnescaped(text, sep, maxsplit=-1):
+    """
+    Split on sep, ignoring backslash escaped ones and ones inside
+    double quoted strings
+    """
+    if '\\' not in text and '"' not in text:
+        # Nothing to worry about, so do it the quick way
+        return text.split(sep, maxsplit)
+
+    parts = []
+    cur = []
+    inquote = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '\\' and i+1 < len(text):
+            cur.append(text[i:i+2])
+            i += 2
+            continue
+        if char == '"':
+            inquote = not inquote
+        if char == sep and inquote is False and \
+           (maxsplit < 0 or len(parts) < maxsplit):
+            parts.append(''.join(cur))
+            cur = []
+        else:
+            cur.append(char)
+        i += 1
+    parts.append(''.join(cur))
+
+    return parts
+
+
+def _unescape(text):
+    return re.sub(r'\\(.)', r'\1', text)
+
+
+def _fieldValue(text):
+    """
+    Returns (type, value) for a line protocol field value
+    """
+    if text.startswith('"'):
+        return 'string', _unescape(text[1:-1])
+    elif text in ['t', 'T', 'true', 'True', 'TRUE']:
+        return 'boolean', True
+    elif text in ['f', 'F', 'false', 'False', 'FALSE']:
+        return 'boolean', False
+    elif text.endswith('i'):
+        return 'integer', int(text[:-1])
+    else:
+        return 'float', float(text)
+
+
+def parseLine(line, timeprec='n'):
+    """
+    Parse one line of line protocol into (measurement, tags, fields, ts)
+    where fields is {key: (type, value)} and ts is in ns (or None).
+    Raises ValueError if it can't.
+    """
+    parts = _splitUnescaped(line.strip(), ' ')
+    parts = [p for p in parts if p != '']
+    if len(parts) < 2 or len(parts) > 3:
+        raise ValueError("unable to parse '%s'" % (line))
+
+    series = _splitUnescaped(parts[0], ',')
+    meas = _unescape(series[0])
+    tags = {}
+    for tag in series[1:]:
+        key, val = _splitUnescaped(tag, '=', maxsplit=1)
+        tags.update({_unescape(key): _unescape(val)})
+
+    fields = {}
+    for field in _splitUnescaped(parts[1], ','):
+        key, val = _splitUnescaped(field, '=', maxsplit=1)
+        fields.update({_unescape(key): _fieldValue(val)})
+
+    if len(parts) == 3:
+        ts = int(parts[2]) * _nsPer[timeprec]
+    else:
+        ts = None
+
+    return meas, tags, fields, ts
+
+
+def formatTime(ns, epoch=None):
+    """
+    Format a timestamp (in ns) the way /query does; RFC3339 by default,
+    or an integer in the given epoch precision
+    """
+    if epoch is not None:
+        return ns // _nsPer[epoch]
+
+    secs, frac = divmod(ns, 1000000000)
+    stamp = dt.datetime.fromtimestamp(secs, tz=dt.timezone.utc)
+    text = stamp.strftime("%Y-%m-%dT%H:%M:%S")
+    if frac != 0:
+        text += ("." + "%09d" % (frac)).rstrip("0")
+
+    return text + "Z"
+
+
+def parseTime(text, now):
+    """
+    Turn the right hand side of a time comparison into ns
+    """
+    text = text.strip()
+    match = re.match(r"now\(\)\s*(?:([-+])\s*(\d+)(ns|u|µ|ms|s|m|h|d|w))?$",
+                     text)
+    if match is not None:
+        val = now
+        if match.group(1) is not None:
+            delta = int(match.group(2)) * _nsPer[match.group(3)]
+            if match.group(1) == '-':
+                val -= delta
+            else:
+                val += delta
+        return val
+
+    match = re.match(r"(\d+)(ns|u|µ|ms|s|m|h|d|w)?$", text)
+    if match is not None:
+        return int(match.group(1)) * _nsPer[match.group(2) or 'ns']
+
+    match = re.match(r"'(.+)'$", text)
+    if match is not None:
+        stamp = match.group(1).replace('Z', '+00:00')
+        stamp = dt.datetime.fromisoformat(stamp)
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=dt.timezone.utc)
+        return int(stamp.timestamp()) * 1000000000 + \
+            stamp.microsecond * 1000
+
+    raise ValueError("can't parse time '%s'" % (text))
+
+
+def _median(vals):
+    vals = sorted(vals)
+    mid = len(vals) // 2
+    if len(vals) % 2 == 1:
+        return vals[mid]
+    return (vals[mid-1] + vals[mid]) / 2
+
+
+def _stddev(vals):
+    if len(vals) < 2:
+        return None
+    mean = sum(vals) / len(vals)
+    return (sum([(v - mean)**2 for v in vals]) / (len(vals) - 1))**0.5
+
+
+# The aggregates we know about; each takes the (time ordered) values
+_aggregates = {'mean': lambda v: sum(v) / len(v),
+               'median': _median,
+               'min': min,
+               'max': max,
+               'sum': sum,
+               'count': len,
+               'first': lambda v: v[0],
+               'last': lambda v: v[-1],
+               'spread': lambda v: max(v) - min(v),
+               'stddev': _stddev}
+
+
+# Aggregates that pick out one point, and how, given (time, value) pairs
+_selectors = {'first': lambda p: p[0],
+              'last': lambda p: p[-1],
+              'min': lambda p: min(p, key=lambda x: x[1]),
+              'max': lambda p: max(p, key=lambda x: x[1])}
+
+
+def _unquote(name):
+    name = name.strip()
+    if len(name) > 1 and name[0] == name[-1] and name[0] in ['"', "'"]:
+        return name[1:-1]
+    return name
+
+
+class fakeQuery():
+    """
+    A parsed (simple) InfluxQL SELECT statement
+    """
+    selectRE = re.compile(r'^\s*SELECT\s+(?P<select>.+?)\s+'
+                          r'FROM\s+(?P<meas>"[^"]+"|\S+)'
+                          r'(?:\s+WHERE\s+(?P<where>.+?))?'
+                          r'(?:\s+GROUP\s+BY\s+(?P<group>.+?))?'
+                          r'(?:\s+fill\((?P<fill>[^)]+)\))?'
+                          r'(?:\s+LIMIT\s+(?P<limit>\d+))?\s*;?\s*$',
+                          re.IGNORECASE | re.DOTALL)
+
+    def __init__(self, statement, now):
+        match = self.selectRE.match(statement)
+        if match is None:
+            raise ValueError("can't parse query '%s'" % (statement))
+
+        meas = match.group('meas')
+        # Could be "db"."rp"."meas" but we only care about the measurement
+        self.meas = _unquote(_splitUnescaped(meas, '.')[-1]) \
+            if meas.startswith('"') is False else _unquote(meas)
+
+        # Columns are (field, label), and funcs are the aggregate (or
+        #   None) for each one
+        self.columns = []
+        self.funcs = []
+        for item in self._splitSelect(match.group('select')):
+            amatch = re.match(r'(.+?)\s+AS\s+(.+)$', item.strip(),
+                              re.IGNORECASE)
+            if amatch is not None:
+                field = amatch.group(1).strip()
+                label = _unquote(amatch.group(2))
+            else:
+                field = item.strip()
+                label = None
+            func = None
+            fmatch = re.match(r'(\w+)\((.+)\)$', field)
+            if fmatch is not None:
+                func = fmatch.group(1).lower()
+                if func not in _aggregates:
+                    raise ValueError("unsupported function %s" % (func))
+                field = fmatch.group(2)
+            field = _unquote(field)
+            if label is None:
+                label = func if func is not None else field
+            self.columns.append((field, label))
+            self.funcs.append(func)
+        self.aggregated = any([f is not None for f in self.funcs])
+        if self.aggregated and None in self.funcs:
+            raise ValueError("mixing aggregate functions with non-aggregate"
+                             " queries is not supported")
+
+        self.tstart = None
+        self.tstop = None
+        self.tagconds = []
+        if match.group('where') is not None:
+            self._parseWhere(match.group('where'), now)
+
+        self.groupby = []
+        self.interval = None
+        if match.group('group') is not None:
+            for tag in match.group('group').split(','):
+                imatch = re.match(r'\s*time\((\d+)(ns|u|µ|ms|s|m|h|d|w)\)'
+                                  r'\s*$', tag)
+                if imatch is not None:
+                    self.interval = int(imatch.group(1)) * \
+                        _nsPer[imatch.group(2)]
+                else:
+                    self.groupby.append(_unquote(tag))
+        if self.interval is not None and self.aggregated is False:
+            raise ValueError("GROUP BY requires at least one aggregate"
+                             " function")
+
+        self.fill = 'null'
+        if match.group('fill') is not None:
+            self.fill = match.group('fill').strip().lower()
+
+        self.limit = None
+        if match.group('limit') is not None:
+            self.limit = int(match.group('limit'))
+
+    def _splitSelect(self, text):
+        """
+        Split the SELECT list on commas that aren't inside parentheses
+        """
+        items = []
+        depth = 0
+        cur = ''
+        for char in text:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            if char == ',' and depth == 0:
+                items.append(cur)
+                cur = ''
+            else:
+                cur += char
+        items.append(cur)
+
+        return [i for i in items if i.strip() != '']
+
+    def _parseWhere(self, where, now):
+        """
+        Handles time comparisons, and tag comparisons (ORed together in
+        parentheses, or not), all ANDed together.
+        """
+        for cond in re.split(r'\s+AND\s+', where, flags=re.IGNORECASE):
+            cond = cond.strip()
+            tmatch = re.match(r'"?time"?\s*(>=|<=|>|<)\s*(.+)$', cond)
+            if tmatch is not None:
+                val = parseTime(tmatch.group(2), now)
+                if tmatch.group(1) == '>':
+                    self.tstart = val + 1
+                elif tmatch.group(1) == '>=':
+                    self.tstart = val
+                elif tmatch.group(1) == '<':
+                    self.tstop = val - 1
+                else:
+                    self.tstop = val
+                continue
+
+            cond = cond.strip('()')
+            options = []
+            for sub in re.split(r'\s+OR\s+', cond, flags=re.IGNORECASE):
+                sub = sub.strip().strip('()')
+                smatch = re.match(r'("[^"]+"|\w+)\s*=\s*\'(.*)\'$', sub)
+                if smatch is None:
+                    raise ValueError("can't parse condition '%s'" % (sub))
+                options.append((_unquote(smatch.group(1)), smatch.group(2)))
+            self.tagconds.append(options)
+
+    def matches(self, tags, ts):
+        """
+        True if a point with these tags and timestamp is selected
+        """
+        if self.tstart is not None and ts < self.tstart:
+            return False
+        if self.tstop is not None and ts > self.tstop:
+            return False
+        for options in self.tagconds:
+            if not any([tags.get(key, '') == val for key, val in options]):
+                return False
+        return True
+
+
+class fakeInfluxServer():
+    """
+    The fake server itself.  port=0 picks a free port, which is then
+    available as self.port after start().
+
+    latency: seconds to sleep before answering every request
+    errorrate: fraction (0-1) of requests that get errorcode instead
+    errorcode: HTTP status for those injected errors
+    parse: if False, writes are only counted (lines and bytes) and not
+           parsed or stored, so the server isn't the bottleneck when
+           benchmarking the client side
+    """
+    def __init__(self, host='127.0.0.1', port=0,
+                 latency=0., errorrate=0., errorcode=500, parse=True):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.errorrate = errorrate
+        self.errorcode = errorcode
+        self.parse = parse
+
+        # {db: {meas: {(tagtuple, ts): {field: value}}}}
+        self.data = {}
+        # {db: {meas: {field: type}}}
+        self.types = {}
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.nwrites = 0
+        self.nqueries = 0
+        self.npoints = 0
+        self.nbytes = 0
+        self.nerrors = 0
+
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """
+        Start serving in a background thread
+        """
+        handler = type('fakeInfluxHandler', (_fakeHandler,),
+                       {'fake': self})
+        self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       name='ligmos-fakeinflux',
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop serving.  Everything stored so far is kept.
+        """
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def reset(self):
+        """
+        Forget everything that's been written
+        """
+        with self.lock:
+            self.data = {}
+            self.types = {}
+            self.nwrites = 0
+            self.nqueries = 0
+            self.npoints = 0
+            self.nbytes = 0
+            self.nerrors = 0
+
+    def points(self, db, meas):
+        """
+        Everything stored for a measurement as a list of
+        (ts, tags, fields) sorted by time; handy for checking writes
+        """
+        with self.lock:
+            series = self.data.get(db, {}).get(meas, {})
+            pts = [(ts, dict(tagtup), dict(fields))
+                   for (tagtup, ts), fields in series.items()]
+
+        return sorted(pts, key=lambda x: x[0])
+
+    def write(self, db, body, timeprec='n'):
+        """
+        Store a line protocol body.  Returns (status, error message)
+        """
+        if self.parse is False:
+            with self.lock:
+                self.npoints += body.count('\n')
+            return 204, None
+
+        now = time.time_ns()
+        errors = []
+        dropped = 0
+        with self.lock:
+            dbdata = self.data.setdefault(db, {})
+            dbtypes = self.types.setdefault(db, {})
+            for line in body.splitlines():
+                if line.strip() == '' or line.startswith('#'):
+                    continue
+                try:
+                    meas, tags, fields, ts = parseLine(line,
+                                                       timeprec=timeprec)
+                except (ValueError, KeyError, IndexError) as err:
+                    return 400, "unable to parse '%s': %s" % (line, str(err))
+
+                if ts is None:
+                    ts = now
+
+                mtypes = dbtypes.setdefault(meas, {})
+                good = {}
+                for key, (ftype, val) in fields.items():
+                    known = mtypes.get(key, None)
+                    if known is not None and known != ftype:
+                        errors.append('field type conflict: input field '
+                                      '"%s" on measurement "%s" is type %s, '
+                                      'already exists as type %s' %
+                                      (key, meas, ftype, known))
+                        continue
+                    mtypes.update({key: ftype})
+                    good.update({key: val})
+
+                if len(good) != len(fields):
+                    dropped += 1
+                    continue
+
+                tagtup = tuple(sorted(tags.items()))
+                series = dbdata.setdefault(meas, {})
+                series.setdefault((tagtup, ts), {}).update(good)
+                self.npoints += 1
+
+        if errors != []:
+            return 400, "partial write: %s dropped=%d" % (errors[0], dropped)
+
+        return 204, None
+
+    def query(self, db, statements, epoch=None):
+        """
+        Run one or more (semicolon separated) statements.
+        Returns the JSON-able response.
+        """
+        now = time.time_ns()
+        results = []
+        for sid, statement in enumerate(_splitUnescaped(statements, ';')):
+            if statement.strip() == '':
+                continue
+            try:
+                result = self._runStatement(db, statement, now, epoch)
+            except ValueError as err:
+                result = {'error': str(err)}
+            result.update({'statement_id': sid})
+            results.append(result)
+
+        return {'results': results}
+
+    def chunks(self, response, chunksize=10000):
+        """
+        Split a query response into the separate (partial) responses a
+        chunked query gets, of at most chunksize rows of one series each
+        """
+        out = []
+        for result in response['results']:
+            series = result.get('series', [])
+            if series == []:
+                out.append({'results': [result]})
+                continue
+            pieces = []
+            for sdict in series:
+                vals = sdict['values']
+                for start in range(0, len(vals), chunksize):
+                    piece = dict(sdict, values=vals[start:start+chunksize])
+                    if start + chunksize < len(vals):
+                        piece.update({'partial': True})
+                    pieces.append(piece)
+            for i, piece in enumerate(pieces):
+                chunk = {'statement_id': result['statement_id'],
+                         'series': [piece]}
+                if i != len(pieces) - 1:
+                    chunk.update({'partial': True})
+                out.append({'results': [chunk]})
+
+        return out
+
+    def _runStatement(self, db, statement, now, epoch):
+        """
+        One statement's worth of results
+        """
+        if re.match(r'\s*CREATE\s+DATABASE', statement, re.IGNORECASE):
+            dbname = _unquote(statement.split()[-1])
+            with self.lock:
+                self.data.setdefault(dbname, {})
+            return {}
+
+        fq = fakeQuery(statement, now)
+
+        with self.lock:
+            series = dict(self.data.get(db, {}).get(fq.meas, {}))
+
+        groups = {}
+        for (tagtup, ts), fields in series.items():
+            tags = dict(tagtup)
+            if fq.matches(tags, ts) is False:
+                continue
+
+            row = [formatTime(ts, epoch=epoch)]
+            columns = fq.columns
+            if columns == [('*', '*')]:
+                # Just the fields for this point, sorted, since we don't
+                #   keep the full schema around
+                columns = [(k, k) for k in sorted(fields)]
+            vals = [fields.get(field, None) for field, _ in columns]
+            if all([v is None for v in vals]):
+                continue
+            row.extend(vals)
+
+            gkey = tuple([(tag, tags.get(tag, '')) for tag in fq.groupby])
+            groups.setdefault(gkey, []).append((ts, row, columns))
+
+        if groups == {}:
+            return {}
+
+        out = []
+        for gkey in sorted(groups):
+            rows = sorted(groups[gkey], key=lambda x: x[0])
+            if fq.aggregated is True:
+                rows = self._aggregate(fq, rows, now, epoch)
+            if fq.limit is not None:
+                rows = rows[:fq.limit]
+            sdict = {'name': fq.meas,
+                     'columns': ['time'] + [lab for _, lab in rows[0][2]],
+                     'values': [r[1] for r in rows]}
+            if fq.groupby != []:
+                sdict.update({'tags': dict(gkey)})
+            out.append(sdict)
+
+        return {'series': out}
+
+    def _aggregate(self, fq, rows, now, epoch):
+        """
+        Squash one group's (ts, row, columns) rows down into one row per
+        time bucket (or just one, if there's no GROUP BY time)
+        """
+        columns = rows[0][2]
+        if fq.interval is None:
+            buckets = {fq.tstart or 0: rows}
+            starts = [fq.tstart or 0]
+        else:
+            buckets = {}
+            for row in rows:
+                bstart = row[0] - row[0] % fq.interval
+                buckets.setdefault(bstart, []).append(row)
+            first = fq.tstart if fq.tstart is not None else min(buckets)
+            last = fq.tstop if fq.tstop is not None else now
+            starts = range(first - first % fq.interval, last + 1, fq.interval)
+
+        out = []
+        prev = None
+        for bstart in starts:
+            brows = buckets.get(bstart, [])
+            if brows == [] and fq.fill == 'none':
+                continue
+            vals = []
+            for i, func in enumerate(fq.funcs):
+                data = [r[1][i+1] for r in brows if r[1][i+1] is not None]
+                if data != []:
+                    vals.append(_aggregates[func](data))
+                elif fq.fill == 'previous' and prev is not None:
+                    vals.append(prev[i])
+                elif fq.fill not in ['null', 'none', 'previous', 'linear']:
+                    vals.append(float(fq.fill))
+                else:
+                    vals.append(None)
+            if brows != []:
+                prev = vals
+            stamp = bstart
+            if fq.interval is None and len(fq.funcs) == 1 and \
+               fq.funcs[0] in _selectors:
+                # A lone selector gives the time of the point it picked
+                picked = [(r[0], r[1][1]) for r in brows
+                          if r[1][1] is not None]
+                if picked != []:
+                    stamp = _selectors[fq.funcs[0]](picked)[0]
+            out.append((stamp, [formatTime(stamp, epoch=epoch)] + vals,
+                        columns))
+
+        return out
+
+
+class _fakeHandler(BaseHTTPRequestHandler):
+    """
+    Request handler; self.fake gets filled in with the fakeInfluxServer
+    """
+    protocol_version = 'HTTP/1.1'
+    fake = None
+
+    def log_message(self, *args):
+        # Shhhhh
+        pass
+
+    def _reply(self, code, payload=None):
+        if payload is None:
+            body = b''
+        else:
+            body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Influxdb-Version', 'ligmos-fake')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _replyChunked(self, payloads):
+        """
+        One JSON document per line, sent with chunked transfer encoding
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('X-Influxdb-Version', 'ligmos-fake')
+        self.end_headers()
+        for payload in payloads:
+            body = json.dumps(payload).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _body(self):
+        nbytes = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(nbytes)
+        self.fake.nbytes += nbytes
+        if self.headers.get('Content-Encoding', '') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def _injected(self):
+        """
+        Sleep and/or fail as configured; True if an error was sent
+        """
+        if self.fake.latency > 0:
+            time.sleep(self.fake.latency)
+        if self.fake.errorrate > 0 and random.random() < self.fake.errorrate:
+            self.fake.nerrors += 1
+            self._reply(self.fake.errorcode, {'error': 'injected error'})
+            return True
+        return False
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        body = b''
+        if method == 'POST':
+            body = self._body()
+
+        if url.path == '/ping':
+            self._reply(204)
+            return
+
+        if self._injected() is True:
+            return
+
+        if url.path in ['/write', '/api/v2/write'] and method == 'POST':
+            self.fake.nwrites += 1
+            if url.path == '/api/v2/write':
+                params.update({'db': params.get('bucket', None)})
+            code, err = self.fake.write(params.get('db', None),
+                                        body.decode("utf-8"),
+                                        timeprec=params.get('precision', 'n'))
+            if err is not None:
+                self._reply(code, {'error': err})
+            else:
+                self._reply(code)
+        elif url.path == '/query':
+            self.fake.nqueries += 1
+            if method == 'POST' and 'q' not in params:
+                # Form encoded POST body
+                params.update({k: v[-1] for k, v in
+                               parse_qs(body.decode("utf-8")).items()})
+            res = self.fake.query(params.get('db', None),
+                                  params.get('q', ''),
+                                  epoch=params.get('epoch', None))
+            if params.get('chunked', 'false').lower() == 'true':
+                chunksize = int(params.get('chunk_size', 0)) or 10000
+                self._replyChunked(self.fake.chunks(res, chunksize))
+            else:
+                self._reply(200, res)
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Fan-out writer that sends the same points to several databases at once.
+
+Takes the dict of database.influxobj instances from
+workers.connSetup.connIDB and gives each one its own queue and writer
+thread, so a slow or dead target only backs up its own queue instead of
+holding up the rest (or the STOMP listener thread that's feeding them).
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import queue
+import atexit
+import threading
+
+from . import metrics
+
+
+class fanoutTarget():
+    """
+    One destination database, its queue, and its bookkeeping.  The queue
+    depth, drops, and write latency also go into registry, labelled with
+    the target name.
+    """
+    def __init__(self, name, db, maxqueue=10000, registry=None):
+        self.name = name
+        self.db = db
+        self.queue = queue.Queue(maxsize=maxqueue)
+
+        if registry is None:
+            registry = metrics.defaultRegistry
+        self.backlog = registry.gauge('fanout_backlog', target=str(name))
+        self.droppedWrites = registry.counter('fanout_dropped_writes',
+                                              target=str(name))
+        self.latency = registry.histogram('fanout_write_latency',
+                                          target=str(name))
+
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.lastlatency = None
+        self.avglatency = None
+        self.maxlatency = 0.
+
+        self.thread = None
+
+    def record(self, good, latency):
+        """
+        Update the counters after one write
+        """
+        if good is True:
+            self.written += 1
+        else:
+            self.failed += 1
+
+        self.latency.observe(latency)
+        self.lastlatency = latency
+        self.maxlatency = max(self.maxlatency, latency)
+        if self.avglatency is None:
+            self.avglatency = latency
+        else:
+            # Exponentially weighted so it tracks recent behavior
+            self.avglatency = 0.9*self.avglatency + 0.1*latency
+
+    def stats(self):
+        """
+        Latency (seconds), backlog, and counters as a dict
+        """
+        return {'backlog': self.queue.qsize(),
+                'written': self.written,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'lastlatency': self.lastlatency,
+                'avglatency': self.avglatency,
+                'maxlatency': self.maxlatency}
+
+
+class fanoutWriter():
+    """
+    Has the same write()/singleCommit() interface as database.influxobj,
+    so it can be handed to the messageParsers (or LIGBaseConsumer) as the
+    db and every write goes to all of the targets.
+
+    targets: dict of {name: influxobj}, like from connSetup.connIDB
+
+    maxqueue: most writes that can be waiting per target; past that, new
+              writes for that target are dropped (and counted)
+
+    metricsregistry: metrics.metricsRegistry for the per-target backlog,
+                     drop counts, and write latency histogram;
+                     metrics.defaultRegistry if None
+
+    Writes go through each target's own singleCommit, so its batching,
+    deadband, and connection handling all still apply.
+    """
+    def __init__(self, targets, maxqueue=10000, metricsregistry=None):
+        # The parsers call singleCommit(..., table=db.tablename) and each
+        #   target should use its own table in that case
+        self.tablename = None
+        self.stopper = threading.Event()
+
+        self.targets = {}
+        for name, db in targets.items():
+            targ = fanoutTarget(name, db, maxqueue=maxqueue,
+                                registry=metricsregistry)
+            targ.thread = threading.Thread(target=self._writer,
+                                           args=(targ,),
+                                           name='ligmos-fanout-%s' % (name),
+                                           daemon=True)
+            targ.thread.start()
+            self.targets.update({name: targ})
+
+        atexit.register(self.stop)
+
+    def _writer(self, targ):
+        """
+        Per-target loop; takes writes off that target's queue in order
+        """
+        while True:
+            try:
+                item = targ.queue.get(timeout=0.5)
+            except queue.Empty:
+                # Only quit on an empty queue if stop() couldn't fit None in
+                if self.stopper.is_set() is True:
+                    break
+                continue
+            targ.backlog.set(targ.queue.qsize())
+            if item is None:
+                break
+
+            vals, table, timeprec, close = item
+            t0 = time.monotonic()
+            try:
+                # None means it was buffered or filtered; not a failure
+                good = targ.db.singleCommit(vals, table=table,
+                                            timeprec=timeprec, close=close)
+            except Exception as err:
+                print("Fan-out write to %s failed!" % (targ.name))
+                print(str(err))
+                good = False
+            targ.record(good is not False, time.monotonic() - t0)
+
+    def singleCommit(self, packet, table=None, timeprec='s',
+                     debug=False, close=True):
+        """
+        Queue the packet up for every target.  close is handed on to each
+        target's singleCommit along with the packet.
+        """
+        for targ in self.targets.values():
+            try:
+                targ.queue.put_nowait((packet, table, timeprec, close))
+            except queue.Full:
+                targ.dropped += 1
+                targ.droppedWrites.inc()
+                if debug is True:
+                    print("Fan-out queue for %s is full!" % (targ.name))
+            targ.backlog.set(targ.queue.qsize())
+
+    def write(self, vals, debug=False):
+        # Just a stub in case I can't remember...
+        self.singleCommit(vals, debug=debug)
+
+    def stats(self):
+        """
+        Per-target latency and backlog, as a dict of dicts
+        """
+        return {name: targ.stats() for name, targ in self.targets.items()}
+
+    def stop(self, timeout=None):
+        """
+        Let each target finish what's already queued, then stop the threads.
+        Waits at most timeout seconds per target (forever if None); a
+        target whose writes are stuck is left to finish on its own.
+        """
+        self.stopper.set()
+        atexit.unregister(self.stop)
+        for targ in self.targets.values():
+            try:
+                targ.queue.put_nowait(None)
+            except queue.Full:
+                # Its writer quits on its own once the queue is empty
+                pass
+        for targ in self.targets.values():
+            targ.thread.join(timeout)
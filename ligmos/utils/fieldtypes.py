@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Per-measurement, per-field type registry for database writes.
+
+InfluxDB fixes a field's type (float/integer/boolean/string) the first
+time it's written within a shard, and rejects anything else with a 400
+"field type conflict".  This keeps track of what each field already is,
+so values can be coerced to match before they're sent instead of after
+the server has thrown out the whole request.
+
+Types can be learned from successful writes, from the server's own
+conflict errors, seeded from the XML schemas in ligmos/schemas, and
+persisted to a JSON file so they survive restarts.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import re
+import json
+import math
+import time
+import threading
+
+# xmlschema type names (walking up base types until one of these matches)
+#   mapped onto InfluxDB field types.  parserFlatPacket decodes with
+#   decimal_type=float so decimals end up as floats.
+_xsdTypes = {'boolean': 'boolean',
+             'decimal': 'float', 'float': 'float', 'double': 'float',
+             'integer': 'integer', 'long': 'integer', 'int': 'integer',
+             'short': 'integer', 'byte': 'integer',
+             'nonNegativeInteger': 'integer', 'nonPositiveInteger': 'integer',
+             'positiveInteger': 'integer', 'negativeInteger': 'integer',
+             'unsignedLong': 'integer', 'unsignedInt': 'integer',
+             'unsignedShort': 'integer', 'unsignedByte': 'integer',
+             'string': 'string', 'normalizedString': 'string',
+             'token': 'string', 'dateTime': 'string'}
+
+# e.g. (as found inside the JSON error content from the server)
+#   field type conflict: input field "ping" on measurement "PingResults"
+#   is type integer, already exists as type float
+_conflictRE = re.compile(r'input field \\?"(?P<field>.+?)\\?" on '
+                         r'measurement \\?"(?P<meas>.+?)\\?" is type '
+                         r'(?P<given>\w+), already exists as type '
+                         r'(?P<existing>\w+)')
+
+
+def valueType(val):
+    """
+    InfluxDB field type name for a python value, or None if it's not
+    something that can be stored.  Order matters; bool is also an int!
+    Matches what packetizer.fieldValue actually sends.
+    """
+    if isinstance(val, bool):
+        return 'boolean'
+    elif isinstance(val, int):
+        return 'integer'
+    elif isinstance(val, float):
+        if math.isfinite(val):
+            return 'float'
+        return None
+    elif isinstance(val, str):
+        return 'string'
+    elif hasattr(val, 'item'):
+        # numpy scalars; numeric ones always go out as floats
+        pyval = val.item()
+        if isinstance(pyval, (bool, int, float)):
+            return valueType(float(pyval))
+        return valueType(pyval)
+    else:
+        return None
+
+
+def coerceValue(val, ftype):
+    """
+    Try to turn val into the given InfluxDB field type.
+
+    Returns (success, newval).  Anything that would lose information
+    (like 1.5 into an integer field) is a failure.
+    """
+    if hasattr(val, 'item') and not isinstance(val, (bool, int, float)):
+        val = val.item()
+
+    try:
+        if ftype == 'float':
+            if isinstance(val, str):
+                return True, float(val.strip())
+            return True, float(val)
+        elif ftype == 'integer':
+            if isinstance(val, float):
+                if val.is_integer():
+                    return True, int(val)
+                return False, val
+            elif isinstance(val, str):
+                return True, int(val.strip())
+            return True, int(val)
+        elif ftype == 'boolean':
+            if isinstance(val, str):
+                if val.strip().lower() in ['true', 't', '1']:
+                    return True, True
+                elif val.strip().lower() in ['false', 'f', '0']:
+                    return True, False
+                return False, val
+            elif val in [0, 1]:
+                return True, bool(val)
+            return False, val
+        elif ftype == 'string':
+            return True, str(val)
+    except (ValueError, TypeError, OverflowError):
+        pass
+
+    return False, val
+
+
+def schemaFieldTypes(schema, sep='_'):
+    """
+    Walk an xmlschema.XMLSchema and return a dict of the field names (as
+    they come out of messageParsers.flatten) mapped to InfluxDB types.
+    """
+    ftypes = {}
+
+    def simpleType(xtype):
+        # Walk up the derivation chain until we hit something we know
+        while xtype is not None:
+            lname = getattr(xtype, 'local_name', None)
+            if lname in _xsdTypes:
+                return _xsdTypes[lname]
+            xtype = getattr(xtype, 'base_type', None)
+        return None
+
+    def walk(elem, prefix):
+        for child in elem.iterchildren():
+            name = child.local_name
+            if prefix != '':
+                name = prefix + sep + name
+
+            if child.type.is_simple() or child.type.has_simple_content():
+                ftype = simpleType(child.type)
+                if ftype is not None:
+                    ftypes.update({name: ftype})
+            else:
+                walk(child, name)
+
+    for root in schema.elements.values():
+        if root.type.is_complex():
+            walk(root, '')
+
+    return ftypes
+
+
+class fieldTypeRegistry():
+    """
+    Tracks the established type of each field in each measurement and
+    coerces outgoing points to match.
+
+    typefile: JSON file to load from, and save to whenever something new
+              is learned (at most every saveinterval seconds)
+    """
+    def __init__(self, typefile=None, saveinterval=60.):
+        self.typefile = typefile
+        self.saveinterval = float(saveinterval)
+
+        # {measurement: {field: type}}
+        self.types = {}
+        self.lock = threading.Lock()
+
+        self.dirty = False
+        self.lastsave = 0.
+
+        # Bookkeeping
+        self.coerced = 0
+        self.dropped = 0
+        self.conflicts = 0
+
+        if self.typefile is not None and os.path.exists(self.typefile):
+            self.load()
+
+    def load(self):
+        """
+        Merge in whatever is in the typefile
+        """
+        try:
+            with open(self.typefile, 'r') as f:
+                saved = json.load(f)
+            with self.lock:
+                for meas, ftypes in saved.items():
+                    self.types.setdefault(meas, {}).update(ftypes)
+            print("Loaded field types for %d measurements from %s" %
+                  (len(saved), self.typefile))
+        except (OSError, ValueError) as err:
+            print("Could not load field types from %s!" % (self.typefile))
+            print(str(err))
+
+    def save(self):
+        """
+        Write everything out to the typefile (atomically, via a rename)
+        """
+        if self.typefile is None:
+            return
+
+        with self.lock:
+            blob = json.dumps(self.types, indent=1, sort_keys=True)
+            self.dirty = False
+            self.lastsave = time.monotonic()
+
+        tmpname = self.typefile + ".tmp"
+        try:
+            with open(tmpname, 'w') as f:
+                f.write(blob)
+            os.replace(tmpname, self.typefile)
+        except OSError as err:
+            print("Could not save field types to %s!" % (self.typefile))
+            print(str(err))
+
+    def _maybeSave(self):
+        if self.dirty is True and self.typefile is not None:
+            if time.monotonic() - self.lastsave > self.saveinterval:
+                self.save()
+
+    def seedFromSchemas(self, schemaDict):
+        """
+        Fill in (without overriding anything already known) from a dict of
+        schemas like the one from xmlschemas.schemaDicter().  Versioned
+        schemas get the same '_version' measurement postfix that
+        parserFlatPacket uses.
+        """
+        nseeded = 0
+        for topic, sch in schemaDict.items():
+            if isinstance(sch, dict):
+                pairs = [("%s_%s" % (topic, ver), vsch)
+                         for ver, vsch in sch.items()]
+            else:
+                pairs = [(topic, sch)]
+
+            for meas, vsch in pairs:
+                ftypes = schemaFieldTypes(vsch)
+                with self.lock:
+                    known = self.types.setdefault(meas, {})
+                    for field, ftype in ftypes.items():
+                        if field not in known:
+                            known.update({field: ftype})
+                            nseeded += 1
+                            self.dirty = True
+
+        print("Seeded %d field types from schemas" % (nseeded))
+
+    def learn(self, points):
+        """
+        Record the types of any fields we haven't seen before from points
+        that were just successfully written
+        """
+        with self.lock:
+            for pt in points:
+                if not isinstance(pt, dict):
+                    continue
+                known = self.types.setdefault(pt['measurement'], {})
+                for field, val in pt.get('fields', {}).items():
+                    if field not in known:
+                        ftype = valueType(val)
+                        if ftype is not None:
+                            known.update({field: ftype})
+                            self.dirty = True
+
+        self._maybeSave()
+
+    def learnFromError(self, content):
+        """
+        Pull the established types out of a "field type conflict" error
+        from the server and remember them; these override anything else
+        we thought we knew.
+
+        Returns True if anything was learned.
+        """
+        if content is None:
+            return False
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", errors="replace")
+
+        found = False
+        with self.lock:
+            for match in _conflictRE.finditer(content):
+                meas = match.group('meas')
+                field = match.group('field')
+                existing = match.group('existing')
+                self.types.setdefault(meas, {}).update({field: existing})
+                self.conflicts += 1
+                self.dirty = True
+                found = True
+
+        if found is True:
+            # These are worth keeping right away
+            self.save()
+
+        return found
+
+    def coerce(self, points):
+        """
+        Return a list of points with field values converted to the
+        established types.  Points that need changes are copied first;
+        fields that can't be converted without losing information are
+        dropped (and counted) rather than poisoning the whole request.
+        """
+        newpoints = []
+        with self.lock:
+            for pt in points:
+                if not isinstance(pt, dict):
+                    newpoints.append(pt)
+                    continue
+
+                known = self.types.get(pt['measurement'], None)
+                fields = pt.get('fields', None)
+                if known is None or not fields:
+                    newpoints.append(pt)
+                    continue
+
+                newfields = None
+                for field, val in fields.items():
+                    ftype = known.get(field, None)
+                    if ftype is None or val is None or \
+                       valueType(val) == ftype:
+                        continue
+
+                    good, nval = coerceValue(val, ftype)
+                    if newfields is None:
+                        newfields = dict(fields)
+                    if good is True:
+                        newfields[field] = nval
+                        self.coerced += 1
+                    else:
+                        print("Dropping %s.%s=%s; can't make it a %s" %
+                              (pt['measurement'], field, val, ftype))
+                        newfields.pop(field)
+                        self.dropped += 1
+
+                if newfields is not None:
+                    pt = dict(pt, fields=newfields)
+                newpoints.append(pt)
+
+        return newpoints
+
+    def stats(self):
+        """
+        Counters as a dict
+        """
+        with self.lock:
+            nfields = sum([len(v) for v in self.types.values()])
+            return {'measurements': len(self.types),
+                    'fields': nfields,
+                    'coerced': self.coerced,
+                    'dropped': self.dropped,
+                    'conflicts': self.conflicts}
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Newest value of fields, for status checks, shared across a process.
+
+Instead of pulling every row in the last hour to look at the final one,
+each field of a databaseQuery gets its own SELECT last("field") ...
+statement (so each one comes back with the time of its own newest
+point), and all of the statements for the same database on the same
+server go out in a single request.  Answers are kept for ttl seconds,
+and callers asking for something that's already being fetched just wait
+for that answer instead of asking again.
+
+    vals = latest.getLatest(dbq)
+    vals['DomeState']            -> (time in ns, value)
+    vals['LMI']['CCDTemp']       -> same, if dbq is grouped by a tag
+
+Fields (or tag values) with nothing in the last rangehours come back as
+(None, None).  Like numpyquery, this doesn't need pandas.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import copy
+import json
+import time
+import threading
+
+from . import numpyquery
+from .querybuilder import queryConstructor
+
+
+def _asList(val):
+    if val is None:
+        return []
+    if isinstance(val, list):
+        return val
+
+    return [val]
+
+
+def lastStatements(query):
+    """
+    List of (label, statement) pairs, one per field of query
+    """
+    fields = _asList(query.fields)
+    labels = _asList(query.fieldlabels)
+
+    stmts = []
+    for i, field in enumerate(fields):
+        try:
+            label = labels[i]
+        except IndexError:
+            label = field.strip()
+        single = copy.copy(query)
+        single.fields = [field]
+        single.fieldlabels = [label]
+        single.aggregate = 'last'
+        single.groupbytime = None
+        single.fill = None
+        stmts.append((label, queryConstructor(single)))
+
+    return stmts
+
+
+def _serverKey(query):
+    """
+    What queries have to share to go out in the same request.  Leaves the
+    password out so it isn't sitting around in cache keys.
+    """
+    db = query.database
+
+    return (db.host, db.port, db.user, query.tablename)
+
+
+def _emptyAnswer(query, labels):
+    if numpyquery.isGrouped(query) is True:
+        return {tval.strip(): {label: (None, None) for label in labels}
+                for tval in query.tagvals}
+
+    return {label: (None, None) for label in labels}
+
+
+def fetchLatest(queries, timeout=None):
+    """
+    Newest values for a dict of databaseQuery objects, with no caching.
+    One request per database/server.  Returns a dict keyed like queries.
+    """
+    groups = {}
+    for qname, query in queries.items():
+        groups.setdefault(_serverKey(query), []).append(qname)
+
+    answers = {}
+    for qnames in groups.values():
+        first = queries[qnames[0]]
+        plan = []
+        for qname in qnames:
+            stmts = lastStatements(queries[qname])
+            answers[qname] = _emptyAnswer(queries[qname],
+                                          [lab for lab, _ in stmts])
+            plan.extend([(qname, lab, stmt) for lab, stmt in stmts])
+        if plan == []:
+            continue
+
+        db = first.database
+        params = {'q': ';'.join([stmt for _, _, stmt in plan]),
+                  'db': first.tablename,
+                  'epoch': 'ns'}
+        if db.user is not None:
+            params.update({'u': db.user, 'p': db.password})
+        url = "http://%s:%s/query" % (db.host, db.port)
+        response = numpyquery._session(db).post(url, data=params,
+                                                timeout=timeout)
+        if response.status_code != 200:
+            print("Latest value query failed! %d %s" % (response.status_code,
+                                                        response.text))
+            response.raise_for_status()
+
+        payload = json.loads(response.content)
+        if 'error' in payload:
+            raise ValueError(payload['error'])
+
+        for result in payload.get('results', []):
+            try:
+                qname, label, _ = plan[result.get('statement_id', 0)]
+            except IndexError:
+                continue
+            if 'error' in result:
+                print("Latest %s for %s failed! %s" % (label, qname,
+                                                       result['error']))
+                continue
+            for series in result.get('series', []):
+                if series.get('values', []) == []:
+                    continue
+                stamp, val = series['values'][0][:2]
+                if series.get('tags', None):
+                    tval = sorted(series['tags'].items())[0][1]
+                    answers[qname].setdefault(tval, {})[label] = (stamp, val)
+                else:
+                    answers[qname][label] = (stamp, val)
+
+    return answers
+
+
+class latestCache():
+    """
+    Keeps fetchLatest answers for ttl seconds.  Safe to share between
+    threads; if several ask for the same thing at once, only one of them
+    actually goes and gets it.
+    """
+    def __init__(self, ttl=5., timeout=None):
+        self.ttl = float(ttl)
+        self.timeout = timeout
+
+        # key: (time fetched, answer)
+        self.entries = {}
+        # key: threading.Event, set once the fetch for key is done
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.requests = 0
+
+    def _key(self, query):
+        return _serverKey(query) + tuple([stmt for _, stmt in
+                                          lastStatements(query)])
+
+    def getMany(self, queries):
+        """
+        Newest values for a dict of databaseQuery objects, keyed the same
+        """
+        keys = {qname: self._key(query) for qname, query in queries.items()}
+        answers = {}
+        tofetch = {}
+        waiting = {}
+
+        now = time.monotonic()
+        with self.lock:
+            for qname, key in keys.items():
+                entry = self.entries.get(key, None)
+                if entry is not None and now - entry[0] < self.ttl:
+                    answers[qname] = copy.deepcopy(entry[1])
+                    self.hits += 1
+                elif key in self.inflight:
+                    waiting[qname] = self.inflight[key]
+                    self.waits += 1
+                elif key in tofetch.values():
+                    # Same thing asked for twice in one go
+                    waiting[qname] = None
+                else:
+                    tofetch[qname] = key
+                    self.inflight[key] = threading.Event()
+                    self.misses += 1
+
+        if tofetch != {}:
+            fetched = None
+            try:
+                fetched = fetchLatest({qname: queries[qname]
+                                       for qname in tofetch},
+                                      timeout=self.timeout)
+            finally:
+                stamp = time.monotonic()
+                with self.lock:
+                    self.requests += 1
+                    # Throw out anything that's gone stale while we're here
+                    self.entries = {k: v for k, v in self.entries.items()
+                                    if stamp - v[0] < self.ttl}
+                    for qname, key in tofetch.items():
+                        # Nothing at all if it failed, so waiters retry
+                        if fetched is not None:
+                            self.entries[key] = (stamp, fetched[qname])
+                        self.inflight.pop(key).set()
+            for qname in tofetch:
+                answers[qname] = copy.deepcopy(fetched[qname])
+
+        for qname, event in waiting.items():
+            if event is not None:
+                event.wait()
+            with self.lock:
+                entry = self.entries.get(keys[qname], None)
+            if entry is None:
+                # Whoever was fetching it failed; have a go ourselves
+                answers[qname] = self.getMany({qname: queries[qname]})[qname]
+            else:
+                answers[qname] = copy.deepcopy(entry[1])
+
+        return answers
+
+    def get(self, query):
+        """
+        Newest values for one databaseQuery
+        """
+        return self.getMany({'query': query})['query']
+
+    def stats(self):
+        """
+        Counters as a dict
+        """
+        with self.lock:
+            return {'entries': len(self.entries),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'waits': self.waits,
+                    'requests': self.requests}
+
+    def clear(self):
+        """
+        Forget every cached answer
+        """
+        with self.lock:
+            self.entries = {}
+
+
+# Shared by everything in the process that doesn't bring its own
+defaultCache = latestCache()
+
+
+def getLatest(query, cache=None):
+    """
+    Newest values for one databaseQuery, from cache (or defaultCache)
+    """
+    if cache is None:
+        cache = defaultCache
+
+    return cache.get(query)
+
+
+def getLatestMany(queries, cache=None):
+    """
+    Newest values for a dict of databaseQuery objects, from cache (or
+    defaultCache), in as few requests as possible
+    """
+    if cache is None:
+        cache = defaultCache
+
+    return cache.getMany(queries)
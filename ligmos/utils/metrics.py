@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Lightweight counters, gauges, and histograms for the write path.
+
+Each metric is identified by a name plus a set of labels (like the
+database or measurement it's about) and keeps its own little lock, so
+updating one never waits on anything but another update of the same
+metric.  The registry lock is only taken the first time a given
+name/labels combination shows up.
+
+    reg = metrics.defaultRegistry
+    reg.counter('write_points', database='lig').inc(50)
+    reg.histogram('write_latency', database='lig').observe(0.012)
+
+The write path keeps its queue depths here as gauges, too:
+buffer_pending, spool_bytes, breaker_state (plus breaker_transitions
+counters), and fanout_backlog.
+
+A metricsReporter can write everything in a registry back into the
+database every so often, as points in a designated measurement.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import atexit
+import bisect
+import threading
+
+# Default bucket upper bounds; seconds for latencies, and counts for sizes
+latencyBuckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                  0.1, 0.25, 0.5, 1., 2.5, 5., 10.)
+sizeBuckets = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+class counter():
+    """
+    Only goes up
+    """
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def fields(self, name):
+        return {name: self.value}
+
+
+class gauge():
+    """
+    Goes wherever it's told
+    """
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self.lock:
+            self.value -= amount
+
+    def fields(self, name):
+        return {name: self.value}
+
+
+class histogram():
+    """
+    Counts of observations falling at or below each of a fixed set of
+    bucket upper bounds (plus one overflow bucket), and their total
+    """
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'lock')
+
+    def __init__(self, buckets=latencyBuckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0]*(len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total += value
+
+    def quantile(self, q):
+        """
+        Rough quantile (0-1); the upper bound of the bucket it falls in,
+        or None if there's nothing yet or it's in the overflow bucket
+        """
+        with self.lock:
+            counts = list(self.counts)
+            count = self.count
+        if count == 0:
+            return None
+
+        target = q*count
+        running = 0
+        for bound, cnt in zip(self.buckets, counts):
+            running += cnt
+            if running >= target:
+                return bound
+
+        return None
+
+    def fields(self, name):
+        with self.lock:
+            flds = {name + '_count': self.count,
+                    name + '_sum': self.total}
+            running = 0
+            for bound, cnt in zip(self.buckets, self.counts):
+                running += cnt
+                flds.update({'%s_le_%g' % (name, bound): running})
+
+        return flds
+
+
+class metricsRegistry():
+    """
+    Holds every metric, keyed by (name, sorted labels)
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, kind, name, labels, *args):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key, None)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key, None)
+                if metric is None:
+                    metric = kind(*args)
+                    self.metrics[key] = metric
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(gauge, name, labels)
+
+    def histogram(self, name, buckets=latencyBuckets, **labels):
+        return self._get(histogram, name, labels, buckets)
+
+    def snapshot(self):
+        """
+        Everything as a dict of {labels: {field: value}}, where labels is
+        a tuple of sorted (label, value) pairs and histograms are spread
+        out into their count, sum, and cumulative bucket fields
+        """
+        with self.lock:
+            items = list(self.metrics.items())
+
+        snap = {}
+        for (name, labels), metric in items:
+            snap.setdefault(labels, {}).update(metric.fields(name))
+
+        return snap
+
+    def toPoints(self, measurement='ligmos_metrics', tags=None):
+        """
+        The snapshot as makeInfluxPacket style points, one per label set,
+        with the labels as tags (plus any extra tags given)
+        """
+        now = int(time.time())
+        points = []
+        for labels, fields in self.snapshot().items():
+            ptags = dict(labels)
+            if tags is not None:
+                ptags.update(tags)
+            points.append({'measurement': measurement,
+                           'tags': {k: str(v) for k, v in ptags.items()},
+                           'fields': fields,
+                           'time': now})
+
+        return points
+
+    def reset(self):
+        """
+        Forget everything
+        """
+        with self.lock:
+            self.metrics = {}
+
+
+# Shared by everything that doesn't get handed its own registry
+defaultRegistry = metricsRegistry()
+
+
+class metricsReporter():
+    """
+    Writes registry.toPoints() to db (anything with a singleCommit, like
+    database.influxobj) every interval seconds from a background thread.
+    """
+    def __init__(self, db, registry=None, measurement='ligmos_metrics',
+                 interval=60., table=None, tags=None):
+        self.db = db
+        if registry is None:
+            registry = defaultRegistry
+        self.registry = registry
+        self.measurement = measurement
+        self.interval = float(interval)
+        self.table = table
+        self.tags = tags
+
+        self.stopper = threading.Event()
+        self.thread = threading.Thread(target=self._reporter,
+                                       name='ligmos-metricsReporter',
+                                       daemon=True)
+        self.thread.start()
+
+        atexit.register(self.stop)
+
+    def report(self):
+        """
+        Write out the current values right now
+        """
+        points = self.registry.toPoints(measurement=self.measurement,
+                                        tags=self.tags)
+        if points == []:
+            return
+        table = self.table
+        if table is None:
+            table = self.db.tablename
+        try:
+            self.db.singleCommit(points, table=table, timeprec='s',
+                                 close=True)
+        except Exception as err:
+            print("Could not report metrics!")
+            print(str(err))
+
+    def _reporter(self):
+        while self.stopper.wait(self.interval) is False:
+            self.report()
+
+    def stop(self):
+        """
+        Stop reporting
+        """
+        if self.stopper.is_set() is True:
+            return
+        self.stopper.set()
+        atexit.unregister(self.stop)
+        self.thread.join()
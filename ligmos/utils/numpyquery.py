@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Query results straight into NumPy arrays, without pandas.
+
+For lightweight consumers that just want timestamps and a few columns.
+The /query JSON is decoded directly into a dict of arrays: 'time' (int64
+ns since the epoch, UTC), then one array per field label; int64, bool,
+or float64 (NaN for nulls) where the values allow it, and object
+otherwise.  Any expected column the server didn't send back is all NaN.
+Queries grouped by a tag give {tagvalue: dict of arrays}, same as
+database.getResultsDataFrame does with DataFrames.
+
+Neither this nor querybuilder import pandas or influxdb-python; this
+talks to the server with requests directly.
+
+    arrs = numpyquery.getResultsArrays(dbq)
+    arrs['time'], arrs['Temperature']
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import json
+import threading
+
+import numpy as np
+import requests
+
+from .querybuilder import queryConstructor
+
+# One requests.Session per server, so repeated queries reuse connections
+_sessions = {}
+_sessionsLock = threading.Lock()
+
+
+def _session(db):
+    key = (db.host, db.port)
+    with _sessionsLock:
+        sess = _sessions.get(key, None)
+        if sess is None:
+            sess = requests.Session()
+            _sessions[key] = sess
+
+    return sess
+
+
+def columnArray(vals):
+    """
+    NumPy array for one column of JSON query values; int64 or bool when
+    they're all integers or booleans, float64 (with NaN for nulls) when
+    they're all numbers, and object otherwise
+    """
+    arr = np.array(vals)
+    if arr.dtype.kind in 'iu':
+        return arr.astype(np.int64)
+    elif arr.dtype.kind in 'fb':
+        return arr
+    elif arr.dtype.kind == 'O':
+        # Numbers with some nulls mixed in?
+        if all([v is None or (isinstance(v, (int, float)) and
+                              not isinstance(v, bool)) for v in vals]):
+            return np.array(vals, dtype=np.float64)
+
+    return np.array(vals, dtype=object)
+
+
+def seriesArrays(series, expected=None):
+    """
+    One series out of an epoch=ns query response as a dict of arrays,
+    with an all NaN one for each of the expected labels that's missing
+    """
+    columns = series['columns']
+    rows = series.get('values', [])
+    if rows == []:
+        cols = [[] for _ in columns]
+    else:
+        cols = [list(c) for c in zip(*rows)]
+
+    arrs = {'time': np.array(cols[0], dtype=np.int64)}
+    for label, col in zip(columns[1:], cols[1:]):
+        arrs[label] = columnArray(col)
+
+    if expected is not None:
+        for label in expected:
+            if label not in arrs:
+                print("Missing column %s in result set!" % (label))
+                arrs[label] = np.full(len(arrs['time']), np.nan)
+
+    return arrs
+
+
+def isGrouped(query):
+    """
+    True if query's results come back grouped by tag value
+    """
+    return isinstance(query.tagvals, list) and query.tagnames is not None
+
+
+def _expected(query):
+    expected = query.fieldlabels
+    if expected is None:
+        expected = query.fields
+    if isinstance(expected, str):
+        expected = [expected]
+
+    return expected
+
+
+def getResultsArrays(query, debug=False, timeout=None, since=None,
+                     until=None):
+    """
+    Like database.getResultsDataFrame, but the answer is a dict of NumPy
+    arrays (or {tagvalue: dict of arrays} if grouped by a tag).  No
+    results at all gives empty arrays (or an empty dict if grouped).
+
+    since and until are handed to queryConstructor to pick out a
+    specific time range instead of the last rangehours.
+
+    Raises requests' HTTPError if the server says no, or ValueError if
+    the query itself failed.
+    """
+    querystr = queryConstructor(query, debug=debug, since=since, until=until)
+
+    db = query.database
+    params = {'q': querystr, 'db': query.tablename, 'epoch': 'ns'}
+    if db.user is not None:
+        params.update({'u': db.user, 'p': db.password})
+
+    url = "http://%s:%s/query" % (db.host, db.port)
+    response = _session(db).get(url, params=params, timeout=timeout)
+    if response.status_code != 200:
+        print("Query failed! %d %s" % (response.status_code, response.text))
+        response.raise_for_status()
+
+    return parseResults(response.content, query)
+
+
+def parseResults(content, query):
+    """
+    Turn the (single statement, epoch=ns) /query JSON response content
+    into getResultsArrays' answer for the given databaseQuery
+    """
+    expected = _expected(query)
+    payload = json.loads(content)
+    if 'error' in payload:
+        raise ValueError(payload['error'])
+
+    grouped = isGrouped(query)
+
+    results = {}
+    for result in payload.get('results', []):
+        if 'error' in result:
+            raise ValueError(result['error'])
+        for series in result.get('series', []):
+            arrs = seriesArrays(series, expected=expected)
+            if series.get('tags', None):
+                tags = sorted(series['tags'].items())
+                results[tags[0][1]] = arrs
+            else:
+                results = arrs
+
+    if results == {} and grouped is False:
+        print("Query returned no results!")
+        results = {'time': np.array([], dtype=np.int64)}
+        for label in expected:
+            results[label] = np.array([], dtype=np.float64)
+
+    return results
@@ -10,8 +10,12 @@
 
 from __future__ import division, print_function, absolute_import
 
+import re
 import sys
+import time
+import math
 import datetime as dt
+from functools import lru_cache
 
 
 def makeInfluxPacket(meas='', ts=dt.datetime.utcnow(), tags=None,
@@ -64,3 +68,271 @@ def makeInfluxPacket(meas='', ts=dt.datetime.utcnow(), tags=None,
         print(packet)
 
     return [packet]
+
+
+def asPoints(vals):
+    """
+    vals as a list of points.  Bare line protocol (bytes or str, possibly
+    several lines) becomes a list of just that one entry.
+    """
+    if isinstance(vals, (bytes, str)):
+        return [vals]
+
+    return vals
+
+
+def stampMissing(points):
+    """
+    Split a list of packets into those that already have a timestamp and
+    those that don't, giving the latter the current time in nanoseconds.
+
+    Points without a timestamp normally get stamped by InfluxDB when they
+    arrive, but if they're held onto (buffered or spooled) that's not the
+    time they were made, and several of the same series in one request
+    would overwrite each other.  Stamped points are copies, so the caller's
+    packets aren't changed; they need to be written with precision 'n'.
+
+    Returns (given, stamped)
+    """
+    given = []
+    stamped = []
+    nowns = None
+    for pt in points:
+        if isinstance(pt, dict) and pt.get('time', None) is None:
+            if nowns is None:
+                nowns = time.time_ns()
+            stamped.append(dict(pt, time=nowns))
+        else:
+            given.append(pt)
+
+    return given, stamped
+
+
+# Escapes for the various bits of an InfluxDB line protocol line.  Keys,
+#   tag values, and measurement names all get the same treatment (just
+#   like influxdb-python does it); string field values get their own.
+_keyEscapes = str.maketrans({'\\': '\\\\', ' ': '\\ ', ',': '\\,',
+                             '=': '\\=', '\n': '\\n'})
+_strEscapes = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n'})
+
+# Nanoseconds in one unit of each precision, for exact integer rescaling
+_nsPerUnit = {'n': 1, 'ns': 1, 'u': 10**3, 'us': 10**3, 'ms': 10**6,
+              's': 10**9, 'm': 60*10**9, 'h': 3600*10**9}
+
+_epoch = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_oneMicro = dt.timedelta(microseconds=1)
+
+# RFC3339-ish timestamp, with the fractional seconds (if any) split off
+#   since fromisoformat can't do more than 6 digits of them
+_isoStamp = re.compile(r"^(.+?[T ]\d\d:\d\d:\d\d)(?:\.(\d+))?"
+                       r"(Z|[+-]\d\d:?\d\d)?$")
+
+
+def nsPerUnit(timeprec):
+    """
+    Nanoseconds in one unit of an InfluxDB time precision ('n'/'ns',
+    'u'/'us', 'ms', 's', 'm', or 'h').  Raises ValueError for anything
+    else.
+    """
+    try:
+        return _nsPerUnit[timeprec]
+    except KeyError:
+        raise ValueError("Unknown time precision %s!" % (timeprec))
+
+
+def rescaleTimestamp(ts, fromprec, toprec):
+    """
+    Convert an integer timestamp from one precision to another (going
+    coarser truncates).  Anything that isn't an integer is returned as-is
+    since lineTimestamp will convert it properly anyways.
+    """
+    if hasattr(ts, 'item') and not isinstance(ts, (int, float)):
+        ts = ts.item()
+    if fromprec == toprec or not isinstance(ts, int) or \
+       isinstance(ts, bool):
+        return ts
+
+    return ts * _nsPerUnit[fromprec] // _nsPerUnit[toprec]
+
+
+@lru_cache(maxsize=4096)
+def escapeKey(key):
+    """
+    Escape a measurement name, tag key/value, or field key.  The same
+    handful of names show up over and over, so they're cached.
+    """
+    return str(key).translate(_keyEscapes)
+
+
+def _floatValue(val):
+    # NaN and +/-inf can't be represented, so those fields are dropped
+    if math.isfinite(val):
+        return repr(val)
+    return None
+
+
+def _intValue(val):
+    return "%di" % (val)
+
+
+def _boolValue(val):
+    return "true" if val else "false"
+
+
+def _strValue(val):
+    return '"%s"' % (val.translate(_strEscapes))
+
+
+# Exact type lookups are much cheaper than a chain of isinstance() calls
+#   for the overwhelmingly common cases
+_fieldEncoders = {float: _floatValue, int: _intValue,
+                  bool: _boolValue, str: _strValue}
+
+
+def fieldValue(val):
+    """
+    Format a single field value for line protocol, with the right type
+    suffix/quoting.  Returns None for values that can't be stored (None,
+    NaN, inf) so the caller can skip that field.
+    """
+    enc = _fieldEncoders.get(type(val), None)
+    if enc is not None:
+        return enc(val)
+
+    if val is None:
+        return None
+    elif isinstance(val, bool):
+        return _boolValue(val)
+    elif isinstance(val, int):
+        return _intValue(int(val))
+    elif isinstance(val, float):
+        # np.float64 lands here, and its repr() isn't just the number
+        return _floatValue(float(val))
+    elif hasattr(val, 'item'):
+        # numpy scalars; influxdb-python always wrote numeric ones out as
+        #   floats, so keep doing that or the field type would change
+        pyval = val.item()
+        if isinstance(pyval, (bool, int, float)):
+            return _floatValue(float(pyval))
+        return fieldValue(pyval)
+    else:
+        return _strValue(str(val))
+
+
+def datetimeNs(ts):
+    """
+    Integer nanoseconds since the epoch for a datetime (assumed UTC if
+    naive), done in integers so nothing is lost to float rounding.  Keeps
+    the nanoseconds of a pandas Timestamp, too.
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=dt.timezone.utc)
+
+    return (ts - _epoch) // _oneMicro * 1000 + getattr(ts, 'nanosecond', 0)
+
+
+@lru_cache(maxsize=1024)
+def stringNs(ts):
+    """
+    Integer nanoseconds since the epoch for an RFC3339 timestamp string
+    (assumed UTC if there's no offset).  Packets from one source tend to
+    repeat the same few, so they're cached.  Raises ValueError if it
+    can't be parsed.
+    """
+    match = _isoStamp.match(ts.strip())
+    if match is None:
+        # Just a date, probably
+        return datetimeNs(dt.datetime.fromisoformat(ts.strip()))
+
+    base, digits, offset = match.groups()
+    if offset == 'Z' or offset is None:
+        offset = '+00:00'
+    frac = int((digits or '0').ljust(9, '0')[:9])
+
+    return datetimeNs(dt.datetime.fromisoformat(base + offset)) + frac
+
+
+def lineTimestamp(ts, timeprec='s'):
+    """
+    Turn a timestamp into the integer that goes at the end of a line.
+    Integers are assumed to already be in the given precision; datetimes
+    (assumed UTC if naive) and RFC3339 strings are converted.
+    """
+    if isinstance(ts, int):
+        return ts
+    elif isinstance(ts, dt.datetime):
+        return datetimeNs(ts) // _nsPerUnit[timeprec]
+    elif isinstance(ts, str):
+        return stringNs(ts) // _nsPerUnit[timeprec]
+    elif hasattr(ts, 'item'):
+        return lineTimestamp(ts.item(), timeprec=timeprec)
+    else:
+        raise ValueError("Can't make a line protocol timestamp from %s" %
+                         (type(ts)))
+
+
+def makeLine(meas, tags=None, fields=None, ts=None, timeprec='s'):
+    """
+    Make a single InfluxDB line protocol line (as bytes, with no trailing
+    newline) directly from the measurement name, tags, fields, and an
+    integer timestamp in the given precision.  If ts is None, InfluxDB
+    stamps the point on arrival.
+
+    Skips it all and returns b'' if there are no storable fields, since
+    that's not a valid line.
+    """
+    fstrs = []
+    if fields is not None:
+        # Inlined version of fieldValue() since this is the hot loop
+        encoder = _fieldEncoders.get
+        for key, val in fields.items():
+            enc = encoder(type(val), fieldValue)
+            fval = enc(val)
+            if fval is not None:
+                fstrs.append(escapeKey(key) + "=" + fval)
+    if fstrs == []:
+        return b''
+
+    line = escapeKey(meas)
+    if tags:
+        # Sorted tags are what the server wants anyways, and it saves
+        #   it some work on its end
+        for key in sorted(tags):
+            tval = tags[key]
+            # Empty tag values aren't allowed
+            if tval is not None and tval != '':
+                line += ",%s=%s" % (escapeKey(key), escapeKey(tval))
+
+    line += " " + ",".join(fstrs)
+
+    if ts is not None:
+        line += " %d" % (lineTimestamp(ts, timeprec=timeprec))
+
+    return line.encode("utf-8")
+
+
+def makeLines(points, timeprec='s'):
+    """
+    Turn a list of packets into one line protocol body (bytes, newline
+    terminated) ready to post.  Entries can be dicts in the
+    makeInfluxPacket style, or bytes/str that are already line protocol.
+    """
+    lines = []
+    for pt in points:
+        if isinstance(pt, bytes):
+            line = pt.rstrip(b"\n")
+        elif isinstance(pt, str):
+            line = pt.rstrip("\n").encode("utf-8")
+        else:
+            line = makeLine(pt['measurement'],
+                            tags=pt.get('tags', None),
+                            fields=pt.get('fields', None),
+                            ts=pt.get('time', None),
+                            timeprec=timeprec)
+        if line != b'':
+            lines.append(line)
+
+    if lines == []:
+        return b''
+
+    return b"\n".join(lines) + b"\n"
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Build InfluxQL SELECT statements from classes.databaseQuery objects.
+
+Split out of database so that things that only need the query text
+(like numpyquery) don't have to import pandas and influxdb-python to
+get it.  database still has queryConstructor and batchQueryConstructor
+for everyone that's used to them being there.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+
+from . import packetizer
+
+
+def _epochNs(when):
+    """
+    Integer ns since the epoch for an int (taken as already being ns), a
+    numpy.datetime64, or anything packetizer.lineTimestamp understands: a
+    datetime (naive is taken as UTC) or an RFC3339/ISO format string
+    (with or without an offset)
+    """
+    if isinstance(when, (int, np.integer)):
+        return int(when)
+    if isinstance(when, np.datetime64):
+        return int(when.astype('datetime64[ns]').astype(np.int64))
+
+    return packetizer.lineTimestamp(when, timeprec='n')
+
+
+def queryConstructor(dbq, debug=False, since=None, until=None):
+    """
+    dbq is type databaseQuery, which includes databaseConfig as
+    dbq.db.  More info in 'confHerder'.
+
+    dtime is time from present (in hours) to query back
+
+    If since is given (integer ns since the epoch, a datetime, or an ISO
+    format string), only things after that time are asked for instead of
+    the last dtime hours.  until (same kinds of things) likewise adds an
+    upper limit; only things before it are asked for.
+
+    Allows grouping of the results by a SINGLE tag with multiple values.
+    No checking if you want all values for a given tag, so be explicit for now.
+
+    If dbq.aggregate is set, each field is wrapped in that function (or the
+    matching one, if it's a list), and dbq.groupbytime/dbq.fill add a
+    GROUP BY time() interval and fill() so the server does the
+    downsampling.  Tag grouping still works on top of that.  Raises
+    ValueError for things the server would refuse anyways: some fields
+    aggregated and others not, or groupbytime with no aggregates at all.
+    """
+    try:
+        dtime = int(dbq.rangehours)
+    except (ValueError, TypeError):
+        print("Can't convert %s to int!" % (dbq.rangehours))
+        dtime = 1
+
+    if dbq.database.type.lower() == 'influxdb':
+        if debug is True:
+            print("Searching for %s in %s.%s on %s:%s" % (dbq.fields,
+                                                          dbq.tablename,
+                                                          dbq.metricname,
+                                                          dbq.database.host,
+                                                          dbq.database.port))
+
+        # Some renames since this was adapted from an earlier version
+        tagnames = dbq.tagnames
+        if tagnames is not None:
+            tagvals = dbq.tagvals
+        else:
+            tagvals = []
+
+        # TODO: Someone should write a query validator to make sure
+        #   this can't run amok.  For now, make sure the user has
+        #   only READ ONLY privileges to the database in question!!!
+        # getattr since older pickled/hand built databaseQuery objects
+        #   might not have the downsampling options at all
+        aggregate = getattr(dbq, 'aggregate', None)
+        groupbytime = getattr(dbq, 'groupbytime', None)
+        fill = getattr(dbq, 'fill', None)
+
+        if isinstance(dbq.fields, list):
+            nfields = len(dbq.fields)
+        else:
+            nfields = 1
+        _checkAggregates(nfields, aggregate, groupbytime)
+
+        query = 'SELECT'
+        if isinstance(dbq.fields, list):
+            for i, each in enumerate(dbq.fields):
+                fexpr = _aggregateField(each.strip(), aggregate, i)
+                # Catch possible fn/dn mismatch
+                try:
+                    query += ' %s AS "%s"' % (fexpr, dbq.fieldlabels[i])
+                except IndexError:
+                    query += ' %s' % (fexpr)
+                if i != len(dbq.fields)-1:
+                    query += ','
+                else:
+                    query += ' '
+        else:
+            fexpr = _aggregateField(dbq.fields, aggregate, 0)
+            if dbq.fieldlabels is not None:
+                query += ' %s AS "%s" ' % (fexpr, dbq.fieldlabels)
+            else:
+                query += ' %s ' % (fexpr)
+
+        query += 'FROM "%s"' % (dbq.metricname)
+        if since is not None:
+            since = _epochNs(since)
+            query += ' WHERE time > %d' % (since)
+        else:
+            query += ' WHERE time > now() - %02dh' % (dtime)
+        if until is not None:
+            query += ' AND time < %d' % (_epochNs(until))
+
+        groupby = []
+        if groupbytime is not None:
+            groupby.append('time(%s)' % (str(groupbytime).strip()))
+
+        if tagvals != []:
+            query += ' AND ('
+            if isinstance(dbq.tagvals, list):
+                for i, each in enumerate(tagvals):
+                    query += '"%s"=\'%s\'' % (tagnames, each.strip())
+
+                    if i != len(tagvals)-1:
+                        query += ' OR '
+                query += ')'
+                groupby.append('"%s"' % (tagnames))
+            else:
+                # If we're here, there was only 1 tag value so we don't need
+                #   to GROUP BY anything
+                query += '"%s"=\'%s\')' % (tagnames, tagvals)
+
+        if groupby != []:
+            query += ' GROUP BY %s' % (', '.join(groupby))
+            if fill is not None and groupbytime is not None:
+                query += ' fill(%s)' % (str(fill).strip())
+
+        return query
+
+
+def _fieldAggregate(aggregate, i):
+    """
+    Aggregate function for field number i, or None if it doesn't get one
+    """
+    if isinstance(aggregate, list):
+        # Catch possible fn/agg mismatch the same way as for labels
+        try:
+            aggregate = aggregate[i]
+        except IndexError:
+            aggregate = None
+    if aggregate is None or str(aggregate).strip() == '':
+        return None
+
+    return str(aggregate).strip()
+
+
+def _checkAggregates(nfields, aggregate, groupbytime):
+    """
+    Raise ValueError if the aggregates for nfields fields (and the
+    groupbytime) don't make for a valid InfluxQL query
+    """
+    funcs = [_fieldAggregate(aggregate, i) for i in range(nfields)]
+    nraw = funcs.count(None)
+    if 0 < nraw < nfields:
+        raise ValueError("Can't mix aggregated and raw fields! %s" %
+                         (aggregate))
+    if groupbytime is not None and nraw == nfields:
+        raise ValueError("GROUP BY time(%s) needs an aggregate!" %
+                         (groupbytime))
+
+
+def _aggregateField(field, aggregate, i):
+    """
+    The SELECT expression for field number i, wrapped in its aggregate
+    function if there is one
+    """
+    func = _fieldAggregate(aggregate, i)
+    if func is None:
+        return '"%s"' % (field)
+
+    return '%s("%s")' % (func, field)
+
+
+def batchQueryConstructor(queries, debug=False):
+    """
+    One semicolon separated string of the queryConstructor statements for
+    a list of databaseQuery objects, in the same order, to go to the
+    server all at once
+    """
+    return ';'.join([queryConstructor(dbq, debug=debug) for dbq in queries])
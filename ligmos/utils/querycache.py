@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Cache of database.getResultsDataFrame results, refreshed incrementally.
+
+Dashboards and monitors tend to ask for the same last-N-hours window
+over and over.  A queryCache keeps each answer (keyed on everything in
+the classes.databaseQuery that changes the query) for ttl seconds.
+After that, only what's newer than the last timestamp already in hand
+is fetched; it's tacked on to the end and anything that's fallen out of
+the rangehours window is trimmed off the front.
+
+The cache is bounded by the (deep) memory use of the cached frames and
+optionally by the number of queries, evicting the least recently used.
+
+    qc = querycache.queryCache(ttl=30.)
+    df = database.getResultsDataFrame(dbq, cache=qc)
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from . import database
+
+
+def _frozen(val):
+    """
+    Hashable version of a databaseQuery attribute
+    """
+    if isinstance(val, (list, tuple)):
+        return tuple(_frozen(v) for v in val)
+
+    return val
+
+
+def cacheKey(query):
+    """
+    Everything about a databaseQuery that changes what comes back
+    """
+    db = query.database
+
+    return (db.host, db.port, query.tablename, query.metricname,
+            _frozen(query.fields), _frozen(query.fieldlabels),
+            _frozen(query.tagnames), _frozen(query.tagvals),
+            query.rangehours, _frozen(getattr(query, 'aggregate', None)),
+            getattr(query, 'groupbytime', None),
+            getattr(query, 'fill', None))
+
+
+def _frames(results):
+    """
+    The frame(s) in a cleanResults answer, as a dict
+    """
+    if isinstance(results, dict):
+        return results
+
+    return {None: results}
+
+
+def _unframes(frames, grouped):
+    if grouped is True:
+        return frames
+
+    return frames[None]
+
+
+def _copy(results):
+    if isinstance(results, dict):
+        return {k: v.copy() for k, v in results.items()}
+
+    return results.copy()
+
+
+def _nbytes(results):
+    return sum([int(df.memory_usage(index=True, deep=True).sum())
+                for df in _frames(results).values()])
+
+
+def _lastSeen(results):
+    """
+    Latest timestamp (integer ns) across the frame(s), or None
+    """
+    last = None
+    for df in _frames(results).values():
+        if len(df.index) == 0:
+            continue
+        ts = pd.Timestamp(df.index.max())
+        if ts is pd.NaT:
+            continue
+        if ts.tzinfo is None:
+            ts = ts.tz_localize('UTC')
+        if last is None or ts.value > last:
+            last = ts.value
+
+    return last
+
+
+def _windowStart(query):
+    """
+    Start (integer ns) of the query's rangehours window, as of right now.
+    Matches what queryConstructor does with a bad rangehours.
+    """
+    try:
+        hours = int(query.rangehours)
+    except (ValueError, TypeError):
+        hours = 1
+
+    return time.time_ns() - int(hours*3600e9)
+
+
+def _trim(df, cutoff):
+    """
+    Only the rows of df newer than cutoff (integer ns)
+    """
+    if len(df.index) == 0:
+        return df
+    idx = df.index
+    if getattr(idx, 'tz', None) is None:
+        cut = pd.Timestamp(cutoff)
+    else:
+        cut = pd.Timestamp(cutoff, tz='UTC')
+
+    return df[idx > cut]
+
+
+def _merge(old, new, cutoff):
+    """
+    Tack new on to the end of old (either can be a frame or a dict of
+    grouped frames), with new winning for any repeated timestamps, then
+    trim everything older than cutoff
+    """
+    grouped = isinstance(old, dict)
+    oldf = _frames(old)
+    newf = _frames(new)
+
+    merged = {}
+    for key in set(oldf.keys()) | set(newf.keys()):
+        ofr = oldf.get(key, None)
+        nfr = newf.get(key, None)
+        if ofr is None:
+            frame = nfr
+        elif nfr is None:
+            frame = ofr
+        else:
+            frame = pd.concat([ofr, nfr])
+            frame = frame[~frame.index.duplicated(keep='last')]
+            frame = frame.sort_index()
+        merged[key] = _trim(frame, cutoff)
+
+    return _unframes(merged, grouped)
+
+
+class queryCache():
+    """
+    ttl: seconds a cached answer is handed back as-is before the next
+         request for it goes and gets whatever is new
+
+    maxbytes: cap on the total memory used by the cached frames
+
+    maxentries: cap on the number of cached queries (None for no cap)
+
+    overlap: seconds before the last seen timestamp to start each
+             refresh from, to pick up points that showed up late
+    """
+    def __init__(self, ttl=60., maxbytes=256*1024*1024, maxentries=None,
+                 overlap=0.):
+        self.ttl = float(ttl)
+        self.maxbytes = int(maxbytes)
+        if maxentries is not None:
+            maxentries = int(maxentries)
+        self.maxentries = maxentries
+        self.overlap = int(float(overlap)*1e9)
+
+        # key: {'results', 'fetched', 'lastseen', 'nbytes'}
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def get(self, query, debug=False, client=None):
+        """
+        Same answer as database.getResultsDataFrame(query), but from the
+        cache where possible.  Always a copy, so go ahead and modify it.
+
+        client is an optional DataFrameClient to use for any fetching.
+        """
+        key = cacheKey(query)
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if time.monotonic() - entry['fetched'] < self.ttl:
+                    self.hits += 1
+                    return _copy(entry['results'])
+
+        cutoff = _windowStart(query)
+        if entry is None or entry['lastseen'] is None:
+            since = None
+        else:
+            since = max(entry['lastseen'] - self.overlap, cutoff)
+            if getattr(query, 'groupbytime', None) is not None:
+                # The last interval was probably still filling up, so
+                #   include it again (time > since is exclusive)
+                since = min(since, entry['lastseen'] - 1)
+
+        querystr = database.queryConstructor(query, debug=debug, since=since)
+        raw = database._runQuery(query, querystr, client=client)
+        fetched = time.monotonic()
+
+        if since is None:
+            # Nothing (useful) cached; this is just a normal query
+            results = database.cleanResults(raw, query)
+            if raw == {}:
+                # Don't keep the placeholder frame around as if it were data
+                with self.lock:
+                    self.misses += 1
+                    self._drop(key)
+                return results
+        else:
+            if raw == {}:
+                results = _merge(entry['results'], {}, cutoff)
+            else:
+                new = database.cleanResults(raw, query)
+                results = _merge(entry['results'], new, cutoff)
+
+        lastseen = _lastSeen(results)
+        if lastseen is None and entry is not None:
+            lastseen = entry['lastseen']
+        nbytes = _nbytes(results)
+
+        with self.lock:
+            if since is None:
+                self.misses += 1
+            else:
+                self.refreshes += 1
+            self._drop(key)
+            self.entries[key] = {'results': results,
+                                 'fetched': fetched,
+                                 'lastseen': lastseen,
+                                 'nbytes': nbytes}
+            self.nbytes += nbytes
+            self._evict()
+
+        return _copy(results)
+
+    def _drop(self, key):
+        """
+        Forget key; call with the lock held
+        """
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old['nbytes']
+
+    def _evict(self):
+        """
+        Throw out least recently used entries until under the limits;
+        call with the lock held.  The newest entry always stays.
+        """
+        while len(self.entries) > 1:
+            if self.nbytes <= self.maxbytes and \
+               (self.maxentries is None or
+                    len(self.entries) <= self.maxentries):
+                break
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= old['nbytes']
+            self.evictions += 1
+
+    def invalidate(self, query=None):
+        """
+        Forget the given databaseQuery's cached answer, or everything
+        """
+        with self.lock:
+            if query is None:
+                self.entries = OrderedDict()
+                self.nbytes = 0
+            else:
+                self._drop(cacheKey(query))
+
+    def stats(self):
+        """
+        Counters as a dict
+        """
+        with self.lock:
+            return {'entries': len(self.entries),
+                    'bytes': self.nbytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'refreshes': self.refreshes,
+                    'evictions': self.evictions}
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Spread batched writes over several connections at once.
+
+A shardPool sits behind a batching.pointBuffer and splits each batch it
+gets by measurement (or by series hash) across a fixed number of lanes,
+each with its own writer, queue, and thread.  A given measurement (or
+series) always lands in the same lane and each lane writes in order,
+so ordering is kept where it matters; different lanes go in parallel.
+
+A byteBudget caps the total size of the request bodies that are in
+flight across all of the lanes at once.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import zlib
+import queue
+import atexit
+import threading
+
+
+class byteBudget():
+    """
+    Counting semaphore in bytes.  A single request bigger than the whole
+    budget is still let through, but only once nothing else is in flight.
+    """
+    def __init__(self, maxbytes):
+        self.maxbytes = int(maxbytes)
+        self.inflight = 0
+        self.peak = 0
+        self.waits = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, nbytes):
+        with self.cond:
+            waited = False
+            while self.inflight > 0 and self.inflight + nbytes > self.maxbytes:
+                waited = True
+                self.cond.wait()
+            if waited is True:
+                self.waits += 1
+            self.inflight += nbytes
+            self.peak = max(self.peak, self.inflight)
+
+    def release(self, nbytes):
+        with self.cond:
+            self.inflight -= nbytes
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {'inflight': self.inflight,
+                    'peak': self.peak,
+                    'waits': self.waits}
+
+
+def shardKey(pt, shardby='measurement'):
+    """
+    Stable (across runs, unlike hash()) shard key for a point.
+    'measurement' keeps a whole measurement in one lane; 'hash' uses the
+    series (measurement plus tags) so one busy measurement can be spread
+    out while each series stays in order.  Line protocol uses everything
+    before the fields, which is the series.
+    """
+    if isinstance(pt, dict):
+        key = str(pt.get('measurement', ''))
+        if shardby == 'hash':
+            tags = pt.get('tags', None) or {}
+            key += ''.join([",%s=%s" % (k, tags[k]) for k in sorted(tags)])
+        key = key.encode("utf-8")
+    else:
+        if isinstance(pt, str):
+            pt = pt.encode("utf-8")
+        if shardby == 'hash':
+            key = pt.split(b" ", 1)[0]
+        else:
+            key = pt.split(b",", 1)[0].split(b" ", 1)[0]
+
+    return zlib.crc32(key)
+
+
+class shardPool():
+    """
+    writers: list of objects with a writeToDB(points, table, timeprec),
+             one per lane; each one is only ever used by its own thread
+
+    shardby: 'measurement' or 'hash'; see shardKey
+
+    maxqueue: most batches waiting per lane before dispatch() blocks
+
+    maxbatch: when a lane gets to its queue and finds several batches
+              waiting (for the same table and precision), they're sent
+              together as long as that's no more than maxbatch points
+    """
+    def __init__(self, writers, shardby='measurement', maxqueue=64,
+                 maxbatch=5000):
+        if shardby not in ['measurement', 'hash']:
+            print("Unknown shardby %s; using measurement" % (shardby))
+            shardby = 'measurement'
+        self.shardby = shardby
+        self.writers = writers
+        self.maxbatch = int(maxbatch)
+
+        self.queues = []
+        self.threads = []
+        self.written = [0]*len(writers)
+        self.failed = [0]*len(writers)
+        for i, writer in enumerate(writers):
+            lq = queue.Queue(maxsize=maxqueue)
+            thread = threading.Thread(target=self._lane, args=(i,),
+                                      name='ligmos-shard-%d' % (i),
+                                      daemon=True)
+            self.queues.append(lq)
+            self.threads.append(thread)
+            thread.start()
+
+        self.stopped = False
+        atexit.register(self.stop)
+
+    def dispatch(self, points, table, timeprec):
+        """
+        Split points across the lanes (keeping their order within each
+        lane) and queue them up.  Same signature as a pointBuffer flushfunc.
+        """
+        nlanes = len(self.writers)
+        lanes = {}
+        for pt in points:
+            lane = shardKey(pt, shardby=self.shardby) % nlanes
+            lanes.setdefault(lane, []).append(pt)
+
+        for lane, pts in lanes.items():
+            self.queues[lane].put((pts, table, timeprec))
+
+    def _gather(self, lq, item):
+        """
+        Add on anything else already waiting in the lane's queue that can
+        go in the same request.  Returns (points, table, timeprec, number
+        of queue items used, list holding the next item to handle if one
+        was taken off the queue but not used)
+        """
+        pts, table, timeprec = item
+        nitems = 1
+        while True:
+            try:
+                nxt = lq.get_nowait()
+            except queue.Empty:
+                return pts, table, timeprec, nitems, []
+
+            if nxt is None or nxt[1] != table or nxt[2] != timeprec or \
+               len(pts) + len(nxt[0]) > self.maxbatch:
+                # Might be the None from stop(), so it has to be kept
+                return pts, table, timeprec, nitems, [nxt]
+
+            if nitems == 1:
+                # Don't extend the list the dispatcher handed us
+                pts = list(pts)
+            pts.extend(nxt[0])
+            nitems += 1
+
+    def _lane(self, i):
+        writer = self.writers[i]
+        lq = self.queues[i]
+        nxt = []
+        while True:
+            if nxt == []:
+                item = lq.get()
+            else:
+                item, nxt = nxt[0], []
+            if item is None:
+                lq.task_done()
+                break
+
+            pts, table, timeprec, nitems, nxt = self._gather(lq, item)
+            try:
+                try:
+                    good = writer.writeToDB(pts, table=table,
+                                            timeprec=timeprec)
+                except Exception as err:
+                    print("Shard %d write failed!" % (i))
+                    print(str(err))
+                    good = False
+                if good is True:
+                    self.written[i] += len(pts)
+                else:
+                    self.failed[i] += len(pts)
+            finally:
+                for _ in range(nitems):
+                    lq.task_done()
+
+    def join(self):
+        """
+        Wait until everything queued so far has been written (or not)
+        """
+        for lq in self.queues:
+            lq.join()
+
+    def stats(self):
+        """
+        Per-lane backlog and point counts
+        """
+        return [{'backlog': lq.qsize(),
+                 'written': self.written[i],
+                 'failed': self.failed[i]}
+                for i, lq in enumerate(self.queues)]
+
+    def stop(self):
+        """
+        Finish what's queued, then stop the lane threads
+        """
+        if self.stopped is True:
+            return
+        self.stopped = True
+        atexit.unregister(self.stop)
+        for lq in self.queues:
+            lq.put(None)
+        for thread in self.threads:
+            thread.join()
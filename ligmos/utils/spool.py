@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Disk-backed store-and-forward spool for database writes.
+
+When a write can't get through to the database, the points are appended
+(as line protocol) to a set of rotating segment files on disk and a
+background thread replays them in big batches once the database is back.
+Total disk use is bounded; if the limit is hit, the oldest segment is
+thrown away (and counted) to make room.
+
+Segment files look like:
+
+    #{"table": "mydb", "timeprec": "s"}
+    measurement,tag=a field=1.0 1600000000
+    measurement,tag=b field=2.0 1600000000
+
+where the '#' header line applies to every line below it until the next
+header, so a single segment can hold points for several tables/precisions.
+Every append starts with its own header to keep things simple.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import json
+import glob
+import atexit
+import threading
+
+from . import metrics
+from . import packetizer
+
+
+def toLines(points, timeprec='s'):
+    """
+    Turn a list of points into a list of line protocol strings, with
+    packetizer.makeLines so they're exactly what a direct write would
+    have sent.  Points that are already str/bytes are assumed to be line
+    protocol and passed through; dicts (makeInfluxPacket style) are
+    converted.
+    """
+    try:
+        body = packetizer.makeLines(points, timeprec=timeprec)
+    except ValueError as err:
+        print("Can't spool %d points!" % (len(points)))
+        print(str(err))
+        return []
+
+    return [ln for ln in body.decode("utf-8").splitlines()
+            if ln.strip() != '']
+
+
+class diskSpool():
+    """
+    Append-only, segment-rotated spool of line protocol points.
+
+    replayfunc(lines, table, timeprec) is called from the drainer thread
+    with a list of line protocol strings and must return True if they
+    were written.  Segments are only deleted once every line in them
+    was replayed, so a failure part way through can resend some lines;
+    that's fine for InfluxDB since a point with the same series and
+    timestamp just overwrites itself.
+
+    maxbytes: total on-disk limit for all segments combined
+    segmentbytes: size at which the active segment is closed and a new one
+                  started
+    replaybatch: maximum number of lines handed to replayfunc at once
+    drainsec: how long the drainer waits between attempts while the
+              database is still unreachable
+    registry/name: the bytes and segments on disk are kept in the
+                   'spool_bytes' and 'spool_segments' gauges of registry
+                   (a metrics.metricsRegistry, metrics.defaultRegistry if
+                   None), labeled with database=name
+    """
+    def __init__(self, spooldir, replayfunc,
+                 maxbytes=512*1024*1024, segmentbytes=8*1024*1024,
+                 replaybatch=5000, drainsec=10., registry=None, name=''):
+        self.spooldir = spooldir
+        self.replayfunc = replayfunc
+        self.maxbytes = int(maxbytes)
+        self.segmentbytes = int(segmentbytes)
+        self.replaybatch = int(replaybatch)
+        self.drainsec = float(drainsec)
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopper = threading.Event()
+
+        # Bookkeeping, exposed via stats()
+        self.spooledPoints = 0
+        self.replayedPoints = 0
+        self.droppedPoints = 0
+        self.replayFailures = 0
+
+        if registry is None:
+            registry = metrics.defaultRegistry
+        self.depth = registry.gauge('spool_bytes', database=str(name))
+        self.nsegments = registry.gauge('spool_segments', database=str(name))
+
+        os.makedirs(self.spooldir, exist_ok=True)
+
+        # Pick up anything left over from a previous run; those are all
+        #   closed segments as far as we're concerned
+        self.segments = sorted(glob.glob(os.path.join(self.spooldir,
+                                                      "ligmos-spool-*.lp")))
+        self.sizes = {}
+        for seg in self.segments:
+            self.sizes.update({seg: os.path.getsize(seg)})
+        if self.segments != []:
+            lastseq = os.path.basename(self.segments[-1])
+            self.seq = int(lastseq.split('-')[-1].split('.')[0]) + 1
+            print("Found %d spooled segments (%d bytes) in %s" %
+                  (len(self.segments), self.totalBytes(), self.spooldir))
+        else:
+            self.seq = 0
+
+        # The segment currently being appended to, and the one the drainer
+        #   is in the middle of replaying (which _makeRoom has to leave be)
+        self.active = None
+        self.activeFile = None
+        self.replaying = None
+        self._updateGauges()
+
+        self.thread = threading.Thread(target=self._drainer,
+                                       name='ligmos-diskSpool',
+                                       daemon=True)
+        self.thread.start()
+
+        atexit.register(self.stop)
+
+    def totalBytes(self):
+        """
+        Current size of all segments, including the active one.
+        Expects that the caller is holding self.lock
+        """
+        return sum(self.sizes.values())
+
+    def _updateGauges(self):
+        """
+        Expects that the caller is holding self.lock
+        """
+        self.depth.set(self.totalBytes())
+        self.nsegments.set(len(self.segments) +
+                           (1 if self.active is not None else 0))
+
+    def pending(self):
+        """
+        True if there's anything on disk still waiting to be replayed
+        """
+        with self.lock:
+            return self.totalBytes() > 0
+
+    def stats(self):
+        """
+        Spool depth and counters as a dict
+        """
+        with self.lock:
+            nsegs = len(self.segments) + (1 if self.active is not None else 0)
+            return {'segments': nsegs,
+                    'bytes': self.totalBytes(),
+                    'spooled': self.spooledPoints,
+                    'replayed': self.replayedPoints,
+                    'dropped': self.droppedPoints,
+                    'replayfailures': self.replayFailures}
+
+    def append(self, points, table=None, timeprec='s'):
+        """
+        Write the given points to the active segment.  Points can be dicts
+        (makeInfluxPacket style) or line protocol str/bytes.
+        """
+        if timeprec == 'ns':
+            timeprec = 'n'
+
+        # Anything without a timestamp needs one now, not at replay time
+        given, stamped = packetizer.stampMissing(packetizer.asPoints(points))
+
+        blob = ""
+        nlines = 0
+        for prec, pts in [(timeprec, given), ('n', stamped)]:
+            lines = toLines(pts, timeprec=prec)
+            if lines != []:
+                header = "#%s\n" % (json.dumps({'table': table,
+                                                'timeprec': prec}))
+                blob += header + "\n".join(lines) + "\n"
+                nlines += len(lines)
+        if nlines == 0:
+            return
+
+        with self.lock:
+            data = blob.encode("utf-8")
+            self._makeRoom(len(data))
+
+            if self.active is None:
+                self._openSegment()
+
+            self.activeFile.write(data)
+            self.activeFile.flush()
+            self.sizes[self.active] += len(data)
+            self.spooledPoints += nlines
+            self._updateGauges()
+
+            if self.sizes[self.active] >= self.segmentbytes:
+                self._closeSegment()
+
+        # Let the drainer know there's work
+        self.wakeup.set()
+
+    def _openSegment(self):
+        """
+        Expects that the caller is holding self.lock
+        """
+        self.active = os.path.join(self.spooldir,
+                                   "ligmos-spool-%012d.lp" % (self.seq))
+        self.seq += 1
+        self.activeFile = open(self.active, 'ab')
+        self.sizes.update({self.active: 0})
+
+    def _closeSegment(self):
+        """
+        Expects that the caller is holding self.lock
+        """
+        if self.active is not None:
+            self.activeFile.close()
+            self.segments.append(self.active)
+            self.active = None
+            self.activeFile = None
+
+    def _makeRoom(self, nbytes):
+        """
+        Drop the oldest closed segments (other than one that's being
+        replayed) until nbytes more will fit.
+        Expects that the caller is holding self.lock
+        """
+        while self.totalBytes() + nbytes > self.maxbytes:
+            idle = [seg for seg in self.segments if seg != self.replaying]
+            if idle == []:
+                # Only the active one is left; close it so it's eligible
+                if self.active is None or self.sizes[self.active] == 0:
+                    break
+                self._closeSegment()
+                continue
+
+            oldest = idle[0]
+            self.segments.remove(oldest)
+            ndropped = 0
+            try:
+                with open(oldest, 'r', encoding="utf-8") as f:
+                    for line in f:
+                        if not line.startswith("#") and line.strip() != '':
+                            ndropped += 1
+                os.remove(oldest)
+            except OSError as err:
+                print(str(err))
+            self.sizes.pop(oldest, None)
+            self.droppedPoints += ndropped
+            self._updateGauges()
+            print("Spool full! Dropped %d points from %s" % (ndropped,
+                                                             oldest))
+
+    def _readSegment(self, seg):
+        """
+        Returns a list of (table, timeprec, lines) runs, in file order
+        """
+        runs = []
+        table, timeprec, lines = None, 's', []
+        with open(seg, 'r', encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.startswith("#"):
+                    if lines != []:
+                        runs.append((table, timeprec, lines))
+                    hed = json.loads(line[1:])
+                    table, timeprec, lines = hed['table'], hed['timeprec'], []
+                elif line.strip() != '':
+                    lines.append(line)
+        if lines != []:
+            runs.append((table, timeprec, lines))
+
+        return runs
+
+    def _replaySegment(self, seg):
+        """
+        Send everything in one segment; returns True if it all went
+        """
+        try:
+            runs = self._readSegment(seg)
+        except (OSError, ValueError) as err:
+            print("Unreadable spool segment %s; skipping it!" % (seg))
+            print(str(err))
+            return True
+
+        for table, timeprec, lines in runs:
+            for i in range(0, len(lines), self.replaybatch):
+                chunk = lines[i:i+self.replaybatch]
+                try:
+                    good = self.replayfunc(chunk, table, timeprec)
+                except Exception as err:
+                    print(str(err))
+                    good = False
+
+                if good is not True:
+                    self.replayFailures += 1
+                    return False
+                self.replayedPoints += len(chunk)
+
+        return True
+
+    def drain(self):
+        """
+        Replay as many segments as possible, oldest first.  Stops at the
+        first failure and returns False; True if the spool is now empty.
+        """
+        while True:
+            with self.lock:
+                if self.segments == []:
+                    # Close the active one so it can be replayed, too
+                    self._closeSegment()
+                if self.segments == []:
+                    return True
+                seg = self.segments[0]
+                self.replaying = seg
+
+            try:
+                good = self._replaySegment(seg)
+                if good is False:
+                    return False
+
+                with self.lock:
+                    try:
+                        os.remove(seg)
+                    except OSError as err:
+                        print(str(err))
+                    if seg in self.segments:
+                        self.segments.remove(seg)
+                    self.sizes.pop(seg, None)
+                    self._updateGauges()
+            finally:
+                with self.lock:
+                    self.replaying = None
+
+    def _drainer(self):
+        """
+        Background loop that replays the spool whenever there's something
+        in it, waiting drainsec between attempts while things are failing
+        """
+        while self.stopper.is_set() is False:
+            self.wakeup.wait(self.drainsec)
+            self.wakeup.clear()
+            if self.stopper.is_set() is True:
+                break
+
+            if self.pending() is True:
+                empty = self.drain()
+                if empty is False:
+                    print("Spool replay failed; %d bytes still spooled" %
+                          (self.stats()['bytes']))
+                    # Don't hammer the database while it's still down
+                    self.stopper.wait(self.drainsec)
+
+    def stop(self):
+        """
+        Stop the drainer and close the active segment.  Anything left on
+        disk is picked up again the next time a spool is made in spooldir.
+        """
+        if self.stopper.is_set() is True:
+            return
+        self.stopper.set()
+        # Or the exit hook keeps this alive forever
+        atexit.unregister(self.stop)
+        self.wakeup.set()
+        self.thread.join()
+        with self.lock:
+            self._closeSegment()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Fire-and-forget line protocol writes to InfluxDB's UDP listener.
+
+For high rate streams where losing the odd point is fine but waiting on
+an HTTP round trip isn't.  Lines are packed into datagrams of at most
+mtu bytes and sent from a non-blocking socket; if the socket buffer is
+full the datagram is dropped (and counted) instead of waiting.
+
+Remember that the UDP listener writes everything into the database set
+in its own [[udp]] section of the server configuration, and expects
+timestamps in the precision set there (nanoseconds unless told
+otherwise); timeprec here needs to match it.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import socket
+import threading
+
+from . import packetizer
+
+
+class udpSender():
+    """
+    host, port: where the InfluxDB UDP listener is
+
+    mtu: largest datagram payload to send.  1400 leaves room for the
+         IP/UDP headers (and some tunnels) on a 1500 byte ethernet MTU.
+         A single line longer than this still goes, in its own datagram.
+
+    timeprec: precision the listener expects; integer timestamps are
+              rescaled to it from whatever precision they were given in
+    """
+    def __init__(self, host='localhost', port=8089, mtu=1400, timeprec='n'):
+        self.host = host
+        self.port = int(port)
+        self.mtu = int(mtu)
+        if timeprec == 'ns':
+            timeprec = 'n'
+        self.timeprec = timeprec
+
+        family, stype, proto, _, addr = socket.getaddrinfo(
+            host, self.port, type=socket.SOCK_DGRAM)[0]
+        self.addr = addr
+        self.sock = socket.socket(family, stype, proto)
+        self.sock.setblocking(False)
+
+        self.lock = threading.Lock()
+
+        # Bookkeeping
+        self.datagrams = 0
+        self.sentPoints = 0
+        self.droppedPoints = 0
+        self.oversize = 0
+        self.errors = 0
+
+    def pack(self, body):
+        """
+        Split a newline terminated line protocol body into a list of
+        (datagram, number of lines) no bigger than mtu, where possible
+        """
+        grams = []
+        cur = []
+        curlen = 0
+        for line in body.split(b"\n"):
+            if line == b'':
+                continue
+            if cur != [] and curlen + len(line) + 1 > self.mtu:
+                grams.append((b"\n".join(cur) + b"\n", len(cur)))
+                cur = []
+                curlen = 0
+            if len(line) + 1 > self.mtu:
+                self.oversize += 1
+            cur.append(line)
+            curlen += len(line) + 1
+        if cur != []:
+            grams.append((b"\n".join(cur) + b"\n", len(cur)))
+
+        return grams
+
+    def send(self, points, timeprec='s'):
+        """
+        Send a list of packets (makeInfluxPacket style dicts, or line
+        protocol bytes/str already in the listener's precision).
+
+        Returns (points sent, points dropped)
+        """
+        if timeprec == 'ns':
+            timeprec = 'n'
+        if timeprec != self.timeprec:
+            rescaled = []
+            for pt in points:
+                if isinstance(pt, dict) and pt.get('time', None) is not None:
+                    nts = packetizer.rescaleTimestamp(pt['time'], timeprec,
+                                                      self.timeprec)
+                    pt = dict(pt, time=nts)
+                rescaled.append(pt)
+            points = rescaled
+
+        body = packetizer.makeLines(points, timeprec=self.timeprec)
+
+        nsent = 0
+        ndropped = 0
+        with self.lock:
+            for gram, nlines in self.pack(body):
+                try:
+                    self.sock.sendto(gram, self.addr)
+                    self.datagrams += 1
+                    nsent += nlines
+                except (BlockingIOError, InterruptedError):
+                    # Socket buffer is full; that's the deal we made
+                    ndropped += nlines
+                except OSError as err:
+                    # Usually an ICMP port unreachable from an earlier send
+                    self.errors += 1
+                    ndropped += nlines
+                    if self.errors % 1000 == 1:
+                        print("UDP send to %s:%d failed! %s" %
+                              (self.host, self.port, str(err)))
+            self.sentPoints += nsent
+            self.droppedPoints += ndropped
+
+        return nsent, ndropped
+
+    def stats(self):
+        """
+        Counters as a dict
+        """
+        with self.lock:
+            return {'datagrams': self.datagrams,
+                    'sent': self.sentPoints,
+                    'dropped': self.droppedPoints,
+                    'oversize': self.oversize,
+                    'errors': self.errors}
+
+    def close(self):
+        self.sock.close()
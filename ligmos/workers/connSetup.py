@@ -14,7 +14,11 @@
 from __future__ import division, print_function, absolute_import
 
 from ..utils import amq
+from ..utils import deadband
+from ..utils import fanout
 from ..utils import database
+from ..utils import fieldtypes
+from ..utils import xmlschemas
 
 
 def connAMQ_simple(comm, topics, listener=None):
@@ -73,6 +77,142 @@ def connAMQ(comm, amqtopics, baseid='ligmos', amqlistener=None):
     return amqbrokers
 
 
+# The idbOptions that database.influx2obj understands
+v2Options = ['poolsize', 'batchsize', 'flushms', 'coalesce',
+             'usegzip', 'gziplevel', 'gzipminbytes']
+
+
+def idbOptions(cobj, only=None):
+    """
+    Pull the optional influxobj tuning knobs out of a database- configuration
+    section (see classes.databaseTarget), falling back to the influxobj
+    defaults for anything that wasn't given.  Plain baseTarget sections
+    just get the defaults.
+
+    If only is a list of keyword names, just those are pulled out; the
+    field type registry and deadband filter are only built if
+    'typeregistry' and 'deadband' are in it.
+
+    Returns a dict of keyword arguments for database.influxobj.
+    """
+    opts = {}
+
+    for key in ['keepalive', 'usegzip']:
+        if only is not None and key not in only:
+            continue
+        val = getattr(cobj, key, None)
+        if val is not None:
+            opts.update({key: val is True})
+
+    for key, conv in [('poolsize', int),
+                      ('batchsize', int),
+                      ('flushms', float),
+                      ('coalesce', str),
+                      ('shards', int),
+                      ('shardby', str),
+                      ('maxinflightbytes', int),
+                      ('spooldir', str),
+                      ('spoolmaxbytes', int),
+                      ('gziplevel', int),
+                      ('gzipminbytes', int),
+                      ('retries', int),
+                      ('retrydelay', float),
+                      ('breakerfails', int),
+                      ('breakerreset', float),
+                      ('metricsmeas', str),
+                      ('metricsinterval', float),
+                      ('udpport', int),
+                      ('udpmtu', int),
+                      ('udpprecision', str)]:
+        if only is not None and key not in only:
+            continue
+        val = getattr(cobj, key, None)
+        if val is not None:
+            try:
+                opts.update({key: conv(val)})
+            except ValueError:
+                print("Can't convert %s %s to %s!" % (key, val,
+                                                      conv.__name__))
+
+    if only is not None and 'typeregistry' not in only:
+        typefile, typeschemas = None, None
+    else:
+        typefile = getattr(cobj, 'typefile', None)
+        typeschemas = getattr(cobj, 'typeschemas', None)
+    if typefile is not None or typeschemas is True:
+        registry = fieldtypes.fieldTypeRegistry(typefile=typefile)
+        if typeschemas is True:
+            registry.seedFromSchemas(xmlschemas.schemaDicter())
+        opts.update({'typeregistry': registry})
+
+    if only is not None and 'deadband' not in only:
+        return opts
+
+    dbabs = getattr(cobj, 'deadbandabs', None)
+    dbrel = getattr(cobj, 'deadbandrel', None)
+    dbfile = getattr(cobj, 'deadbandfile', None)
+    if dbabs is not None or dbrel is not None or dbfile is not None:
+        try:
+            dbforce = getattr(cobj, 'deadbandforce', None)
+            if dbforce is not None:
+                dbforce = float(dbforce)
+            else:
+                dbforce = 300.
+            if dbabs is not None:
+                dbabs = float(dbabs)
+            if dbrel is not None:
+                dbrel = float(dbrel)
+            # Only the given measurements if there's no overall deadband
+            onlyrules = dbabs is None and dbrel is None
+            dfilter = deadband.deadbandFilter(absband=dbabs, relband=dbrel,
+                                              forcesec=dbforce,
+                                              rulefile=dbfile,
+                                              measurements=onlyrules)
+            opts.update({'deadband': dfilter})
+        except ValueError:
+            print("Can't convert deadband settings %s/%s/%s to float!" %
+                  (dbabs, dbrel, getattr(cobj, 'deadbandforce', None)))
+
+    return opts
+
+
+def idb2(cobj):
+    """
+    Make a database.influx2obj (InfluxDB 2.x writer) from a database-
+    configuration section whose type is 'influxdb2'.  The tablename is
+    used as the bucket, and the password (from the passwords file) as
+    the API token.  Only the batching and gzip knobs from idbOptions
+    (v2Options) apply to these.
+    """
+    if hasattr(cobj, 'tablename') is True:
+        tbl = cobj.tablename
+    else:
+        tbl = None
+
+    for key in ['typefile', 'typeschemas', 'deadbandabs', 'deadbandrel',
+                'deadbandfile']:
+        if getattr(cobj, key, None) not in [None, False]:
+            print("%s isn't used for influxdb2 databases; ignoring it" %
+                  (key))
+
+    v2opts = idbOptions(cobj, only=v2Options)
+
+    protocol = getattr(cobj, 'protocol', None)
+    usessl = protocol is not None and protocol.lower() == 'https'
+
+    idb = database.influx2obj(host=cobj.host,
+                              port=cobj.port,
+                              user=cobj.user,
+                              tablename=tbl,
+                              pw=cobj.password,
+                              org=getattr(cobj, 'org', None),
+                              usessl=usessl,
+                              connect=True,
+                              **v2opts)
+
+    return idb
+
+
 def connIDB_simple(cobj):
     """
     Set up the actual connections, which we'll then give back to the actual
@@ -96,11 +236,16 @@ def connIDB_simple(cobj):
                                     user=cobj.user,
                                     tablename=tbl,
                                     pw=cobj.password,
-                                    connect=False)
+                                    connect=False,
+                                    **idbOptions(cobj))
 
-        # Connect briefly to check/verify everything is working
+        # Connect briefly to check/verify everything is working.
+        #   In keepalive mode just leave it open for the writers.
         idb.connect()
-        idb.disconnect()
+        if idb.keepalive is False:
+            idb.disconnect()
+    elif cobj.type.lower() == 'influxdb2':
+        idb = idb2(cobj)
 
     return idb
 
@@ -133,16 +278,32 @@ def connIDB(comm):
                                      user=cobj.user,
                                      tablename=tbl,
                                      pw=cobj.password,
-                                     connect=False)
+                                     connect=False,
+                                     **idbOptions(cobj))
 
-            # Connect briefly to check/verify everything is working
+            # Connect briefly to check/verify everything is working.
+            #   In keepalive mode just leave it open for the writers.
             idb.connect()
-            idb.disconnect()
+            if idb.keepalive is False:
+                idb.disconnect()
 
             # Store this so we can check/use it later
             influxdatabases.update({commsection: idb})
+        elif cobj.type.lower() == 'influxdb2':
+            influxdatabases.update({commsection: idb2(cobj)})
         else:
             # No other types are defined yet
             pass
 
     return influxdatabases
+
+
+def connIDB_fanout(comm, maxqueue=10000):
+    """
+    Same as connIDB, but wraps all of the resulting influxobj instances in
+    a fanout.fanoutWriter so every write goes to all of them concurrently.
+    The writer can be passed around anywhere an influxobj would be.
+    """
+    influxdatabases = connIDB(comm)
+
+    return fanout.fanoutWriter(influxdatabases, maxqueue=maxqueue)
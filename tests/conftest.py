@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Fixtures shared by all the tests
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import pytest
+
+from ligmos.utils import classes, fakeinflux
+
+
+@pytest.fixture
+def srv():
+    """
+    A running fakeinflux server, stopped again afterwards
+    """
+    fake = fakeinflux.fakeInfluxServer()
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+def _makeQuery(server=None, **attrs):
+    db = classes.databaseTarget()
+    db.type = 'influxdb'
+    db.host = '127.0.0.1'
+    db.port = None if server is None else server.port
+    db.user = None
+    db.password = None
+
+    q = classes.databaseQuery()
+    q.database = db
+    q.tablename = 't'
+    q.metricname = 'm'
+    for key, val in attrs.items():
+        setattr(q, key, val)
+
+    return q
+
+
+@pytest.fixture
+def makeQuery():
+    """
+    Builds a databaseQuery for database 't', measurement 'm' on the given
+    fakeinflux server (or none at all), with any other attributes given
+    """
+    return _makeQuery
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""batching.pointBuffer, and influxobj writes that go through one
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import gc
+import time
+import weakref
+
+from ligmos.utils import batching, database
+
+
+def _pts(n, start=0):
+    return [{'measurement': 'm', 'fields': {'v': float(i)}, 'time': i}
+            for i in range(start, start+n)]
+
+
+def test_sizeAndAgeTriggers():
+    sent = []
+    buf = batching.pointBuffer(lambda p, t, pr: sent.append((len(p), t, pr)),
+                               batchsize=10, flushms=100.)
+    buf.add(_pts(25), table='a', timeprec='s')
+    buf.add(_pts(3), table='b', timeprec='ms')
+    time.sleep(0.5)
+    buf.stop()
+
+    assert sum([n for n, t, _ in sent if t == 'a']) == 25
+    assert max([n for n, _, _ in sent]) <= 10
+    assert (3, 'b', 'ms') in sent
+
+
+def test_stoppedBufferIsCollected():
+    buf = batching.pointBuffer(lambda p, t, pr: None)
+    ref = weakref.ref(buf)
+    buf.stop()
+    del buf
+    gc.collect()
+    assert ref() is None
+
+
+def test_bufferedWrites(srv):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             batchsize=50, flushms=10000.)
+    for i in range(10):
+        idb.write(_pts(10, start=10*i))
+    idb.flush()
+    assert len(srv.points('t', 'm')) == 100
+    # 100 points in batches of 50
+    assert srv.nwrites == 2
+    idb.shutdown()
+
+
+def test_coalescing():
+    for rule, expected in [('last', 3.), ('first', 1.)]:
+        sent = []
+        buf = batching.pointBuffer(lambda p, t, pr: sent.extend(p),
+                                   batchsize=100, flushms=10000.,
+                                   coalesce=rule)
+        buf.add([{'measurement': 'm', 'fields': {'a': 1.}, 'time': 5}])
+        buf.add([{'measurement': 'm', 'fields': {'b': 2.}, 'time': 5},
+                 {'measurement': 'm', 'tags': {'s': 'x'},
+                  'fields': {'a': 9.}, 'time': 5}])
+        buf.add([{'measurement': 'm', 'fields': {'a': 3.}, 'time': 5},
+                 b'm a=4 5'])
+        buf.stop()
+
+        assert sent == [{'measurement': 'm', 'time': 5,
+                         'fields': {'a': expected, 'b': 2.}},
+                        {'measurement': 'm', 'tags': {'s': 'x'},
+                         'fields': {'a': 9.}, 'time': 5},
+                        b'm a=4 5']
+        assert buf.stats()['coalesced'] == 2
+
+
+def test_coalescedWrites(srv):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             batchsize=50, flushms=10000., coalesce='last')
+    for field in ['a', 'b', 'c']:
+        idb.write([{'measurement': 'm', 'fields': {field: 1.}, 'time': i}
+                   for i in range(10)])
+    idb.flush()
+
+    pts = srv.points('t', 'm')
+    assert len(pts) == 10
+    assert all([fields == {'a': 1., 'b': 1., 'c': 1.}
+                for _, _, fields in pts])
+    idb.shutdown()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""bulkwrite.encodeFrame against packetizer.makeLines
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ligmos.utils import bulkwrite, packetizer
+
+
+@pytest.mark.parametrize("index", [
+    pd.DatetimeIndex(np.array(['2020-01-01T00:00:00.123',
+                               '2020-01-01T00:00:01.456'],
+                              dtype='datetime64[ms]')),
+    pd.DatetimeIndex(['2020-01-01T00:00:00.123Z',
+                      '2020-01-01T00:00:01.456Z']).tz_convert('US/Arizona'),
+])
+@pytest.mark.parametrize("prec", ['n', 'ns', 'us', 'ms', 's'])
+def test_timestampsMatchMakeLines(index, prec):
+    df = pd.DataFrame({'v': [1.5, 2.5]}, index=index)
+    pts = [{'measurement': 'm', 'fields': {'v': v}, 'time': ts}
+           for ts, v in zip(index, df['v'])]
+
+    assert bulkwrite.encodeFrame(df, 'm', timeprec=prec) == \
+        packetizer.makeLines(pts, timeprec=prec)
+
+
+def test_missingTimesSkipped():
+    df = pd.DataFrame({'v': [1., 2.]},
+                      index=pd.DatetimeIndex(['2020-01-01', None]))
+    assert bulkwrite.encodeFrame(df, 'm', timeprec='s') == \
+        b'm v=1.0 1577836800\n'
+
+
+def test_badPrecision():
+    df = pd.DataFrame({'v': [1.]}, index=pd.DatetimeIndex(['2020-01-01']))
+    with pytest.raises(ValueError):
+        bulkwrite.encodeFrame(df, 'm', timeprec='fortnight')
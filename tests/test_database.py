@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Tests for database writes and queries, against fakeinflux
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ligmos.utils import database, fieldtypes
+
+
+@pytest.mark.parametrize("keepalive", [False, True])
+def test_typeConflictRetry(srv, keepalive):
+    """
+    A write rejected for a field type conflict is retried with the
+    corrected type, whether or not the connection is kept alive
+    """
+    seed = database.influxobj(tablename='t', host='127.0.0.1',
+                              port=srv.port)
+    seed.singleCommit([{'measurement': 'm', 'fields': {'v': 1.5},
+                        'time': 1}], table='t', timeprec='s')
+    seed.shutdown()
+
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             keepalive=keepalive,
+                             typeregistry=fieldtypes.fieldTypeRegistry())
+    idb.singleCommit([{'measurement': 'm', 'fields': {'v': 2},
+                       'time': 2}], table='t', timeprec='s')
+    idb.shutdown()
+
+    points = srv.points('t', 'm')
+    assert len(points) == 2
+    assert points[-1][2] == {'v': 2.0}
+    assert idb.retryable is False
+
+
+def test_batchMatchesSingle(srv, makeQuery):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port)
+    now = int(time.time())
+    pts = [{'measurement': 'm', 'tags': {'s': s},
+            'fields': {'x': float(i), 'z': 'q%d' % (i)},
+            'time': now - 600 + i} for i in range(300) for s in 'ab']
+    idb.singleCommit(pts, table='t', timeprec='s', close=True)
+
+    queries = {}
+    for name, tagvals, aggregate in [('plain', None, None),
+                                     ('grouped', ['a', 'b'], None),
+                                     ('bad', None, 'bogus')]:
+        q = makeQuery(srv, fields=['x', 'z'], fieldlabels=['X', 'Z'],
+                      aggregate=aggregate)
+        if tagvals is not None:
+            q.tagnames = 's'
+            q.tagvals = tagvals
+        queries[name] = q
+
+    results, errors = database.getBatchResultsDataFrame(queries)
+
+    assert list(errors.keys()) == ['bad']
+    assert results['bad'] is None
+    assert results['plain'].equals(
+        database.getResultsDataFrame(queries['plain']))
+    single = database.getResultsDataFrame(queries['grouped'])
+    assert sorted(results['grouped'].keys()) == ['a', 'b']
+    for tval in ['a', 'b']:
+        assert results['grouped'][tval].equals(single[tval])
+
+
+def test_lineProtocolBytes(srv, tmp_path):
+    """
+    Bare line protocol bytes work everywhere packets do: buffered,
+    spooled, and from writeDataFrame
+    """
+    buffered = database.influxobj(tablename='t', host='127.0.0.1',
+                                  port=srv.port, batchsize=100)
+    buffered.write(b'm v=1.0 1\nm v=2.0 2\n')
+    buffered.shutdown()
+    assert len(srv.points('t', 'm')) == 2
+
+    srv.errorrate = 1.
+    spooled = database.influxobj(tablename='t', host='127.0.0.1',
+                                 port=srv.port, spooldir=str(tmp_path))
+    assert spooled.writeToDB(b'm v=3.0 3\nm v=4.0 4\n', timeprec='s') is False
+    frame = pd.DataFrame({'v': [5., 6.]},
+                         index=pd.to_datetime([5, 6], unit='s', utc=True))
+    assert spooled.writeDataFrame(frame, 'm', timeprec='s') is False
+    assert spooled.spool.stats()['spooled'] == 4
+
+    srv.errorrate = 0.
+    assert spooled.spool.drain() is True
+    spooled.shutdown()
+    assert [p[2]['v'] for p in srv.points('t', 'm')] == [1., 2., 3., 4.,
+                                                         5., 6.]
+
+
+def test_numpyIntThenPythonInt(srv):
+    """
+    NumPy integers go out as floats, so that's what gets learned, and a
+    plain int afterwards is coerced instead of hitting a type conflict
+    """
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             keepalive=True,
+                             typeregistry=fieldtypes.fieldTypeRegistry())
+    assert idb.writeToDB([{'measurement': 'm', 'fields': {'v': np.int64(1)},
+                           'time': 1}], timeprec='s') is True
+    assert idb.types.types['m'] == {'v': 'float'}
+
+    assert idb.writeToDB([{'measurement': 'm', 'fields': {'v': 2},
+                           'time': 2}], timeprec='s') is True
+    assert idb.lastError is None
+    idb.shutdown()
+    assert [p[2]['v'] for p in srv.points('t', 'm')] == [1., 2.]
+    assert srv.nerrors == 0
+
+
+def test_v2Microseconds(srv):
+    idb = database.influx2obj(tablename='b', host='127.0.0.1', port=srv.port,
+                              org='o')
+    ts = dt.datetime(2020, 1, 1, 0, 0, 0, 123456)
+    assert idb.writeToDB([{'measurement': 'm', 'fields': {'v': 1.},
+                           'time': ts}], timeprec='us') is True
+    idb.closeDB()
+    assert srv.points('b', 'm')[0][0] == 1577836800123456000
+
+
+def _point(ts, val=1.):
+    return [{'measurement': 'm', 'fields': {'v': val}, 'time': ts}]
+
+
+def test_retries(srv):
+    srv.errorrate = 1.
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             keepalive=True, retries=2, retrydelay=0.)
+    assert idb.writeToDB(_point(1), timeprec='s') is False
+    assert srv.nerrors == 3
+
+    srv.errorrate = 0.
+    assert idb.writeToDB(_point(2), timeprec='s') is True
+    idb.shutdown()
+
+
+def test_breakerFailsFast(srv):
+    srv.errorrate = 1.
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             keepalive=True, breakerfails=2,
+                             breakerreset=60.)
+    for ts in range(3):
+        assert idb.writeToDB(_point(ts), timeprec='s') is False
+    # The third never made it to the server
+    assert srv.nerrors == 2
+    assert idb.breaker.state == 'open'
+    idb.shutdown()
+
+
+def test_breakerSurvivesExceptions(srv):
+    srv.errorrate = 1.
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             keepalive=True, breakerfails=1,
+                             breakerreset=0.)
+    assert idb.writeToDB(_point(1), timeprec='s') is False
+    assert idb.breaker.state == 'open'
+
+    # The trial write blows up before it gets anywhere
+    srv.errorrate = 0.
+    with pytest.raises(KeyError):
+        idb.writeToDB([{'fields': {'v': 1.}, 'time': 2}], timeprec='s')
+    assert idb.breaker.state == 'open'
+
+    assert idb.writeToDB(_point(3), timeprec='s') is True
+    assert idb.breaker.state == 'closed'
+    idb.shutdown()
+
+
+def test_longBatchQuery(srv, makeQuery):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port)
+    now = int(time.time())
+    idb.singleCommit([{'measurement': 'm', 'fields': {'x': float(i)},
+                       'time': now - 600 + i} for i in range(300)],
+                     table='t', timeprec='s', close=True)
+
+    # Far too long to go in a URL
+    queries = {'q%d' % (i): makeQuery(srv, fields=['x'], fieldlabels=['X'])
+               for i in range(1000)}
+    results, errors = database.getBatchResultsDataFrame(queries)
+
+    assert errors == {}
+    assert all([len(res) == 300 for res in results.values()])
+
+
+def _fillTagged(server, tagvals='ab'):
+    """
+    Ten minutes of points a second for each of the given tag values
+    """
+    idb = database.influxobj(tablename='t', host='127.0.0.1',
+                             port=server.port)
+    now = int(time.time())
+    idb.singleCommit([{'measurement': 'm', 'tags': {'s': s},
+                       'fields': {'x': float(i)}, 'time': now - 600 + i}
+                      for i in range(600) for s in tagvals],
+                     table='t', timeprec='s', close=True)
+
+
+def test_iterMatchesWhole(srv, makeQuery):
+    _fillTagged(srv)
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'])
+    pieces = list(database.iterResultsDataFrame(q, chunksize=100))
+    assert len(pieces) == 12
+    assert max([len(p) for p in pieces]) == 100
+    assert pd.concat(pieces).equals(database.getResultsDataFrame(q))
+
+    recs = list(database.iterResultsDataFrame(q, chunksize=100,
+                                              records=True))
+    assert np.concatenate(recs)['X'].tolist() == \
+        [float(i) for i in range(600) for _ in 'ab']
+
+    q.tagnames = 's'
+    q.tagvals = ['a', 'b']
+    whole = database.getResultsDataFrame(q)
+    merged = {}
+    for piece in database.iterResultsDataFrame(q, chunksize=100):
+        for tval, df in piece.items():
+            merged.setdefault(tval, []).append(df)
+    assert sorted(merged.keys()) == ['a', 'b']
+    for tval in ['a', 'b']:
+        assert pd.concat(merged[tval]).equals(whole[tval])
+
+
+def test_splitMatchesWhole(srv, makeQuery):
+    _fillTagged(srv, tagvals='abcde')
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'], tagnames='s',
+                  tagvals=['a', 'b', 'c', 'd', 'e', 'nothere'])
+    whole = database.getResultsDataFrame(q)
+    nqueries = srv.nqueries
+    split = database.getResultsDataFrameSplit(q, tagsperquery=2, nthreads=3)
+
+    assert srv.nqueries == nqueries + 3
+    assert sorted(split.keys()) == sorted(whole.keys())
+    for tval in whole:
+        assert split[tval].equals(whole[tval])
+
+    q.tagvals = ['nothere']
+    assert database.getResultsDataFrameSplit(q).equals(
+        database.getResultsDataFrame(q))
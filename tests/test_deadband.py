@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""deadband.deadbandFilter, on its own and in front of influxobj
+"""
+
+from __future__ import division, print_function, absolute_import
+
+from ligmos.utils import database, deadband
+
+
+def _pt(meas, val, ts=None, **tags):
+    pt = {'measurement': meas, 'tags': tags, 'fields': {'v': val}}
+    if ts is not None:
+        pt['time'] = ts
+    return pt
+
+
+def test_rules():
+    dbf = deadband.deadbandFilter(rules={'Weather*': {'abs': 0.5},
+                                         'Exact': {'abs': 0,
+                                                   'fields': {'v': {'rel':
+                                                                    0.1}}}},
+                                  measurements=True)
+    kept = []
+    for val in [10., 10.2, 10.6, 10.7]:
+        kept += dbf.filter([_pt('WeatherStation', val),
+                            _pt('Exact', val),
+                            _pt('Other', val)])
+
+    vals = {}
+    for pt in kept:
+        vals.setdefault(pt['measurement'], []).append(pt['fields']['v'])
+    assert vals['WeatherStation'] == [10., 10.6]
+    assert vals['Exact'] == [10.]
+    assert vals['Other'] == [10., 10.2, 10.6, 10.7]
+
+
+def test_seriesKeptApart():
+    dbf = deadband.deadbandFilter()
+    kept = dbf.filter([_pt('m', 1., s='a'), _pt('m', 1., s='b'),
+                       _pt('m', 1., s='a'), b'm v=1'])
+    assert kept == [_pt('m', 1., s='a'), _pt('m', 1., s='b'), b'm v=1']
+
+
+def test_forced():
+    dbf = deadband.deadbandFilter(forcesec=0.)
+    assert len(dbf.filter([_pt('m', 1.), _pt('m', 1.)])) == 2
+
+
+def test_filteredWrites(srv):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             deadband=deadband.deadbandFilter())
+    for i, val in enumerate([1., 1., 2., 2., 2., 3.]):
+        idb.singleCommit([_pt('m', val, ts=1600000000 + i)], table='t')
+
+    assert [fields['v'] for _, _, fields in srv.points('t', 'm')] == \
+        [1., 2., 3.]
+    assert srv.nwrites == 3
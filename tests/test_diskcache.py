@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""diskcache.diskQueryCache against fakeinflux
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+from ligmos.utils import database, diskcache, fakeinflux
+
+
+def _fill(server, value=None):
+    """
+    A point a minute for the last three days; x counts up from 0 unless
+    a fixed value is given
+    """
+    now = int(time.time())
+    pts = [{'measurement': 'm',
+            'fields': {'x': float(i) if value is None else value},
+            'time': now - 3*86400 + i*60} for i in range(3*1440)]
+    idb = database.influxobj(tablename='t', host='127.0.0.1',
+                             port=server.port)
+    idb.singleCommit(pts, table='t', timeprec='s', close=True)
+
+
+def test_aggregateWithoutGroupByTime(srv, makeQuery, tmp_path):
+    _fill(srv)
+    dc = diskcache.diskQueryCache(str(tmp_path), buckethours=6)
+    arrs = dc.getArrays(makeQuery(srv, fields=['x'], fieldlabels=['X'],
+                                  rangehours=60, aggregate='max'))
+
+    # One answer for the whole window, not one per bucket
+    assert len(arrs['time']) == 1
+    assert arrs['X'][0] == 3*1440 - 1
+    assert dc.stats()['files'] == 0
+
+
+def test_groupByTimeMatchesServer(srv, makeQuery, tmp_path):
+    _fill(srv)
+    dc = diskcache.diskQueryCache(str(tmp_path), buckethours=6)
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'], rangehours=60,
+                  aggregate='mean', groupbytime='1h')
+    cached = dc.getArrays(q)
+    again = dc.getArrays(q)
+    direct = diskcache.numpyquery.getResultsArrays(q)
+
+    assert dc.stats()['files'] > 0
+    assert list(cached['X']) == list(direct['X'])
+    assert list(again['X']) == list(direct['X'])
+
+
+def test_serversKeptApart(srv, makeQuery, tmp_path):
+    other = fakeinflux.fakeInfluxServer()
+    other.start()
+    try:
+        _fill(srv, value=1.)
+        _fill(other, value=2.)
+        dc = diskcache.diskQueryCache(str(tmp_path), buckethours=6)
+        for server, value in [(srv, 1.), (other, 2.), (srv, 1.)]:
+            q = makeQuery(server, fields=['x'], fieldlabels=['X'],
+                          rangehours=60)
+            assert set(dc.getArrays(q)['X'].tolist()) == {value}
+        assert dc.stats()['hits'] > 0
+    finally:
+        other.stop()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""fakeinflux over HTTP, the way the clients talk to it
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import gzip
+import json
+
+import requests
+
+
+def _url(srv, what):
+    return "http://127.0.0.1:%d/%s" % (srv.port, what)
+
+
+def test_writeAndQuery(srv):
+    body = b'm,s=a v=1.5,n=2i,t="x y" 1000\nm,s=b v=2.5 1000\n'
+    resp = requests.post(_url(srv, 'write'), params={'db': 't'},
+                         data=gzip.compress(body),
+                         headers={'Content-Encoding': 'gzip'})
+    assert resp.status_code == 204
+    assert srv.points('t', 'm')[0] == (1000, {'s': 'a'},
+                                       {'v': 1.5, 'n': 2, 't': 'x y'})
+
+    resp = requests.post(_url(srv, 'query'),
+                         data={'db': 't', 'epoch': 'ns',
+                               'q': 'SELECT max("v") FROM "m" '
+                                    'WHERE time > 0 GROUP BY "s"; '
+                                    'SELECT nope'})
+    results = resp.json()['results']
+    assert [s['values'][0][1] for s in results[0]['series']] == [1.5, 2.5]
+    assert 'error' in results[1]
+
+
+def test_fieldTypeConflict(srv):
+    requests.post(_url(srv, 'write'), params={'db': 't'}, data=b'm v=1.5 1')
+    resp = requests.post(_url(srv, 'write'), params={'db': 't'},
+                         data=b'm v=2i 2')
+    assert resp.status_code == 400
+    assert 'field type conflict' in resp.text
+
+
+def test_chunked(srv):
+    body = "".join(["m v=%d.0 %d\n" % (i, i) for i in range(25)])
+    requests.post(_url(srv, 'write'), params={'db': 't'}, data=body)
+    resp = requests.get(_url(srv, 'query'),
+                        params={'db': 't', 'q': 'SELECT "v" FROM "m"',
+                                'chunked': 'true', 'chunk_size': 10})
+    chunks = [json.loads(ln) for ln in resp.iter_lines() if ln]
+    sizes = [len(c['results'][0]['series'][0]['values']) for c in chunks]
+    assert sizes == [10, 10, 5]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""fanout.fanoutWriter against fakeinflux
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import threading
+
+from ligmos.utils import database, fakeinflux, fanout, metrics
+
+
+class stuckDB():
+    """
+    Stand-in target whose writes hang until released
+    """
+    def __init__(self):
+        self.release = threading.Event()
+
+    def singleCommit(self, vals, table=None, timeprec='s', close=True):
+        self.release.wait()
+        return True
+
+
+def test_everyTargetGetsEverything(srv):
+    other = fakeinflux.fakeInfluxServer()
+    other.start()
+    reg = metrics.metricsRegistry()
+    try:
+        targets = {name: database.influxobj(tablename='t', host='127.0.0.1',
+                                            port=server.port)
+                   for name, server in [('a', srv), ('b', other)]}
+        fw = fanout.fanoutWriter(targets, metricsregistry=reg)
+        for i in range(5):
+            fw.singleCommit([{'measurement': 'm', 'fields': {'v': float(i)},
+                              'time': 1600000000 + i}], table='t')
+        fw.stop(timeout=5.)
+
+        assert len(srv.points('t', 'm')) == 5
+        assert len(other.points('t', 'm')) == 5
+        snap = reg.snapshot()
+        for name in ['a', 'b']:
+            assert fw.stats()[name]['written'] == 5
+            assert snap[(('target', name),)]['fanout_write_latency_count'] == 5
+    finally:
+        other.stop()
+
+
+def test_stopWithFullQueue():
+    stuck = stuckDB()
+    fw = fanout.fanoutWriter({'stuck': stuck}, maxqueue=1,
+                             metricsregistry=metrics.metricsRegistry())
+    try:
+        # One being written, one queued, and one dropped
+        for i in range(3):
+            fw.singleCommit([b'm v=1'])
+            time.sleep(0.05)
+        assert fw.stats()['stuck']['dropped'] == 1
+
+        t0 = time.monotonic()
+        fw.stop(timeout=0.2)
+        assert time.monotonic() - t0 < 2.
+        assert fw.targets['stuck'].thread.is_alive() is True
+    finally:
+        stuck.release.set()
+    fw.targets['stuck'].thread.join(5.)
+    assert fw.targets['stuck'].thread.is_alive() is False
+    assert fw.stats()['stuck']['written'] == 2
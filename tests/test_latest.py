@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""latest.latestCache against fakeinflux
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import threading
+
+from ligmos.utils import database, latest
+
+
+def _fill(server):
+    """
+    x for tags a and b, with b's stopping a minute early; y only for a
+    """
+    now = int(time.time())
+    pts = []
+    for i in range(60):
+        pts.append({'measurement': 'm', 'tags': {'s': 'a'},
+                    'fields': {'x': float(i), 'y': 'v%d' % (i)},
+                    'time': now - 120 + i})
+        if i < 30:
+            pts.append({'measurement': 'm', 'tags': {'s': 'b'},
+                        'fields': {'x': -float(i)}, 'time': now - 120 + i})
+    idb = database.influxobj(tablename='t', host='127.0.0.1',
+                             port=server.port)
+    idb.singleCommit(pts, table='t', timeprec='s', close=True)
+
+    return (now - 61)*10**9, (now - 91)*10**9
+
+
+def test_newestValues(srv, makeQuery):
+    alast, blast = _fill(srv)
+    lc = latest.latestCache(ttl=60.)
+
+    plain = makeQuery(srv, fields=['x', 'y', 'z'], fieldlabels=['X', 'Y', 'Z'],
+                      rangehours=1)
+    grouped = makeQuery(srv, fields=['x', 'y'], fieldlabels=['X', 'Y'],
+                        rangehours=1, tagnames='s', tagvals=['a', 'b', 'c'])
+    vals = lc.getMany({'plain': plain, 'grouped': grouped})
+
+    assert vals['plain']['X'] == (alast, 59.)
+    assert vals['plain']['Y'] == (alast, 'v59')
+    assert vals['plain']['Z'] == (None, None)
+    assert vals['grouped']['a']['X'] == (alast, 59.)
+    assert vals['grouped']['b']['X'] == (blast, -29.)
+    assert vals['grouped']['b']['Y'] == (None, None)
+    assert vals['grouped']['c']['X'] == (None, None)
+
+    # Both went in one request, and now they're cached
+    assert srv.nqueries == 1
+    assert lc.get(plain) == vals['plain']
+    assert srv.nqueries == 1
+    assert lc.stats()['hits'] == 1
+
+
+def test_sharedFetch(srv, makeQuery):
+    _fill(srv)
+    srv.latency = 0.2
+    lc = latest.latestCache(ttl=60.)
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'], rangehours=1)
+
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(lc.get(q)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(answers) == 5
+    assert all([ans == answers[0] for ans in answers])
+    assert srv.nqueries == 1
+    assert lc.stats()['waits'] == 4
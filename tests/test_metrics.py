@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""metrics registry and reporter
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import gc
+import weakref
+
+from ligmos.utils import database, metrics
+
+
+def test_reporterWritesRegistry(srv):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             metricsregistry=metrics.metricsRegistry(),
+                             metricsmeas='ligmos_metrics',
+                             metricsinterval=3600.)
+    idb.singleCommit([{'measurement': 'm', 'fields': {'v': 1.},
+                       'time': 1600000000}], table='t')
+    idb.reporter.report()
+    idb.shutdown()
+
+    pts = srv.points('t', 'ligmos_metrics')
+    written = [fields['write_points'] for _, tags, fields in pts
+               if tags.get('measurement') == 'm']
+    assert written == [1]
+
+
+def test_stoppedReporterIsCollected():
+    class nullDB():
+        tablename = 't'
+
+        def singleCommit(self, *args, **kwargs):
+            pass
+
+    rep = metrics.metricsReporter(nullDB(),
+                                  registry=metrics.metricsRegistry())
+    ref = weakref.ref(rep)
+    rep.stop()
+    del rep
+    gc.collect()
+    assert ref() is None
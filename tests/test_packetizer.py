@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""Line protocol encoding in packetizer.makeLines
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from ligmos.utils import packetizer
+
+
+def test_numpyNumbersAreFloats():
+    # Same as influxdb-python did, so existing fields keep their type
+    line = packetizer.makeLine('m', fields={'a': np.int64(3), 'b': 3,
+                                            'c': np.float32(1.5)})
+    assert line == b'm a=3.0,b=3i,c=1.5'
+
+
+@pytest.mark.parametrize("ts, prec, expected", [
+    (dt.datetime(2262, 1, 1, 0, 0, 0, 999999), 'n', 9214646400999999000),
+    (dt.datetime(2020, 1, 1, 0, 0, 0, 123456), 'ms', 1577836800123),
+    ('2020-01-01T00:00:00.123456789Z', 'n', 1577836800123456789),
+    ('2020-01-01T01:00:00+01:00', 's', 1577836800),
+])
+def test_timestamps(ts, prec, expected):
+    assert packetizer.lineTimestamp(ts, timeprec=prec) == expected
+
+
+def test_badStringTimestamp():
+    with pytest.raises(ValueError):
+        packetizer.makeLines([{'measurement': 'm', 'fields': {'v': 1.},
+                               'time': 'yesterday'}])
+
+
+@pytest.mark.parametrize("prec", ['u', 'us'])
+def test_microseconds(prec):
+    ts = dt.datetime(2020, 1, 1, 0, 0, 0, 123456)
+    assert packetizer.lineTimestamp(ts, timeprec=prec) == 1577836800123456
+    assert packetizer.lineTimestamp('2020-01-01T00:00:00.123456Z',
+                                    timeprec=prec) == 1577836800123456
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""InfluxQL generation in querybuilder.queryConstructor
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import warnings
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ligmos.utils import querybuilder
+
+
+def _query(makeQuery, aggregate, groupbytime):
+    return makeQuery(fields=['a', 'b'], fieldlabels=['A', 'B'],
+                     aggregate=aggregate, groupbytime=groupbytime)
+
+
+def test_aggregated(makeQuery):
+    qstr = querybuilder.queryConstructor(_query(makeQuery, ['mean', 'max'],
+                                                '5m'))
+    assert qstr == ('SELECT mean("a") AS "A", max("b") AS "B" FROM "m" '
+                    'WHERE time > now() - 24h GROUP BY time(5m)')
+
+
+@pytest.mark.parametrize("aggregate, groupbytime", [
+    (['mean', None], None),
+    (['mean'], '5m'),
+    (None, '5m'),
+])
+def test_invalidAggregates(makeQuery, aggregate, groupbytime):
+    with pytest.raises(ValueError):
+        querybuilder.queryConstructor(_query(makeQuery, aggregate,
+                                             groupbytime))
+
+
+@pytest.mark.parametrize("when", [
+    1577836800123456789,
+    '2020-01-01T00:00:00.123456789Z',
+    '2020-01-01T01:00:00.123456789+01:00',
+    pd.Timestamp('2020-01-01T00:00:00.123456789Z'),
+    np.datetime64('2020-01-01T00:00:00.123456789'),
+])
+def test_sinceUntil(makeQuery, when):
+    q = makeQuery(fields=['a'], fieldlabels=['A'])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        qstr = querybuilder.queryConstructor(q, since=when, until=when)
+    assert qstr == ('SELECT "a" AS "A" FROM "m" '
+                    'WHERE time > 1577836800123456789 '
+                    'AND time < 1577836800123456789')
+
+
+def test_awareDatetime(makeQuery):
+    q = makeQuery(fields=['a'], fieldlabels=['A'])
+    tz = dt.timezone(dt.timedelta(hours=-7))
+    qstr = querybuilder.queryConstructor(q, since=dt.datetime(2019, 12, 31,
+                                                              17, tzinfo=tz))
+    assert qstr.endswith('WHERE time > 1577836800000000000')
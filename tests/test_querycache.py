@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""querycache.queryCache against fakeinflux
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+from ligmos.utils import database, querycache
+
+
+def _write(idb, start, n):
+    now = int(time.time())
+    idb.singleCommit([{'measurement': 'm', 'fields': {'x': float(i)},
+                       'time': now - 600 + i} for i in range(start, start+n)],
+                     table='t', timeprec='s', close=True)
+
+
+def test_incrementalRefresh(srv, makeQuery):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port)
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'], rangehours=1)
+    qc = querycache.queryCache(ttl=0.)
+
+    _write(idb, 0, 100)
+    first = qc.get(q)
+    _write(idb, 100, 50)
+    second = qc.get(q)
+
+    assert len(first) == 100
+    assert second.equals(database.getResultsDataFrame(q))
+    stats = qc.stats()
+    assert stats['misses'] == 1
+    assert stats['refreshes'] == 1
+
+
+def test_ttlHit(srv, makeQuery):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port)
+    _write(idb, 0, 10)
+    q = makeQuery(srv, fields=['x'], fieldlabels=['X'], rangehours=1)
+    qc = querycache.queryCache(ttl=3600.)
+
+    first = qc.get(q)
+    nqueries = srv.nqueries
+    first['X'] = 0.
+    again = qc.get(q)
+
+    assert srv.nqueries == nqueries
+    assert list(again['X']) == [float(i) for i in range(10)]
+    assert qc.stats()['hits'] == 1
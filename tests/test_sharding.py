@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""sharding.shardPool, on its own and behind influxobj
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import gc
+import weakref
+
+from ligmos.utils import database, sharding
+
+
+class listWriter():
+    def __init__(self):
+        self.points = []
+
+    def writeToDB(self, points, table=None, timeprec='s'):
+        self.points.extend(points)
+        return True
+
+
+def test_measurementsStayInOrder():
+    lanes = [listWriter() for _ in range(4)]
+    pool = sharding.shardPool(lanes)
+    for i in range(50):
+        pool.dispatch([b'a v=%d %d' % (i, i), b'b v=%d %d' % (i, i)],
+                      't', 's')
+    pool.stop()
+
+    for lane in lanes:
+        for meas in [b'a', b'b']:
+            mine = [ln for ln in lane.points if ln.startswith(meas)]
+            assert mine == [] or \
+                mine == [b'%s v=%d %d' % (meas, i, i) for i in range(50)]
+    assert sum([st['written'] for st in pool.stats()]) == 100
+
+
+def test_stoppedPoolIsCollected():
+    pool = sharding.shardPool([listWriter()])
+    ref = weakref.ref(pool)
+    pool.stop()
+    del pool
+    gc.collect()
+    assert ref() is None
+
+
+def test_shardedWrites(srv):
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             batchsize=100, flushms=10000., shards=3,
+                             shardby='hash')
+    for i in range(300):
+        idb.write([{'measurement': 'm', 'tags': {'s': str(i % 7)},
+                    'fields': {'v': float(i)}, 'time': 1600000000 + i}])
+    idb.flush()
+    idb.shutdown()
+
+    pts = srv.points('t', 'm')
+    assert len(pts) == 300
+    for s in range(7):
+        vals = [fields['v'] for _, tags, fields in pts if tags['s'] == str(s)]
+        assert vals == sorted(vals)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""spool.diskSpool on its own and behind influxobj
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import time
+import threading
+
+from ligmos.utils import database, metrics, spool
+
+
+def _point(i):
+    return {'measurement': 'm', 'fields': {'v': float(i)},
+            'time': 1600000000 + i}
+
+
+def test_replayedSegmentIsKept(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    replayed = []
+
+    def replay(lines, table, timeprec):
+        started.set()
+        release.wait(5.)
+        replayed.extend(lines)
+        return True
+
+    sp = spool.diskSpool(str(tmp_path), replay, segmentbytes=1,
+                         registry=metrics.metricsRegistry())
+    try:
+        sp.append([_point(0)], table='t')
+        assert started.wait(5.) is True
+        first = sp.replaying
+        assert first is not None
+
+        # Only room for about two more segments, so older ones must go
+        sp.maxbytes = os.path.getsize(first)*3
+        for i in range(1, 5):
+            sp.append([_point(i)], table='t')
+        assert os.path.exists(first) is True
+
+        release.set()
+        sp.stop()
+        sp.drain()
+        stats = sp.stats()
+        assert stats['dropped'] > 0
+        assert stats['replayed'] + stats['dropped'] == stats['spooled']
+        assert stats['bytes'] == 0
+        assert len(replayed) == stats['replayed']
+    finally:
+        release.set()
+        sp.stop()
+
+
+def test_replayIsGzipped(srv, tmp_path):
+    srv.errorrate = 1.
+    idb = database.influxobj(tablename='t', host='127.0.0.1', port=srv.port,
+                             spooldir=str(tmp_path), usegzip=True,
+                             gzipminbytes=0)
+    try:
+        idb.writeToDB([_point(i) for i in range(100)], table='t')
+        assert idb.spool.stats()['spooled'] == 100
+
+        # Wait for the drainer's own attempt to fail so it backs off
+        t0 = time.monotonic()
+        while idb.spool.stats()['replayfailures'] == 0:
+            assert time.monotonic() - t0 < 5.
+            time.sleep(0.01)
+
+        before = idb.metrics.snapshot()[(('database', 't'),)]
+        srv.errorrate = 0.
+        assert idb.spool.drain() is True
+        assert len(srv.points('t', 'm')) == 100
+
+        after = idb.metrics.snapshot()[(('database', 't'),)]
+        sent = after['write_bytes'] - before['write_bytes']
+        wire = after['write_wire_bytes'] - before['write_wire_bytes']
+        assert 0 < wire < sent
+    finally:
+        idb.shutdown()
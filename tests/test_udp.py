@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+#  Created on 18 Oct 2026
+#
+#  @author: rhamilton
+
+"""udp.udpSender against a plain UDP socket standing in for the listener
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import socket
+
+import pytest
+
+from ligmos.utils import database, udp
+
+
+@pytest.fixture
+def listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(2.)
+    yield sock
+    sock.close()
+
+
+def _receive(sock, ngrams):
+    return [sock.recv(65535) for _ in range(ngrams)]
+
+
+def test_packing():
+    sender = udp.udpSender(host='127.0.0.1', port=9, mtu=20)
+    grams = sender.pack(b'm v=1 1\nm v=2 2\nm v=3 3\n' +
+                        b'm,long=tagvalue v=4 4\n')
+    sender.close()
+
+    assert grams == [(b'm v=1 1\nm v=2 2\n', 2), (b'm v=3 3\n', 1),
+                     (b'm,long=tagvalue v=4 4\n', 1)]
+    assert sender.stats()['oversize'] == 1
+
+
+def test_rescaledSend(listener):
+    sender = udp.udpSender(host='127.0.0.1', port=listener.getsockname()[1],
+                           mtu=1400, timeprec='ms')
+    pts = [{'measurement': 'm', 'fields': {'v': float(i)},
+            'time': 1600000000 + i} for i in range(3)]
+    assert sender.send(pts, timeprec='s') == (3, 0)
+    sender.close()
+
+    assert _receive(listener, 1) == [b'm v=0.0 1600000000000\n'
+                                     b'm v=1.0 1600000001000\n'
+                                     b'm v=2.0 1600000002000\n']
+
+
+def test_udpWrites(listener):
+    idb = database.influxobj(tablename='t', host='127.0.0.1',
+                             udpport=listener.getsockname()[1], udpmtu=100,
+                             udpprecision='s')
+    idb.singleCommit([{'measurement': 'm', 'fields': {'v': float(i)},
+                       'time': 1600000000 + i} for i in range(10)],
+                     table='t', timeprec='s')
+    lines = b''.join(_receive(listener, 2)).splitlines()
+    idb.shutdown()
+
+    assert lines == [b'm v=%d.0 %d' % (i, 1600000000 + i) for i in range(10)]